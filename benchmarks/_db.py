@@ -0,0 +1,27 @@
+"""
+Database for benchmarks: an in-memory mongomock-motor database when that
+package is installed (pip install mongomock-motor) and `prefer_server` is not
+set, otherwise the MongoDB at BENCH_MONGODB_URL (default
+mongodb://localhost:27017), database "bench".
+"""
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+BENCH_MONGODB_URL = os.getenv("BENCH_MONGODB_URL", "mongodb://localhost:27017")
+
+
+def bench_client(prefer_server: bool = False):
+    """(client, backend name); the benchmark database on it is "bench"."""
+    if prefer_server:
+        return AsyncIOMotorClient(BENCH_MONGODB_URL, serverSelectionTimeoutMS=5000), "mongodb"
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        return AsyncIOMotorClient(BENCH_MONGODB_URL, serverSelectionTimeoutMS=5000), "mongodb"
+    return AsyncMongoMockClient(), "mongomock"
+
+
+def bench_database(prefer_server: bool = False):
+    client, backend = bench_client(prefer_server)
+    return client["bench"], backend
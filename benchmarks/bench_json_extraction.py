@@ -0,0 +1,104 @@
+"""
+Benchmark the shared LLM JSON extractor against the old regex-then-json.loads logic.
+
+Usage (from the backend root):
+    python -m benchmarks.bench_json_extraction [--iterations 2000]
+
+Reports, for the failure corpus in benchmarks/corpus/llm_json_failures.jsonl,
+how many responses each extractor recovers, and the per-call cost on the corpus
+and on long answers made of bracket-heavy prose.
+"""
+import argparse
+import json
+import os
+import re
+import time
+from typing import List
+
+from models.prompt_questions import LLMFlags
+from models.website_analysis import GeneratedQuestion, WebsiteAnalysis
+from utils.json_extractor import extract_json
+
+CORPUS_FILE = os.path.join(os.path.dirname(__file__), "corpus", "llm_json_failures.jsonl")
+
+SCHEMAS = {
+    "WebsiteAnalysis": WebsiteAnalysis,
+    "LLMFlags": LLMFlags,
+    "List[str]": List[str],
+    "List[GeneratedQuestion]": List[GeneratedQuestion],
+}
+
+
+def legacy_extract_json(text: str):
+    """The extractor previously copied into the Gemini, ChatGPT and tagging paths."""
+    text = text.strip()
+    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
+    if json_match:
+        text = json_match.group(1).strip()
+    if text.startswith('[') or text.startswith('{'):
+        return json.loads(text)
+    match = re.search(r'[\[\{][\s\S]*[\]\}]', text)
+    if match:
+        return json.loads(match.group())
+    return json.loads(text)
+
+
+def load_corpus():
+    with open(CORPUS_FILE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def recovered(extractor, case) -> bool:
+    try:
+        extractor(case)
+        return True
+    except Exception:
+        return False
+
+
+def time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    def run_legacy(case):
+        from pydantic import TypeAdapter
+        return TypeAdapter(SCHEMAS[case["schema"]]).validate_python(legacy_extract_json(case["text"]))
+
+    def run_new(case):
+        return extract_json(case["text"], SCHEMAS[case["schema"]])
+
+    print(f"{'case':40} {'legacy':>7} {'new':>7}")
+    legacy_ok = new_ok = 0
+    for case in corpus:
+        old, new = recovered(run_legacy, case), recovered(run_new, case)
+        legacy_ok += old
+        new_ok += new
+        print(f"{case['id']:40} {'ok' if old else 'FAIL':>7} {'ok' if new else 'FAIL':>7}")
+    print(f"\nrecovered: legacy {legacy_ok}/{len(corpus)}, new {new_ok}/{len(corpus)}")
+
+    iterations = max(1, args.iterations // len(corpus))
+    legacy_us = time_per_call(lambda: [recovered(run_legacy, c) for c in corpus], iterations) / len(corpus)
+    new_us = time_per_call(lambda: [recovered(run_new, c) for c in corpus], iterations) / len(corpus)
+    print(f"corpus cost per response: legacy {legacy_us:.1f}us, new {new_us:.1f}us")
+
+    payload = json.dumps({"brandName": "Acme", "niche": "x", "purpose": "y", "services": ["a", "b"]})
+    print("\nlong answers (prose with brackets around the payload):")
+    for size in (1_000, 10_000, 100_000):
+        prose = ("Ranked list [1] (see {notes}) " * (size // 30))[:size]
+        text = f"{prose}\n{payload}\n{prose}"
+        us = time_per_call(lambda: recovered(lambda t: extract_json(t, WebsiteAnalysis), text), 20)
+        print(f"  {len(text):>7} chars: {us:10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark response rendering for a large prompt_questions document (the body
+of get-prompt-questions-data: header fields plus its Q&As).
+
+Usage (from the backend root):
+    python -m benchmarks.bench_json_response [--qna 500] [--iterations 20]
+
+Compares FastAPI's default path (jsonable_encoder + JSONResponse) with
+FastJSONResponse (orjson, no jsonable_encoder pass) on a synthetic document
+with `--qna` tagged Q&As of ~2KB answers, reporting time per response and
+peak Python memory (tracemalloc) for each.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+from beanie import init_beanie
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks._db import bench_database
+from models.prompt_questions import PromptQuestionsModel, QnAModel
+from utils.responses import FastJSONResponse
+
+ANSWER = (
+    "Here are some of the best options in Austin, Texas: 1. **Acme Plumbing** (acme.com) - "
+    "fast response times and upfront pricing. 2. Beta Co - licensed and insured. "
+) * 14
+
+
+def synthetic_document(qna_count: int) -> dict:
+    category_id = ObjectId()
+    qna = [
+        {
+            "category_id": category_id,
+            "question": f"Who is the best plumber in Austin, Texas? ({i})",
+            "answer": ANSWER,
+            "capture": True,
+            "category_name": "General",
+            "uuid": f"00000000-0000-0000-0000-{i:012d}",
+            "llm_flags": {
+                "brand_mentioned": i % 2 == 0,
+                "brand_rank": 1 if i % 2 == 0 else None,
+                "is_recommended": True,
+                "sentiment": "positive",
+                "citation_type": "first_party",
+                "features_mentioned": ["fast response", "upfront pricing"],
+                "competitors_mentioned": ["Beta Co", "Gamma.io"],
+            },
+        }
+        for i in range(qna_count)
+    ]
+    header = PromptQuestionsModel.model_validate({
+        "_id": ObjectId(),
+        "company_id": ObjectId(),
+        "project_id": ObjectId(),
+        "website_url": "acme.com",
+        "nation": "USA",
+        "state": "Texas",
+        "qna_seq": qna_count,
+        "createdAt": datetime.utcnow(),
+        "updatedAt": datetime.utcnow(),
+    })
+    return {
+        **header.model_dump(by_alias=True, exclude={"qna_seq"}, mode="json"),
+        "qna": [QnAModel.model_validate(entry).model_dump(by_alias=True, mode="json") for entry in qna],
+    }
+
+
+def default_path(doc) -> bytes:
+    return JSONResponse(jsonable_encoder(doc)).body
+
+
+def fast_path(doc) -> bytes:
+    return FastJSONResponse(doc).body
+
+
+def measure(fn, doc, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(doc)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    body = fn(doc)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024 / 1024, len(body)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--qna", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    # Beanie documents need an initialized model; nothing is written
+    database, _ = bench_database()
+    await init_beanie(
+        database=database,
+        document_models=[PromptQuestionsModel],
+        skip_indexes=True,
+    )
+    doc = synthetic_document(args.qna)
+
+    print(f"{args.qna} Q&As, median of {args.iterations} runs")
+    print(f"{'path':38} {'ms':>9} {'peak MB':>9} {'bytes':>10}")
+    results = {}
+    for name, fn in (("jsonable_encoder + JSONResponse", default_path), ("FastJSONResponse (orjson)", fast_path)):
+        results[name] = measure(fn, doc, args.iterations)
+        ms, peak_mb, size = results[name]
+        print(f"{name:38} {ms:9.2f} {peak_mb:9.2f} {size:10}")
+
+    (base_ms, base_mb, _), (fast_ms, fast_mb, _) = results.values()
+    print(f"speedup {base_ms / fast_ms:.1f}x, peak memory {fast_mb / base_mb:.0%} of default")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
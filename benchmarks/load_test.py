@@ -0,0 +1,605 @@
+"""
+Offline load test: every route in routes/ at a fixed concurrency, with
+stand-ins for Gemini, the ChatGPT browser and MongoDB.
+
+Usage (from the backend root):
+    python -m benchmarks.load_test [--concurrency 16] [--requests 200]
+        [--routes calculate-geo-metrics,get-qna-answer]
+        [--llm-latency-ms 50] [--llm-latency-sigma 0.5] [--llm-error-rate 0]
+        [--browser-latency-ms 100] [--output results.json] [--compare baseline.json]
+
+Requests go straight to the ASGI app in this process (no sockets), so numbers
+measure the app and the database, not the network stack:
+
+- Gemini: `utils.llm.genai` returns a fake SDK whose calls sleep for a
+  log-normal latency (median `--llm-latency-ms`, shape `--llm-latency-sigma`),
+  fail with probability `--llm-error-rate` and answer canned JSON matched on
+  the prompt. The synchronous `generate_content` sleeps with `time.sleep`,
+  blocking the event loop just like the real SDK call does.
+- ChatGPT: the browser session sleeps for `--browser-latency-ms` (sessions are
+  still serialized by the profile lease).
+- MongoDB: see benchmarks/_db.py; `--mongodb` forces the server at
+  BENCH_MONGODB_URL instead of the in-memory stand-in. Its timings include
+  real query planning and network round trips, so only compare runs that
+  used the same backend.
+
+Each route runs as its own phase of `--requests` requests. The report lists
+throughput, p50/p95/p99 latency and errors (status >= 500 or exceptions) per
+route; `--output` writes it as JSON, and `--compare` prints the relative change
+against an earlier JSON run.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+os.environ.setdefault("GOOGLE_API_KEY", "load-test")
+os.environ.setdefault("LEASE_DIR", os.path.join(tempfile.gettempdir(), "load_test_locks"))
+os.environ.setdefault("METRICS_ENABLED", "false")
+
+CATEGORIES = ("General", "Brand", "Comparison")
+BRAND = "Acme"
+ANSWER_WITH_BRAND = (
+    "Here are some of the best options in Austin, Texas: 1. **Acme Plumbing** (acme.com) - fast "
+    "response times and upfront pricing. 2. Beta Co - licensed and insured. "
+) * 6
+ANSWER_WITHOUT_BRAND = "Beta Co and Gamma.io are the most recommended plumbers in Austin. " * 8
+
+
+# 🔹 Gemini stand-in
+
+class FakeLLMError(RuntimeError):
+    """Injected by --llm-error-rate."""
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def canned_answer(prompt: str) -> str:
+    if "GEO (Generative Engine Optimization) analyzer" in prompt:
+        mentioned = BRAND in prompt.split("Answer:", 1)[-1]
+        return json.dumps({
+            "brand_mentioned": mentioned,
+            "brand_rank": 1 if mentioned else None,
+            "is_recommended": mentioned,
+            "sentiment": "positive" if mentioned else "neutral",
+            "citation_type": "first_party" if mentioned else "none",
+            "features_mentioned": ["upfront pricing"] if mentioned else [],
+            "competitors_mentioned": ["Beta Co"],
+        })
+    if "competitive analysis expert" in prompt:
+        return '["Beta Co", "Gamma.io"]'
+    if "Generate exactly" in prompt:
+        return json.dumps([
+            {"category": name, "text": f"Who is the best {name.lower()} plumber in Austin?"} for name in CATEGORIES
+        ])
+    if "Analyze the website" in prompt:
+        return json.dumps({"brandName": BRAND, "niche": "Plumbing", "purpose": "Repairs", "services": ["Pipes"]})
+    return ANSWER_WITH_BRAND
+
+
+class FakeGenAI:
+    """Just enough of `google.generativeai` for the controllers."""
+
+    def __init__(self, latency_ms: float, sigma: float, error_rate: float, rng: random.Random):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rng = rng
+        self.calls = 0
+        self.errors = 0
+        fake = self
+
+        class GenerativeModel:
+            def __init__(self, name: str = ""):
+                self.name = name
+
+            async def generate_content_async(self, prompt, **kwargs):
+                await asyncio.sleep(fake.latency())
+                return fake.respond(prompt)
+
+            def generate_content(self, prompt, **kwargs):
+                time.sleep(fake.latency())
+                return fake.respond(prompt)
+
+        self.GenerativeModel = GenerativeModel
+
+    @staticmethod
+    def GenerationConfig(**kwargs):
+        return kwargs
+
+    def latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0
+        return self.rng.lognormvariate(math.log(self.latency_ms), self.sigma) / 1000
+
+    def respond(self, prompt: str) -> _FakeResponse:
+        self.calls += 1
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            raise FakeLLMError("injected Gemini failure")
+        return _FakeResponse(canned_answer(prompt))
+
+
+def install_stand_ins(args, rng: random.Random) -> FakeGenAI:
+    import utils.llm
+    import controllers.chatgpt_controller as chatgpt_controller
+
+    fake = FakeGenAI(args.llm_latency_ms, args.llm_latency_sigma, args.llm_error_rate, rng)
+    utils.llm.genai = lambda: fake
+
+    async def browser_session(question: str, headless: bool, is_retry: bool = False) -> str:
+        await asyncio.sleep(args.browser_latency_ms / 1000)
+        return canned_answer(question)
+
+    chatgpt_controller._run_chatgpt_session = browser_session
+    return fake
+
+
+# 🔹 In-process ASGI client
+
+async def asgi_post(app, path: str, body: Optional[dict]) -> Tuple[int, int]:
+    """POST `body` as JSON to `app`; returns (status, response body bytes)."""
+    payload = orjson.dumps(body) if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"load-test"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("load-test", 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status = 0
+    size = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        response_done.set()
+    return status, size
+
+
+# 🔹 Fixtures
+
+@dataclass
+class Fixtures:
+    rng: random.Random
+    company_ids: List[str] = field(default_factory=list)
+    project_ids: List[str] = field(default_factory=list)
+    category_ids: List[str] = field(default_factory=list)
+    # prompt_questions id -> Q&A uuids
+    documents: Dict[str, List[str]] = field(default_factory=dict)
+    disposable_companies: List[str] = field(default_factory=list)
+    disposable_projects: List[str] = field(default_factory=list)
+
+    def company(self) -> str:
+        return self.rng.choice(self.company_ids)
+
+    def project(self) -> str:
+        return self.rng.choice(self.project_ids)
+
+    def document(self) -> str:
+        return self.rng.choice(list(self.documents))
+
+    def qna(self) -> Tuple[str, str]:
+        document = self.document()
+        return document, self.rng.choice(self.documents[document])
+
+    @staticmethod
+    def take(pool: List[str]) -> str:
+        # Deletes need a fresh target each time; an empty pool yields 404s
+        return pool.pop() if pool else "000000000000000000000000"
+
+
+async def seed(args, rng: random.Random) -> Fixtures:
+    from controllers.company_controller import create_company
+    from controllers.project_controller import create_project
+    from models.prompt_questions import GeoMetricsAggregate, PromptQuestionsModel
+    from models.questionsCategory import QuestionsCategoryModel
+    from utils.qna_store import append_qna
+
+    fixtures = Fixtures(rng=rng)
+    for name in CATEGORIES:
+        category = QuestionsCategoryModel(
+            name=name,
+            prompt_instruction="Ask which {niche} business to choose in {state}, {nation} (mention {brandName}).",
+        )
+        await category.insert()
+        fixtures.category_ids.append(str(category.id))
+
+    for c in range(args.companies):
+        company = await create_company(f"Company {c}", website=f"company{c}.com")
+        fixtures.company_ids.append(str(company.id))
+        for p in range(args.projects_per_company):
+            project = await create_project(str(company.id), f"Project {c}.{p}", domain=f"company{c}.com")
+            fixtures.project_ids.append(str(project.id))
+
+    for d in range(args.documents):
+        project_id = fixtures.project_ids[d % len(fixtures.project_ids)]
+        company_id = fixtures.company_ids[(d % len(fixtures.project_ids)) // args.projects_per_company]
+        document = PromptQuestionsModel(
+            company_id=company_id,
+            project_id=project_id,
+            website_url="acme.com",
+            nation="USA",
+            state="Texas",
+            geo_metrics=GeoMetricsAggregate(initialized=True),
+        )
+        await document.insert()
+        rows = [
+            {
+                "question": f"Who is the best plumber in Austin? ({i})",
+                "answer": ANSWER_WITH_BRAND if i % 2 == 0 else ANSWER_WITHOUT_BRAND,
+                "category_id": rng.choice(fixtures.category_ids),
+                "category_name": CATEGORIES[i % len(CATEGORIES)],
+                "uuid": f"{d:08d}-0000-0000-0000-{i:012d}",
+            }
+            for i in range(args.qna)
+        ]
+        await append_qna(str(document.id), rows)
+        fixtures.documents[str(document.id)] = [row["uuid"] for row in rows]
+
+    for i in range(args.requests):
+        company = await create_company(f"Disposable {i}")
+        fixtures.disposable_companies.append(str(company.id))
+        project = await create_project(fixtures.company_ids[0], f"Disposable {i}")
+        fixtures.disposable_projects.append(str(project.id))
+    return fixtures
+
+
+# 🔹 Scenarios: one per route
+
+@dataclass
+class Scenario:
+    name: str
+    route: str
+    path: Callable[[Fixtures], str]
+    body: Callable[[Fixtures], Optional[dict]] = lambda f: None
+
+
+def _analysis() -> dict:
+    return {"brandName": BRAND, "niche": "Plumbing", "purpose": "Repairs", "services": ["Pipes"]}
+
+
+def scenarios() -> List[Scenario]:
+    def qna_answer(f: Fixtures) -> dict:
+        document, qna_uuid = f.qna()
+        return {"prompt_question_id": document, "uuid": qna_uuid}
+
+    def ask_chatgpt(f: Fixtures) -> dict:
+        document, qna_uuid = f.qna()
+        return {
+            "question": "Who is the best plumber in Austin?", "prompt_questions_id": document,
+            "category_id": f.rng.choice(f.category_ids), "uuid": qna_uuid,
+        }
+
+    return [
+        Scenario("analyze", "/api/analyze", lambda f: "/api/analyze", lambda f: {
+            "domain": "acme.com", "nation": "USA", "state": "Texas",
+            "company_id": f.company(), "project_id": f.project(),
+        }),
+        Scenario("generate-questions", "/api/generate-questions", lambda f: "/api/generate-questions", lambda f: {
+            "analysis": _analysis(), "domain": "acme.com", "nation": "USA", "state": "Texas",
+            "prompt_questions_id": f.document(),
+        }),
+        Scenario("ask", "/api/ask", lambda f: "/api/ask", lambda f: {
+            "question": "Who is the best plumber in Austin?", "nation": "USA", "state": "Texas",
+        }),
+        Scenario("ask-chatgpt", "/api/ask-chatgpt", lambda f: "/api/ask-chatgpt", ask_chatgpt),
+        Scenario("get-all-category", "/api/category/get-all-category", lambda f: "/api/category/get-all-category"),
+        Scenario(
+            "get-prompt-questions-data", "/api/category/get-prompt-questions-data",
+            lambda f: "/api/category/get-prompt-questions-data", lambda f: {"project_id": f.project()},
+        ),
+        Scenario(
+            "get-qna-answer", "/api/category/get-qna-answer", lambda f: "/api/category/get-qna-answer", qna_answer,
+        ),
+        Scenario(
+            "tag-qna-with-llm", "/api/category/tag-qna-with-llm", lambda f: "/api/category/tag-qna-with-llm",
+            lambda f: {"prompt_question_id": f.document(), "brand_name": BRAND, "competitors": ["Beta Co"],
+                       "force_retag": True},
+        ),
+        Scenario(
+            "calculate-geo-metrics", "/api/category/calculate-geo-metrics",
+            lambda f: "/api/category/calculate-geo-metrics",
+            lambda f: {"prompt_question_id": f.document(), "brand_name": BRAND, "competitors": ["Beta Co"]},
+        ),
+        Scenario("companies-list", "/api/companies/list", lambda f: "/api/companies/list"),
+        Scenario(
+            "get-company", "/api/companies/get-company/{company_id}",
+            lambda f: f"/api/companies/get-company/{f.company()}",
+        ),
+        Scenario(
+            "add-company", "/api/companies/add-company", lambda f: "/api/companies/add-company",
+            lambda f: {"name": "Load test company", "website": "load.test"},
+        ),
+        Scenario(
+            "edit-company", "/api/companies/edit-company/{company_id}",
+            lambda f: f"/api/companies/edit-company/{f.company()}", lambda f: {"description": "edited"},
+        ),
+        Scenario(
+            "delete-company", "/api/companies/delete-company/{company_id}",
+            lambda f: f"/api/companies/delete-company/{f.take(f.disposable_companies)}",
+        ),
+        Scenario(
+            "company-projects", "/api/companies/{company_id}/projects",
+            lambda f: f"/api/companies/{f.company()}/projects",
+        ),
+        Scenario("get-project", "/api/projects/{project_id}", lambda f: f"/api/projects/{f.project()}"),
+        Scenario(
+            "add-project", "/api/companies/{company_id}/add-projects",
+            lambda f: f"/api/companies/{f.company()}/add-projects", lambda f: {"name": "Load test project"},
+        ),
+        Scenario(
+            "edit-project", "/api/edit-projects/{project_id}",
+            lambda f: f"/api/edit-projects/{f.project()}", lambda f: {"description": "edited"},
+        ),
+        Scenario(
+            "delete-project", "/api/delete-projects/{project_id}",
+            lambda f: f"/api/delete-projects/{f.take(f.disposable_projects)}",
+        ),
+        Scenario(
+            "company-geo-metrics", "/api/metrics/company-geo-metrics",
+            lambda f: "/api/metrics/company-geo-metrics", lambda f: {"company_id": f.company()},
+        ),
+        Scenario(
+            "project-geo-metrics", "/api/metrics/project-geo-metrics",
+            lambda f: "/api/metrics/project-geo-metrics", lambda f: {"project_id": f.project()},
+        ),
+        Scenario(
+            "export-qna", "/api/export/qna", lambda f: "/api/export/qna", lambda f: {"company_id": f.company()},
+        ),
+        Scenario(
+            "export-metrics", "/api/export/metrics", lambda f: "/api/export/metrics",
+            lambda f: {"company_id": f.company()},
+        ),
+    ]
+
+
+def uncovered_routes(app, covered: List[str]) -> List[str]:
+    """API routes no scenario drives (a new route needs a scenario here)."""
+    from fastapi.routing import APIRoute
+
+    return sorted(
+        route.path for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith("/api/") and route.path not in covered
+    )
+
+
+# 🔹 Running and reporting
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(app, scenario: Scenario, fixtures: Fixtures, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    response_bytes = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, response_bytes
+        for _ in remaining:
+            path, body = scenario.path(fixtures), scenario.body(fixtures)
+            started = time.perf_counter()
+            try:
+                status, size = await asgi_post(app, path, body)
+            except Exception:
+                status, size = 0, 0
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            response_bytes += size
+            if status == 0 or status >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "route": scenario.route,
+        "requests": requests,
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": round(percentile(latencies, 0.50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        "avg_response_bytes": round(response_bytes / requests) if requests else None,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def format_report(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'route':27} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}"]
+    for name, result in results.items():
+        lines.append(
+            f"{name:27} {result['throughput_rps']:9.1f} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+            f"{result['p99_ms']:9.2f} {result['max_ms']:9.2f} {result['errors']:7}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(baseline: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """Relative change per route against an earlier JSON run (latency up / throughput down is worse)."""
+    def change(old, new) -> str:
+        if not old or new is None:
+            return "-"
+        return f"{(new - old) / old:+.0%}"
+
+    old_meta, old_routes = baseline.get("meta", {}), baseline.get("routes", {})
+    lines = [
+        f"vs {old_meta.get('git_revision') or '?'} ({old_meta.get('started_at', '?')}, "
+        f"{old_meta.get('database', '?')})",
+        f"{'route':27} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>9}",
+    ]
+    for name, result in current["routes"].items():
+        old = old_routes.get(name)
+        if old is None:
+            lines.append(f"{name:27} {'new':>9}")
+            continue
+        lines.append(
+            f"{name:27} {change(old['throughput_rps'], result['throughput_rps']):>9} "
+            f"{change(old['p50_ms'], result['p50_ms']):>9} {change(old['p95_ms'], result['p95_ms']):>9} "
+            f"{change(old['p99_ms'], result['p99_ms']):>9} {old['errors']:>4} -> {result['errors']:<3}"
+        )
+    return "\n".join(lines)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--routes", default="", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--projects-per-company", type=int, default=2)
+    parser.add_argument("--documents", type=int, default=10, help="prompt_questions documents")
+    parser.add_argument("--qna", type=int, default=30, help="Q&As per document")
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--browser-latency-ms", type=float, default=100)
+    parser.add_argument("--mongodb", action="store_true", help="use BENCH_MONGODB_URL even if mongomock-motor is installed")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own output")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    selected = [name.strip() for name in args.routes.split(",") if name.strip()]
+    all_scenarios = scenarios()
+    unknown = set(selected) - {scenario.name for scenario in all_scenarios}
+    if unknown:
+        parser.error(f"unknown routes {sorted(unknown)}; choose from {[s.name for s in all_scenarios]}")
+    to_run = [scenario for scenario in all_scenarios if not selected or scenario.name in selected]
+
+    import database
+    from benchmarks._db import bench_client
+
+    bench_mongo, backend = bench_client(prefer_server=args.mongodb)
+    bench_db = bench_mongo["bench"]
+    database.client, database.db = bench_mongo, bench_db
+    import main as app_module
+    from utils.log import flush_logs, logging_overhead
+
+    fake = install_stand_ins(args, rng)
+    await database.init_db()
+    if backend == "mongodb":
+        # A fresh database per run keeps results comparable
+        for name in await bench_db.list_collection_names():
+            await bench_db[name].delete_many({})
+
+    for path in uncovered_routes(app_module.app, [scenario.route for scenario in all_scenarios]):
+        print(f"⚠️ No load-test scenario for {path}")
+
+    # The app logs per request; that output is kept out of the report unless --verbose
+    app_output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    report_output = sys.stdout
+
+    print(f"Seeding {args.documents} documents x {args.qna} Q&As on {backend}...")
+    with app_output:
+        fixtures = await seed(args, rng)
+
+        started_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+        results: Dict[str, Dict[str, Any]] = {}
+        for scenario in to_run:
+            results[scenario.name] = await run_scenario(
+                app_module.app, scenario, fixtures, args.requests, args.concurrency
+            )
+            print(f"  {scenario.name}: {results[scenario.name]['throughput_rps']} req/s", file=report_output)
+        flush_logs()
+
+    report = {
+        "meta": {
+            "started_at": started_at,
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "database": backend,
+            "settings": vars(args),
+            "llm_calls": fake.calls,
+            "llm_injected_errors": fake.errors,
+            "logging": logging_overhead(),
+        },
+        "routes": results,
+    }
+    print()
+    print(format_report(results))
+    overhead = report["meta"]["logging"]
+    print(
+        f"\nlogging: {overhead['records']:.0f} records ({overhead['dropped']:.0f} dropped, "
+        f"{overhead['suppressed']:.0f} suppressed), {overhead['emit_seconds'] * 1000:.1f}ms on the event loop "
+        f"({overhead['emit_us_per_record']} us/record)"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n" + format_comparison(json.load(f), report))
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,109 +1,260 @@
 from fastapi import HTTPException
 from models.questionsCategory import QuestionsCategoryModel
-from models.prompt_questions import PromptQuestionsModel, LLMFlags
+from models.prompt_questions import PromptQuestionsModel, PromptQuestionsHeader, LLMFlags, QnAModel
 from fastapi import Request
 from bson import ObjectId
-from global_db_opretions import find_one, update_one
-import google.generativeai as genai
-import os
+from models.qna import QnAEntryModel
+from global_db_opretions import find_one, find_one_raw, find_page, write_one, BulkWriteBatch, InvalidCursorError
+from utils.answer_codec import with_full_answer
+from utils.qna_store import QNA_API_PROJECTION, apply_to_parent, count_qna, iter_qna, list_qna, qna_query, to_api
+from utils.pagination import page_params
+from utils.cache import reference_cache
+from utils.streaming import json_stream_response, stream_json_object
+from utils.json_extractor import extract_json
+from utils.geo_aggregates import (
+    aggregate_delta,
+    aggregate_from_qna,
+    aggregates_equal,
+    build_geo_metrics,
+    named_counts,
+    sum_updates,
+    PLACEHOLDER_ANSWER
+)
+from typing import List, Optional
+from datetime import datetime
+from utils.llm import get_model, generation_config
+from utils.telemetry import observe_llm
+from utils.singleflight import flights
+from utils.admission import admission_gate
+from utils.log import ThrottledLogger, get_logger
+import asyncio
 import json
 import re
 
-# Configure Gemini
-API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("API_KEY", "")
-if API_KEY:
-    genai.configure(api_key=API_KEY)
+logger = get_logger(__name__)
+# 🔹 Per-Q&A lines are DEBUG; INFO gets one progress line per LOG_PROGRESS_INTERVAL_SECONDS
+progress_logger = ThrottledLogger(logger)
 
-async def get_all_category_controller():
+# Tagged Q&As are written back in batches of this many updates
+TAG_WRITE_BATCH_SIZE = 20
+
+# Largest qna page get-prompt-questions-data returns
+QNA_PAGE_MAX_LIMIT = 200
+
+# Q&A rows fetched per cursor batch when streaming a whole document
+QNA_STREAM_BATCH_SIZE = 100
+
+async def get_categories() -> List[QuestionsCategoryModel]:
+    """All question categories, through the reference cache (read-only)."""
+    return await reference_cache.get_or_load(
+        "categories", "all", lambda: QuestionsCategoryModel.find_all().to_list()
+    )
+
+
+async def get_all_category_controller(body: Optional[dict] = None):
+    """
+    All question categories. Pass `limit` (and `after` from the previous
+    response's next_cursor) to page through them instead.
+    """
     try:
-        result = await QuestionsCategoryModel.find_all().to_list()
-        return result
+        limit, after, direction = page_params(body or {})
+        if limit is None:
+            result = await get_categories()
+            return result
+
+        page = await find_page(QuestionsCategoryModel, {}, limit, after, direction=direction, soft_delete=False)
+        return {
+            "categories": [QuestionsCategoryModel.model_validate(raw) for raw in page.items],
+            "next_cursor": page.next_cursor,
+            "has_more": page.has_more
+        }
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _stringify_ids(value):
+    """ObjectIds -> str, recursively, for raw documents returned by aggregations."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, dict):
+        return {k: _stringify_ids(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_stringify_ids(v) for v in value]
+    return value
+
+
+def _qna_page_pipeline(
+    prompt_questions_id: ObjectId,
+    summary: bool,
+    limit: Optional[int],
+    after_position: Optional[int]
+) -> List[dict]:
+    """
+    One keyset page of a document's Q&A rows: rows past `after_position`, in
+    order, `limit` + 1 of them so the caller can tell whether more exist.
+    Summary mode drops answer text.
+    """
+    match = {"isDeleted": False, **qna_query(prompt_questions_id)}
+    if after_position is not None:
+        match["position"] = {"$gt": after_position}
+
+    if summary:
+        projection = {
+            "_id": 0,
+            "uuid": 1,
+            "question": 1,
+            "category_id": 1,
+            "category_name": 1,
+            "llm_flags": 1,
+            "status": {
+                "$cond": [
+                    {"$in": [{"$ifNull": ["$answer", None]}, [None, PLACEHOLDER_ANSWER]]},
+                    "pending",
+                    "answered"
+                ]
+            }
+        }
+    else:
+        projection = QNA_API_PROJECTION
+
+    pipeline = [{"$match": match}, {"$sort": {"position": 1}}]
+    if limit:
+        pipeline.append({"$limit": limit + 1})
+    pipeline.append({"$project": projection})
+    return pipeline
+
+
+def _header_projection(fields: Optional[List[str]]) -> dict:
+    names = fields if fields is not None else PromptQuestionsModel.model_fields
+    # Always at least _id: an empty projection would return the whole document
+    return {"_id": 1, **{field: 1 for field in names if field not in ("id", "qna", "qna_seq")}}
+
+
+async def _stream_prompt_questions(project_id: str):
+    """
+    The full document as a streamed JSON body: the header first, then the Q&A
+    rows in order, written as they arrive from the cursor.
+    """
+    header = await find_one_raw(PromptQuestionsModel, {"project_id": ObjectId(project_id)})
+    if header is None:
+        return None
+    head = PromptQuestionsModel.model_validate(header).model_dump(by_alias=True, exclude={"qna_seq"}, mode="json")
+
+    async def entries():
+        async for row in iter_qna(header["_id"], batch_size=QNA_STREAM_BATCH_SIZE):
+            yield to_api(row)
+
+    return json_stream_response(stream_json_object(head, "qna", entries()))
+
+
 async def get_prompt_questions_data_controller(request: Request):
+    """
+    Prompt questions document of a project, with its Q&As under "qna".
+
+    Without options the whole document is returned as before. List views should
+    pass any of:
+        - fields: list[str] (optional - top-level fields to return, e.g. ["website_url", "qna"])
+        - summary: bool (optional - qna entries carry question, category, status and
+          llm_flags only; fetch answers with /get-qna-answer)
+        - limit: int (optional - qna page size, max QNA_PAGE_MAX_LIMIT)
+        - after: str (optional - uuid of the last entry of the previous page)
+        - stream: bool (optional - whole document only: stream the body entry by
+          entry instead of building it in memory)
+    """
     try:
         body = await request.json()
         project_id = body.get("project_id")
-        result = await find_one(PromptQuestionsModel,{"project_id": ObjectId(project_id)})
-        return result
-    except Exception as e:
-        import traceback
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e))
+        fields = body.get("fields")
+        summary = bool(body.get("summary", False))
+        limit = body.get("limit")
+        after = body.get("after")
 
+        if fields is None and not summary and limit is None and not after:
+            if body.get("stream"):
+                return await _stream_prompt_questions(project_id)
+            doc = await find_one(PromptQuestionsModel, {"project_id": ObjectId(project_id)})
+            if doc is None:
+                return None
+            return {
+                **doc.model_dump(by_alias=True, exclude={"qna_seq"}, mode="json"),
+                "qna": [to_api(row) for row in await list_qna(doc.id)]
+            }
 
-def extract_json_from_text(text: str):
-    """Extract JSON from LLM response text."""
-    text = text.strip()
-    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
-    if json_match:
-        text = json_match.group(1).strip()
-    if text.startswith('[') or text.startswith('{'):
-        return json.loads(text)
-    json_pattern = r'[\[\{][\s\S]*[\]\}]'
-    match = re.search(json_pattern, text)
-    if match:
-        return json.loads(match.group())
-    return json.loads(text)
+        if fields is not None:
+            unknown = set(fields) - set(PromptQuestionsModel.model_fields) - {"qna"}
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {sorted(unknown)}")
+        if limit is not None:
+            try:
+                limit = max(1, min(int(limit), QNA_PAGE_MAX_LIMIT))
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="limit must be an integer")
 
+        result = await find_one_raw(
+            PromptQuestionsModel, {"project_id": ObjectId(project_id)}, _header_projection(fields)
+        )
+        if result is None:
+            return None
 
-async def tag_qna_with_llm_controller(request: Request):
+        if fields is None or "qna" in fields:
+            after_position = None
+            if after:
+                cursor_row = await find_one_raw(
+                    QnAEntryModel, qna_query(result["_id"], uuid=after), {"position": 1}
+                )
+                # Unknown cursor -> empty page rather than restarting from the top
+                after_position = cursor_row["position"] if cursor_row else None
+            if after and after_position is None:
+                page = []
+            else:
+                pipeline = _qna_page_pipeline(result["_id"], summary, limit, after_position)
+                page = await QnAEntryModel.get_pymongo_collection().aggregate(pipeline).to_list(length=None)
+                page = [with_full_answer(row) for row in page]
+            has_more = bool(limit) and len(page) > limit
+            result["qna"] = page[:limit] if limit else page
+            result["qna_total"] = await count_qna(result["_id"])
+            result["has_more"] = has_more
+            result["next_cursor"] = result["qna"][-1].get("uuid") if has_more and result["qna"] else None
+        return _stringify_ids(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("get_prompt_questions_data_controller failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def get_qna_answer_controller(request: Request):
     """
-    ONE-TIME LLM semantic tagging for each Q&A.
-    Stores llm_flags in DB for fast metrics calculation.
+    Single Q&A entry, including its full answer, for when a list item is expanded.
     
     Request body:
         - prompt_question_id: str (required)
-        - brand_name: str (required)
-        - competitors: list[str] (optional)
-        - force_retag: bool (optional - retag even if already tagged)
+        - uuid: str (required)
     """
     try:
         body = await request.json()
         prompt_question_id = body.get("prompt_question_id")
-        brand_name = body.get("brand_name", "").strip()
-        competitors = body.get("competitors", [])
-        force_retag = body.get("force_retag", False)
-        
-        if not prompt_question_id:
-            raise HTTPException(status_code=400, detail="prompt_question_id is required")
-        if not brand_name:
-            raise HTTPException(status_code=400, detail="brand_name is required")
-        
-        # Fetch document
-        doc = await find_one(PromptQuestionsModel, {"_id": ObjectId(prompt_question_id)})
-        if not doc:
-            raise HTTPException(status_code=404, detail="Prompt questions document not found")
-        
-        qna_list = doc.qna or []
-        if not qna_list:
-            return {"message": "No Q&A data found", "tagged_count": 0}
-        
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        competitors_str = ", ".join(competitors) if competitors else "None specified"
-        
-        tagged_count = 0
-        updated_qna = []
-        
-        for idx, qna in enumerate(qna_list):
-            qna_dict = qna.dict() if hasattr(qna, 'dict') else dict(qna)
-            
-            # Skip if already tagged (unless force_retag)
-            if qna_dict.get("llm_flags") and not force_retag:
-                updated_qna.append(qna_dict)
-                continue
-            
-            question = qna_dict.get("question", "")
-            answer = qna_dict.get("answer", "")
-            
-            if not answer or answer == "Not available yet":
-                updated_qna.append(qna_dict)
-                continue
-            
-            # LLM Prompt for semantic tagging
-            prompt = f"""You are a GEO (Generative Engine Optimization) analyzer.
+        qna_uuid = body.get("uuid")
+        if not prompt_question_id or not qna_uuid:
+            raise HTTPException(status_code=400, detail="prompt_question_id and uuid are required")
+
+        row = await find_one_raw(QnAEntryModel, qna_query(prompt_question_id, uuid=qna_uuid), QNA_API_PROJECTION)
+        if not row:
+            raise HTTPException(status_code=404, detail="Q&A entry not found")
+        return _stringify_ids(with_full_answer(row))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("get_qna_answer_controller failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _tagging_prompt(brand_name: str, competitors_str: str, question: str, answer: str) -> str:
+    return f"""You are a GEO (Generative Engine Optimization) analyzer.
 
 Given:
 Brand: {brand_name}
@@ -126,48 +277,164 @@ Analyze and return STRICT JSON with these fields ONLY:
 
 Return ONLY valid JSON, no explanations."""
 
-            try:
+
+async def _tag_qna_entries(
+    prompt_question_id: str,
+    qna_list: list,
+    brand_name: str,
+    competitors: List[str],
+    force_retag: bool = False
+) -> int:
+    """
+    Tag answered Q&As with the LLM and write each result to its row, flushed to
+    Mongo in batches of TAG_WRITE_BATCH_SIZE. The matching geo_metrics deltas go
+    to the parent as one summed update per flushed batch. Unless force_retag is
+    set, a row is only written while it is still untagged, so a concurrent run
+    cannot count it twice.
+    Returns the number of entries tagged.
+    """
+    model = get_model()
+    competitors_str = ", ".join(competitors) if competitors else "None specified"
+    batch = BulkWriteBatch(QnAEntryModel, batch_size=TAG_WRITE_BATCH_SIZE)
+    pending_deltas = []
+    
+    async def write_tags(flush: bool = False, update=None):
+        """
+        Queue one tag write (sent with the batch) or flush the batch; the deltas
+        of the writes that went out move the parent counters. A failed write, or
+        a batch where some rows no longer matched (tagged meanwhile by another
+        run), drops its deltas and leaves the counters to be rebuilt.
+        """
+        nonlocal pending_deltas
+        matched_before = batch.summary.matched
+        try:
+            if flush:
+                await batch.flush()
+            else:
+                await batch.update_one(*update)
+        except BaseException:
+            pending_deltas = []
+            await apply_to_parent(prompt_question_id, {"$set": {"geo_metrics.initialized": False}})
+            raise
+        if not len(batch):
+            # The batch went out: move the counters with it, if every row took its write
+            deltas, pending_deltas = pending_deltas, []
+            if batch.summary.matched - matched_before == len(deltas):
+                await apply_to_parent(prompt_question_id, sum_updates(*deltas))
+            else:
+                await apply_to_parent(prompt_question_id, {"$set": {"geo_metrics.initialized": False}})
+    
+    tagged_count = 0
+    
+    for idx, qna in enumerate(qna_list):
+        qna_dict = qna.model_dump() if hasattr(qna, 'model_dump') else dict(qna)
+        
+        # Skip if already tagged (unless force_retag)
+        if qna_dict.get("llm_flags") and not force_retag:
+            continue
+        
+        question = qna_dict.get("question", "")
+        answer = qna_dict.get("answer", "")
+        
+        if not answer or answer == "Not available yet":
+            continue
+        
+        try:
+            with observe_llm("tag_qna"):
                 response = await model.generate_content_async(
-                    prompt,
-                    generation_config=genai.GenerationConfig(
+                    _tagging_prompt(brand_name, competitors_str, question, answer),
+                    generation_config=generation_config(
                         temperature=0.2,
                         response_mime_type="application/json"
                     )
                 )
-                
-                flags_data = extract_json_from_text(response.text)
-                
-                # Validate and create LLMFlags
-                llm_flags = {
-                    "brand_mentioned": bool(flags_data.get("brand_mentioned", False)),
-                    "brand_rank": flags_data.get("brand_rank"),
-                    "is_recommended": bool(flags_data.get("is_recommended", False)),
-                    "sentiment": flags_data.get("sentiment", "neutral"),
-                    "citation_type": flags_data.get("citation_type", "none"),
-                    "features_mentioned": flags_data.get("features_mentioned", []),
-                    "competitors_mentioned": flags_data.get("competitors_mentioned", [])
-                }
-                
-                qna_dict["llm_flags"] = llm_flags
-                tagged_count += 1
-                print(f"Tagged Q&A {idx + 1}/{len(qna_list)}: brand_mentioned={llm_flags['brand_mentioned']}")
-                
-            except Exception as e:
-                print(f"LLM tagging failed for Q&A {idx + 1}: {e}")
-                # Keep qna without flags on error
             
-            updated_qna.append(qna_dict)
+            flags = extract_json(response.text, LLMFlags)
+            
+        except asyncio.CancelledError:
+            # The request went away: keep the tags already paid for, then stop
+            await write_tags(flush=True)
+            logger.info("🛑 LLM tagging cancelled after %d of %d Q&As", tagged_count, len(qna_list))
+            raise
+        except Exception as e:
+            # Keep qna without flags on error
+            logger.warning("❌ LLM tagging failed for Q&A %d: %s", idx + 1, e)
+            continue
+        
+        llm_flags = {
+            "brand_mentioned": flags.brand_mentioned,
+            "brand_rank": flags.brand_rank,
+            "is_recommended": flags.is_recommended,
+            "sentiment": flags.sentiment or "neutral",
+            "citation_type": flags.citation_type or "none",
+            "features_mentioned": flags.features_mentioned,
+            "competitors_mentioned": flags.competitors_mentioned
+        }
+        
+        # Outside the try above: a failed write is not a failed tag and must stop the run
+        pending_deltas.append(aggregate_delta(qna_dict, {**qna_dict, "llm_flags": llm_flags}, qna_dict["uuid"]))
+        row_query = qna_query(prompt_question_id, uuid=qna_dict["uuid"])
+        if not force_retag:
+            row_query["llm_flags"] = None
+        await write_tags(update=(
+            row_query,
+            {"$set": {"llm_flags": llm_flags, "updatedAt": datetime.utcnow()}}
+        ))
+        tagged_count += 1
+        logger.debug("✅ Tagged Q&A %d/%d: brand_mentioned=%s", idx + 1, len(qna_list), llm_flags["brand_mentioned"])
+        progress_logger.info("🏷️ Tagging %s: %d/%d Q&As done", prompt_question_id, idx + 1, len(qna_list))
+    
+    await write_tags(flush=True)
+    # Rows another run tagged first are not ours
+    tagged_count = batch.summary.matched
+    logger.info("🏷️ Tagged %d of %d Q&As of %s", tagged_count, len(qna_list), prompt_question_id)
+    return tagged_count
+
+
+async def tag_qna_with_llm_controller(request: Request):
+    """
+    ONE-TIME LLM semantic tagging for each Q&A.
+    Stores llm_flags in DB for fast metrics calculation.
+    
+    Request body:
+        - prompt_question_id: str (required)
+        - brand_name: str (required)
+        - competitors: list[str] (optional)
+        - force_retag: bool (optional - retag even if already tagged)
+    """
+    try:
+        body = await request.json()
+        prompt_question_id = body.get("prompt_question_id")
+        brand_name = body.get("brand_name", "").strip()
+        competitors = body.get("competitors", [])
+        force_retag = body.get("force_retag", False)
+        
+        if not prompt_question_id:
+            raise HTTPException(status_code=400, detail="prompt_question_id is required")
+        if not brand_name:
+            raise HTTPException(status_code=400, detail="brand_name is required")
         
-        # Update document with tagged qna
-        await update_one(
-            PromptQuestionsModel,
-            {"_id": ObjectId(prompt_question_id)},
-            {"$set": {"qna": updated_qna}}
+        # Fetch document header
+        doc = await find_one(PromptQuestionsModel, {"_id": ObjectId(prompt_question_id)}, PromptQuestionsHeader)
+        if not doc:
+            raise HTTPException(status_code=404, detail="Prompt questions document not found")
+        
+        total_qna = await count_qna(prompt_question_id)
+        if not total_qna:
+            return {"message": "No Q&A data found", "tagged_count": 0}
+        
+        # Only rows that still need tags leave Mongo
+        conditions = {"answer": {"$nin": [None, "", PLACEHOLDER_ANSWER]}}
+        if not force_retag:
+            conditions["llm_flags"] = None
+        qna_list = await list_qna(prompt_question_id, conditions)
+        tagged_count = await _tag_qna_entries(
+            prompt_question_id, qna_list, brand_name, competitors, force_retag=force_retag
         )
         
         return {
             "message": "LLM tagging completed",
-            "total_qna": len(qna_list),
+            "total_qna": total_qna,
             "tagged_count": tagged_count,
             "brand_name": brand_name
         }
@@ -175,38 +442,60 @@ Return ONLY valid JSON, no explanations."""
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("tag_qna_with_llm_controller failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _load_qna_models(prompt_question_id: str) -> List[QnAModel]:
+    return [QnAModel.model_validate(row) for row in await list_qna(prompt_question_id)]
+
+
 async def calculate_geo_metrics_controller(request: Request):
     """
     Calculate GEO (Generative Engine Optimization) metrics from prompt_questions Q&A data.
-    Auto-calls LLM tagging if Q&A not tagged yet.
+    Auto-calls LLM tagging if Q&A not tagged yet. Identical requests in flight at
+    the same time share one computation, so the tagging runs once.
     
     Request body:
         - prompt_question_id: str (required)
         - brand_name: str (optional - if not provided, uses project/company data)
         - brand_url: str (optional - for first-party citation check)
-        - competitors: list[str] (optional - for competitive metrics)
+        - competitors: list[str] (optional - for competitive metrics; without it the
+          competitors already found by tagging, or discovered with Gemini when
+          Q&As still need tagging)
+        - recompute: bool (optional - rebuild counters from every Q&A and report
+          whether the stored aggregate matched, in "aggregates_verified")
     """
     try:
         body = await request.json()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    return await flights.do("calculate-geo-metrics", body, lambda: _admitted_calculate_geo_metrics(body))
+
+
+async def _admitted_calculate_geo_metrics(body: dict):
+    # Inside the flight: coalesced duplicates do not take a slot of their own
+    async with admission_gate("calculate-geo-metrics").slot():
+        return await _calculate_geo_metrics(body)
+
+
+async def _calculate_geo_metrics(body: dict):
+    try:
         prompt_question_id = body.get("prompt_question_id")
         brand_name = body.get("brand_name", "").strip()
         brand_url = body.get("brand_url", "").strip()
         competitors = body.get("competitors", [])
+        recompute = bool(body.get("recompute", False))
         
         if not prompt_question_id:
             raise HTTPException(status_code=400, detail="prompt_question_id is required")
         
-        # Fetch prompt_questions document
-        doc = await find_one(PromptQuestionsModel, {"_id": ObjectId(prompt_question_id)})
+        # Fetch prompt_questions header + precomputed counters (no answers)
+        doc = await find_one(PromptQuestionsModel, {"_id": ObjectId(prompt_question_id)}, PromptQuestionsHeader)
         if not doc:
             raise HTTPException(status_code=404, detail="Prompt questions document not found")
         brand_url = doc.website_url
-        print("brand_url",brand_url)
+        logger.debug("brand_url %s", brand_url)
         # 🔥 Auto-fetch brand_name from website analysis if not provided
         if not brand_name:
             # Try to get brand from chatgpt/gemini website analysis
@@ -229,6 +518,20 @@ async def calculate_geo_metrics_controller(request: Request):
         if not brand_name:
             raise HTTPException(status_code=400, detail="brand_name is required (could not auto-detect)")
         
+        # ⚡ Fast path: counters are maintained on every qna write
+        aggregate = doc.geo_metrics
+        if not recompute and aggregate and aggregate.initialized and not aggregate.untagged_answered:
+            if aggregate.total == 0:
+                return {
+                    "total_prompts": 0,
+                    "brand_name": brand_name,
+                    "message": "No Q&A data found"
+                }
+            if not competitors:
+                # No Gemini round-trip on the cheap read: report the competitors the tags already found
+                competitors = [name for name, count in named_counts(aggregate.competitor_counts).items() if count > 0]
+            return build_geo_metrics(aggregate, brand_name, competitors)
+        
         # 🔥 Auto-discover competitors if not provided
         niche = ""
         if not competitors:
@@ -249,7 +552,7 @@ async def calculate_geo_metrics_controller(request: Request):
             # Use LLM to find competitors based on niche
             if niche:
                 try:
-                    model = genai.GenerativeModel("gemini-2.5-flash")
+                    model = get_model()
                     comp_prompt = f"""You are a competitive analysis expert.
                     
 Brand: {brand_name}
@@ -260,23 +563,24 @@ List the top 5 direct competitors of {brand_name} in the {niche} space.
 Return ONLY a JSON array of competitor names, no explanations.
 Example: ["Competitor1", "Competitor2", "Competitor3"]"""
                     
-                    response = await model.generate_content_async(
-                        comp_prompt,
-                        generation_config=genai.GenerationConfig(
-                            temperature=0.3,
-                            response_mime_type="application/json"
+                    with observe_llm("discover_competitors"):
+                        response = await model.generate_content_async(
+                            comp_prompt,
+                            generation_config=generation_config(
+                                temperature=0.3,
+                                response_mime_type="application/json"
+                            )
                         )
-                    )
-                    competitors = extract_json_from_text(response.text)
-                    if not isinstance(competitors, list):
-                        competitors = []
-                    print(f"🔍 Auto-discovered competitors: {competitors}")
+                    competitors = extract_json(response.text, List[str])
+                    logger.info("🔍 Auto-discovered competitors: %s", competitors)
                 except Exception as e:
-                    print(f"❌ Competitor discovery failed: {e}")
+                    logger.warning("❌ Competitor discovery failed: %s", e)
                     competitors = []
         
-        qna_list = doc.qna or []
+        # 🔄 Slow path: load the Q&A, tag what is missing and rebuild the counters
+        qna_list = await _load_qna_models(prompt_question_id)
         total_prompts = len(qna_list)
+        aggregates_verified = aggregates_equal(doc.geo_metrics, aggregate_from_qna(qna_list))
         
         if total_prompts == 0:
             return {
@@ -296,222 +600,165 @@ Example: ["Competitor1", "Competitor2", "Competitor3"]"""
         
         # 🔥 Auto-tag if needed
         if needs_tagging:
-            print(f"🔄 Auto-tagging Q&A for brand: {brand_name}")
-            competitors_str = ", ".join(competitors) if competitors else "None specified"
-            model = genai.GenerativeModel("gemini-2.5-flash")
-            
-            updated_qna = []
-            for idx, qna in enumerate(qna_list):
-                qna_dict = qna.dict() if hasattr(qna, 'dict') else dict(qna)
-                
-                # Skip if already tagged
-                if qna_dict.get("llm_flags"):
-                    updated_qna.append(qna_dict)
-                    continue
-                
-                question = qna_dict.get("question", "")
-                answer = qna_dict.get("answer", "")
-                
-                if not answer or answer == "Not available yet":
-                    updated_qna.append(qna_dict)
-                    continue
-                
-                # LLM Prompt for semantic tagging
-                prompt = f"""You are a GEO (Generative Engine Optimization) analyzer.
-
-Given:
-Brand: {brand_name}
-Competitors: {competitors_str}
-
-Question:
-{question}
-
-Answer:
-{answer}
-
-Analyze and return STRICT JSON with these fields ONLY:
-- brand_mentioned: boolean (is {brand_name} mentioned in the answer?)
-- brand_rank: number or null (position where {brand_name} appears: 1=first, 2=second, etc. null if not mentioned)
-- is_recommended: boolean (is {brand_name} positively recommended?)
-- sentiment: string (positive/neutral/negative - sentiment towards {brand_name})
-- citation_type: string (first_party/third_party/none - does answer cite {brand_name}'s official source?)
-- features_mentioned: array of strings (features/qualities mentioned for {brand_name})
-- competitors_mentioned: array of strings (which competitors from the list are mentioned?)
-
-Return ONLY valid JSON, no explanations."""
-
-                try:
-                    response = await model.generate_content_async(
-                        prompt,
-                        generation_config=genai.GenerationConfig(
-                            temperature=0.2,
-                            response_mime_type="application/json"
-                        )
-                    )
-                    
-                    flags_data = extract_json_from_text(response.text)
-                    
-                    llm_flags = {
-                        "brand_mentioned": bool(flags_data.get("brand_mentioned", False)),
-                        "brand_rank": flags_data.get("brand_rank"),
-                        "is_recommended": bool(flags_data.get("is_recommended", False)),
-                        "sentiment": flags_data.get("sentiment", "neutral"),
-                        "citation_type": flags_data.get("citation_type", "none"),
-                        "features_mentioned": flags_data.get("features_mentioned", []),
-                        "competitors_mentioned": flags_data.get("competitors_mentioned", [])
-                    }
-                    
-                    qna_dict["llm_flags"] = llm_flags
-                    print(f"✅ Tagged Q&A {idx + 1}/{len(qna_list)}")
-                    
-                except Exception as e:
-                    print(f"❌ LLM tagging failed for Q&A {idx + 1}: {e}")
-                
-                updated_qna.append(qna_dict)
+            logger.info("🔄 Auto-tagging Q&A for brand: %s", brand_name)
+            await _tag_qna_entries(prompt_question_id, qna_list, brand_name, competitors)
             
-            # Save tagged data to DB
-            await update_one(
+            # Refresh rows and counters with the new tags
+            doc = await find_one(PromptQuestionsModel, {"_id": ObjectId(prompt_question_id)}, PromptQuestionsHeader)
+            qna_list = await _load_qna_models(prompt_question_id)
+        
+        aggregate = aggregate_from_qna(qna_list)
+        if not aggregates_equal(doc.geo_metrics, aggregate):
+            await write_one(
                 PromptQuestionsModel,
                 {"_id": ObjectId(prompt_question_id)},
-                {"$set": {"qna": updated_qna}}
+                {"$set": {"geo_metrics": aggregate.model_dump()}}
             )
-            
-            # Refresh doc with updated data
-            doc = await find_one(PromptQuestionsModel, {"_id": ObjectId(prompt_question_id)})
-            qna_list = doc.qna or []
         
+        if aggregate.untagged_answered:
+            # Tagging failed for some answers: fall back to regex detection for those
+            result = _metrics_from_qna(qna_list, brand_name, brand_url, competitors)
+        else:
+            result = build_geo_metrics(aggregate, brand_name, competitors)
+        if recompute:
+            result["aggregates_verified"] = aggregates_verified
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("_calculate_geo_metrics failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-        # Initialize counters
-        mentions = 0
-        top_3_mentions = 0
-        zero_mention_prompts = []
-        first_party_citations = 0
-        recommended_count = 0
-        positive_sentiment_count = 0
-        competitor_mentions = {comp: 0 for comp in competitors}
-        brand_features = set()
-        using_llm_flags = False
+def _metrics_from_qna(qna_list, brand_name: str, brand_url: str, competitors: List[str]) -> dict:
+    """Metrics straight from the Q&A list, using regex detection for untagged answers."""
+    total_prompts = len(qna_list)
+
+    # Initialize counters
+    mentions = 0
+    top_3_mentions = 0
+    zero_mention_prompts = []
+    first_party_citations = 0
+    recommended_count = 0
+    positive_sentiment_count = 0
+    competitor_mentions = {comp: 0 for comp in competitors}
+    brand_features = set()
+    using_llm_flags = False
+    
+    for qna in qna_list:
+        question = qna.question or ""
+        answer = qna.answer or ""
+        category_name = qna.category_name
         
-        for qna in qna_list:
-            question = qna.question or ""
-            answer = qna.answer or ""
-            category_name = qna.category_name
+        # 🔥 Use LLM flags if available (10x faster + accurate)
+        llm_flags = getattr(qna, 'llm_flags', None)
+        if llm_flags and hasattr(llm_flags, 'brand_mentioned'):
+            using_llm_flags = True
             
-            # 🔥 Use LLM flags if available (10x faster + accurate)
-            llm_flags = getattr(qna, 'llm_flags', None)
-            if llm_flags and hasattr(llm_flags, 'brand_mentioned'):
-                using_llm_flags = True
+            if llm_flags.brand_mentioned:
+                mentions += 1
                 
-                if llm_flags.brand_mentioned:
-                    mentions += 1
-                    
-                    # Top-3 position from LLM tag
-                    if llm_flags.brand_rank and llm_flags.brand_rank <= 3:
-                        top_3_mentions += 1
-                    
-                    # First-party citation from LLM
-                    if llm_flags.citation_type == "first_party":
-                        first_party_citations += 1
-                    
-                    # Recommendation & sentiment
-                    if llm_flags.is_recommended:
-                        recommended_count += 1
-                    if llm_flags.sentiment == "positive":
-                        positive_sentiment_count += 1
-                    
-                    # Features from LLM
-                    if llm_flags.features_mentioned:
-                        brand_features.update(llm_flags.features_mentioned)
-                    
-                    # Competitors mentioned by LLM
-                    if llm_flags.competitors_mentioned:
-                        for comp in llm_flags.competitors_mentioned:
-                            if comp in competitor_mentions:
-                                competitor_mentions[comp] += 1
-                else:
-                    # Zero mention
-                    zero_mention_prompts.append({
-                        "question": question,
-                        "answer_snippet": answer[:200] + "..." if len(answer) > 200 else answer,
-                        "category_name": category_name
-                    })
+                # Top-3 position from LLM tag
+                if llm_flags.brand_rank and llm_flags.brand_rank <= 3:
+                    top_3_mentions += 1
+                
+                # First-party citation from LLM
+                if llm_flags.citation_type == "first_party":
+                    first_party_citations += 1
+                
+                # Recommendation & sentiment
+                if llm_flags.is_recommended:
+                    recommended_count += 1
+                if llm_flags.sentiment == "positive":
+                    positive_sentiment_count += 1
+                
+                # Features from LLM
+                if llm_flags.features_mentioned:
+                    brand_features.update(llm_flags.features_mentioned)
+                
+                # Competitors mentioned by LLM
+                if llm_flags.competitors_mentioned:
+                    for comp in llm_flags.competitors_mentioned:
+                        if comp in competitor_mentions:
+                            competitor_mentions[comp] += 1
             else:
-                # 🔹 Fallback: Regex-based detection (slower, less accurate)
-                brand_pattern = re.compile(re.escape(brand_name), re.IGNORECASE)
-                brand_match = brand_pattern.search(answer)
+                # Zero mention
+                zero_mention_prompts.append({
+                    "question": question,
+                    "answer_snippet": answer[:200] + "..." if len(answer) > 200 else answer,
+                    "category_name": category_name
+                })
+        else:
+            # 🔹 Fallback: Regex-based detection (slower, less accurate)
+            brand_pattern = re.compile(re.escape(brand_name), re.IGNORECASE)
+            brand_match = brand_pattern.search(answer)
+            
+            if brand_match:
+                mentions += 1
+                brand_pos = brand_match.start()
                 
-                if brand_match:
-                    mentions += 1
-                    brand_pos = brand_match.start()
-                    
-                    # Simple heuristic for top-3
-                    lines = [l.strip() for l in answer.split('\n') if l.strip()]
-                    numbered_items = [l for l in lines if re.match(r'^[\d\.\-\*]+', l)]
-                    
-                    if numbered_items:
-                        first_3_items = ' '.join(numbered_items[:3])
-                        if brand_pattern.search(first_3_items):
-                            top_3_mentions += 1
-                    elif brand_pos < len(answer) * 0.3:
+                # Simple heuristic for top-3
+                lines = [l.strip() for l in answer.split('\n') if l.strip()]
+                numbered_items = [l for l in lines if re.match(r'^[\d\.\-\*]+', l)]
+                
+                if numbered_items:
+                    first_3_items = ' '.join(numbered_items[:3])
+                    if brand_pattern.search(first_3_items):
                         top_3_mentions += 1
-                    
-                    # First-party citation check
-                    if brand_url and brand_url.lower() in answer.lower():
-                        first_party_citations += 1
-                else:
-                    zero_mention_prompts.append({
-                        "question": question,
-                        "answer_snippet": answer[:200] + "..." if len(answer) > 200 else answer,
-                        "category_name": category_name
-                    })
+                elif brand_pos < len(answer) * 0.3:
+                    top_3_mentions += 1
+                
+                # First-party citation check
+                if brand_url and brand_url.lower() in answer.lower():
+                    first_party_citations += 1
+            else:
+                zero_mention_prompts.append({
+                    "question": question,
+                    "answer_snippet": answer[:200] + "..." if len(answer) > 200 else answer,
+                    "category_name": category_name
+                })
+    
+    # Calculate metrics
+    brand_mention_rate = round((mentions / total_prompts) * 100, 2) if total_prompts > 0 else 0
+    top_3_position_rate = round((top_3_mentions / mentions) * 100, 2) if mentions > 0 else 0
+    first_party_citation_rate = round((first_party_citations / mentions) * 100, 2) if mentions > 0 else 0
+    recommendation_rate = round((recommended_count / mentions) * 100, 2) if mentions > 0 else 0
+    positive_sentiment_rate = round((positive_sentiment_count / mentions) * 100, 2) if mentions > 0 else 0
+    
+    # Comparison presence (how often brand appears with competitors)
+    comparison_presence = 0
+    prompts_with_comparison = sum(1 for comp, count in competitor_mentions.items() if count > 0)
+    if competitors and mentions > 0:
+        comparison_presence = round((prompts_with_comparison / len(competitors)) * 100, 2)
+    
+    return {
+        "brand_name": brand_name,
+        "total_prompts": total_prompts,
+        "using_llm_flags": using_llm_flags,
         
-        # Calculate metrics
-        brand_mention_rate = round((mentions / total_prompts) * 100, 2) if total_prompts > 0 else 0
-        top_3_position_rate = round((top_3_mentions / mentions) * 100, 2) if mentions > 0 else 0
-        first_party_citation_rate = round((first_party_citations / mentions) * 100, 2) if mentions > 0 else 0
-        recommendation_rate = round((recommended_count / mentions) * 100, 2) if mentions > 0 else 0
-        positive_sentiment_rate = round((positive_sentiment_count / mentions) * 100, 2) if mentions > 0 else 0
+        # Brand Mention Rate
+        "total_mentions": mentions,
+        "brand_mention_rate": brand_mention_rate,
         
-        # Comparison presence (how often brand appears with competitors)
-        comparison_presence = 0
-        prompts_with_comparison = sum(1 for comp, count in competitor_mentions.items() if count > 0)
-        if competitors and mentions > 0:
-            comparison_presence = round((prompts_with_comparison / len(competitors)) * 100, 2)
+        # Top-3 Position Rate
+        "top_3_mentions": top_3_mentions,
+        "top_3_position_rate": top_3_position_rate,
         
-        return {
-            "brand_name": brand_name,
-            "total_prompts": total_prompts,
-            "using_llm_flags": using_llm_flags,
-            
-            # Brand Mention Rate
-            "total_mentions": mentions,
-            "brand_mention_rate": brand_mention_rate,
-            
-            # Top-3 Position Rate
-            "top_3_mentions": top_3_mentions,
-            "top_3_position_rate": top_3_position_rate,
-            
-            # Zero-Mention Gap
-            "zero_mention_count": len(zero_mention_prompts),
-            "zero_mention_prompts": zero_mention_prompts,
-            
-            # First-Party Citation
-            "first_party_citations": first_party_citations,
-            "first_party_citation_rate": first_party_citation_rate,
-            
-            # 🆕 LLM-based metrics (only accurate when using_llm_flags=True)
-            "recommendation_rate": recommendation_rate,
-            "positive_sentiment_rate": positive_sentiment_rate,
-            
-            # Competitive Metrics
-            "competitor_mentions": competitor_mentions,
-            "comparison_presence": comparison_presence,
-            "brand_features": list(brand_features)
-        }
+        # Zero-Mention Gap
+        "zero_mention_count": len(zero_mention_prompts),
+        "zero_mention_prompts": zero_mention_prompts,
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e))      
\ No newline at end of file
+        # First-Party Citation
+        "first_party_citations": first_party_citations,
+        "first_party_citation_rate": first_party_citation_rate,
+        
+        # 🆕 LLM-based metrics (only accurate when using_llm_flags=True)
+        "recommendation_rate": recommendation_rate,
+        "positive_sentiment_rate": positive_sentiment_rate,
+        
+        # Competitive Metrics
+        "competitor_mentions": competitor_mentions,
+        "comparison_presence": comparison_presence,
+        "brand_features": list(brand_features)
+    }
@@ -2,18 +2,26 @@ import asyncio
 import os
 import random
 import json
-from playwright.async_api import async_playwright
-from playwright_stealth import Stealth
-from models.prompt_questions import PromptQuestionsModel
+import time
+from models.prompt_questions import PromptQuestionsModel, GeoMetricsAggregate
 from models.questionsCategory import QuestionsCategoryModel
 from models.website_analysis import WebsiteAnalysisResponse
-from global_db_opretions import find_one,update_one
+from utils.qna_store import append_qna, update_qna
+from utils.leases import lease
+from utils.telemetry import observe_browser_session
+from utils.singleflight import flights
+from utils.admission import admission_gate
+from utils.log import ThrottledLogger, get_logger
 from bson import ObjectId
 import uuid
 from typing import Optional
 USER_DATA_DIR = os.path.join(os.getcwd(), "user_data")
 COOKIES_FILE = os.path.join(os.getcwd(), "chatgpt_cookies.json")
 
+logger = get_logger(__name__)
+# 🔹 "...generating" is polled every 2s per session: one line per LOG_PROGRESS_INTERVAL_SECONDS is plenty
+progress_logger = ThrottledLogger(logger)
+
 USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
@@ -28,14 +36,14 @@ async def save_cookies(context):
     cookies = await context.cookies()
     with open(COOKIES_FILE, "w") as f:
         json.dump(cookies, f)
-    print(f"Cookies saved to {COOKIES_FILE}")
+    logger.debug("Cookies saved to %s", COOKIES_FILE)
 
 async def load_cookies(context):
     if cookies_exist():
         with open(COOKIES_FILE, "r") as f:
             cookies = json.load(f)
         await context.add_cookies(cookies)
-        print(f"Cookies loaded from {COOKIES_FILE}")
+        logger.debug("Cookies loaded from %s", COOKIES_FILE)
         return True
     return False
 
@@ -52,7 +60,7 @@ async def human_type(page, selector, text):
             await human_delay(100, 300)
 
 async def wait_for_cloudflare(page, timeout=30000):
-    print("Waiting for Cloudflare challenge to resolve...")
+    logger.debug("Waiting for Cloudflare challenge to resolve...")
     start_time = asyncio.get_event_loop().time()
     
     while (asyncio.get_event_loop().time() - start_time) * 1000 < timeout:
@@ -68,15 +76,15 @@ async def wait_for_cloudflare(page, timeout=30000):
                 if await page.query_selector(selector):
                     cf_found = True
                     break
-            except:
+            except Exception:
                 pass
         
         if not cf_found:
             try:
                 await page.wait_for_selector("#prompt-textarea", timeout=1000)
-                print("Cloudflare challenge passed!")
+                logger.debug("Cloudflare challenge passed!")
                 return True
-            except:
+            except Exception:
                 pass
         
         await asyncio.sleep(1)
@@ -88,20 +96,44 @@ async def handle_welcome_popup(page):
     try:
         stay_logged_out_button = page.get_by_role("link", name="Stay logged out")
         await stay_logged_out_button.wait_for(state="visible", timeout=5000)
-        print("'Stay logged out' popup found. Clicking it.")
+        logger.debug("'Stay logged out' popup found. Clicking it.")
         await stay_logged_out_button.click()
         await human_delay(1000, 2000)
     except Exception:
-        print("'Stay logged out' popup not found, continuing normally.")
+        logger.debug("'Stay logged out' popup not found, continuing normally.")
+
+def _session_outcome(result: str) -> str:
+    if result == "CAPTCHA_RETRY":
+        return "captcha"
+    if result.startswith("No response captured"):
+        return "no_response"
+    if result.startswith("Error in ask_chatgpt"):
+        return "error"
+    return "ok"
 
 async def run_chatgpt_session(question: str, headless: bool, is_retry: bool = False) -> str:
+    started = time.perf_counter()
+    try:
+        result = await _run_chatgpt_session(question, headless, is_retry)
+    except asyncio.CancelledError:
+        # The request went away (see utils/cancellation.py); the browser closed on the way out
+        observe_browser_session("cancelled", time.perf_counter() - started)
+        raise
+    observe_browser_session(_session_outcome(result), time.perf_counter() - started)
+    return result
+
+async def _run_chatgpt_session(question: str, headless: bool, is_retry: bool = False) -> str:
+    # Browser SDKs are only needed here; importing them lazily keeps worker startup fast
+    from playwright.async_api import async_playwright
+    from playwright_stealth import Stealth
+
     context = None
     try:
         async with async_playwright() as p:
             user_agent = random.choice(USER_AGENTS)
             
             mode_text = "headless" if headless else "visible browser"
-            print(f"Starting {mode_text} mode...")
+            logger.info("Starting %s mode...", mode_text)
             
             browser_args = [
                 "--disable-blink-features=AutomationControlled", "--window-size=1920,1080",
@@ -152,7 +184,7 @@ async def run_chatgpt_session(question: str, headless: bool, is_retry: bool = Fa
                 "sec-ch-ua-platform": '"macOS"',
             })
 
-            print("Opening ChatGPT...")
+            logger.debug("Opening ChatGPT...")
             await page.goto("https://chatgpt.com", wait_until="domcontentloaded")
             
             await human_delay(2000, 3000)
@@ -160,15 +192,15 @@ async def run_chatgpt_session(question: str, headless: bool, is_retry: bool = Fa
             cf_passed = await wait_for_cloudflare(page, timeout=30000)
             
             if not cf_passed and headless:
-                print("Cloudflare challenge not resolved in headless mode!")
+                logger.warning("Cloudflare challenge not resolved in headless mode!")
                 await context.close()
                 return "CAPTCHA_RETRY"
             
             await handle_welcome_popup(page)
 
             if not headless:
-                print("Please solve any captcha/login manually in the browser window...")
-                print("Waiting for input box (timeout: 120s)...")
+                logger.warning("Please solve any captcha/login manually in the browser window...")
+                logger.info("Waiting for input box (timeout: 120s)...")
             
             await human_delay(1000, 2000)
             await page.mouse.move(random.randint(100, 500), random.randint(100, 500))
@@ -179,11 +211,11 @@ async def run_chatgpt_session(question: str, headless: bool, is_retry: bool = Fa
             
             if not headless:
                 await save_cookies(context)
-                print("Cookies saved! Next requests will use headless mode.")
+                logger.info("Cookies saved! Next requests will use headless mode.")
             
             await human_delay(1000, 2000)
             
-            print(f"Typing question: {question[:50]}...")
+            logger.debug("Typing question: %s...", question[:50])
             await human_type(page, "#prompt-textarea", question)
             
             await human_delay(500, 1000)
@@ -195,7 +227,7 @@ async def run_chatgpt_session(question: str, headless: bool, is_retry: bool = Fa
                 if submit_btn:
                     await submit_btn.click()
 
-            print("Waiting for response...")
+            logger.debug("Waiting for response...")
             response_text = ""
             last_len = 0
             stable = 0
@@ -214,36 +246,49 @@ async def run_chatgpt_session(question: str, headless: bool, is_retry: bool = Fa
                     else:
                         stable = 0
                         last_len = len(response_text)
-                    print(f"...generating ({len(response_text)} chars)...")
+                    progress_logger.info("...generating (%d chars)...", len(response_text))
 
             if not response_text:
                 return "No response captured. ChatGPT may require login or selectors changed."
 
             await save_cookies(context)
 
-            print("Response captured successfully!")
+            logger.info("Response captured successfully! (%d chars)", len(response_text))
             return response_text.strip()
 
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("ChatGPT session failed")
         return f"Error in ask_chatgpt: {str(e)}"
 
     finally:
         if context:
             try:
                 await context.close()
-            except:
+            except Exception:
                 pass
 
-SESSION_LOCK = asyncio.Lock()
+# 🔹 One browser session at a time on the shared user_data profile and cookie file,
+# across every worker process (see utils/leases.py)
+SESSION_LOCK = lease("chatgpt-browser-profile")
+# 🔹 Bounded queue in front of it: requests that could not start in time get a 429
+BROWSER_GATE = admission_gate("browser")
 
 
-import json
-import re
 from models.website_analysis import WebsiteAnalysis
+from utils.json_extractor import extract_json
 
 async def analyze_website_chatgpt(domain: str, nation: str, state: str, query_context: str = "", company_id: str = "", project_id: str = ""):
+    # 🔹 Concurrent requests for the same site share one browser session and one saved analysis
+    args = {
+        "domain": domain.strip().lower(), "nation": nation, "state": state,
+        "query_context": (query_context or "").strip(), "company_id": company_id, "project_id": project_id,
+    }
+    return await flights.do(
+        "analyze", args,
+        lambda: _analyze_website_chatgpt(domain, nation, state, query_context, company_id, project_id)
+    )
+
+async def _analyze_website_chatgpt(domain: str, nation: str, state: str, query_context: str = "", company_id: str = "", project_id: str = ""):
     context_section = ""
     if query_context and query_context.strip():
         context_section = (
@@ -267,7 +312,7 @@ async def analyze_website_chatgpt(domain: str, nation: str, state: str, query_co
         'The output must be pure JSON only.'
     )
 
-    async with SESSION_LOCK:
+    async with BROWSER_GATE.slot(), SESSION_LOCK:
         has_cookies = cookies_exist()
         if has_cookies:
             result = await run_chatgpt_session(prompt, headless=True)
@@ -278,29 +323,18 @@ async def analyze_website_chatgpt(domain: str, nation: str, state: str, query_co
             result = await run_chatgpt_session(prompt, headless=True, is_retry=True)
     
     try:
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', result)
-        if json_match:
-            result = json_match.group(1).strip()
-        
-        if result.startswith('[') or result.startswith('{'):
-            parsed = json.loads(result)
-        else:
-            json_pattern = r'[\[\{][\s\S]*[\]\}]'
-            match = re.search(json_pattern, result)
-            if match:
-                parsed = json.loads(match.group())
-            else:
-                parsed = json.loads(result)
+        analysis = extract_json(result, WebsiteAnalysis)
+        parsed = analysis.model_dump()
         clean_json_str = json.dumps(parsed, ensure_ascii=False)
-        prompt_questions = PromptQuestionsModel(context=query_context,website_url=domain,nation=nation,state=state,company_id=company_id,project_id=project_id,chatgpt_website_analysis=clean_json_str)
+        prompt_questions = PromptQuestionsModel(context=query_context,website_url=domain,nation=nation,state=state,company_id=company_id,project_id=project_id,chatgpt_website_analysis=clean_json_str,geo_metrics=GeoMetricsAggregate(initialized=True))
         await prompt_questions.insert()
         return WebsiteAnalysisResponse(
-    website_analysis=WebsiteAnalysis(**parsed),
+    website_analysis=analysis,
     prompt_questions_id=str(prompt_questions.id)
 )
 
     except Exception as e:
-        print("Error", e)
+        logger.warning("Could not parse the website analysis of %s: %s", domain, e)
         return WebsiteAnalysisResponse(
         website_analysis=WebsiteAnalysis(
             brandName=domain.split('.')[0].capitalize(),
@@ -313,51 +347,30 @@ async def analyze_website_chatgpt(domain: str, nation: str, state: str, query_co
 
 
 async def ask_chatgpt(question: str,prompt_questions_id: str,category_id: str,qna_uuid: Optional[str]=None) -> str:
-    async with SESSION_LOCK:
+    async with BROWSER_GATE.slot(), SESSION_LOCK:
         has_cookies = cookies_exist()
         
         if has_cookies:
-            print("Cookies found! Starting headless mode...")
+            logger.debug("Cookies found! Starting headless mode...")
             # Set headless to True if cookies exist
             result = await run_chatgpt_session(question, headless=True)
         else:
-            print("No cookies found. Starting in visible mode for initial setup/login...")
+            logger.info("No cookies found. Starting in visible mode for initial setup/login...")
             # Set headless to False if no cookies exist
             result = await run_chatgpt_session(question, headless=True)
         
         if result == "CAPTCHA_RETRY":
-            print("Cloudflare challenge failed. Retrying once in visible mode...")
+            logger.warning("Cloudflare challenge failed. Retrying once in visible mode...")
             result = await run_chatgpt_session(question, headless=True, is_retry=True)
         if qna_uuid:
-            await update_one(
-    PromptQuestionsModel,
-    {"_id": ObjectId(prompt_questions_id)},
-    {
-        "$set": {
-            "qna.$[item].answer": result,
-            "qna.$[item].question": question
-        }
-    },
-    array_filters=[
-        {"item.uuid": qna_uuid}
-    ]
-)   
+            # The row and the parent's metric counters move together
+            await update_qna(prompt_questions_id, qna_uuid, {"answer": result, "question": question})
         else:
-            await update_one(
-    PromptQuestionsModel,
-    {"_id": ObjectId(prompt_questions_id)},
-    {
-        "$push": {
-            "qna": {
+            await append_qna(prompt_questions_id, [{
                 "question": question,
                 "answer": result,
                 "category_id": ObjectId(category_id),
                 "uuid": str(uuid.uuid4())
-            }
-        }
-    }
-)
-
-
+            }])
 
         return result
@@ -3,27 +3,81 @@ from models.project import Project
 from beanie import PydanticObjectId
 from datetime import datetime
 from typing import List, Optional
+from pymongo import ASCENDING
+from global_db_opretions import keyset_query, page_from_docs
+from utils.cache import reference_cache
+
+
+# Fields the company list returns; everything else stays on the server
+_LIST_FIELDS = ["name", "description", "website", "created_at", "updated_at"]
+
+
+def _company_list_pipeline(
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    direction: int = ASCENDING
+) -> List[dict]:
+    """
+    Companies with their project counts in one aggregation: the projects join
+    runs server-side on the company_id index instead of one count per company,
+    and counts there, so no project document is copied into the company
+    (localField/foreignField with a pipeline needs MongoDB 5.0+).
+    """
+    pipeline = [
+        {"$match": keyset_query({}, after, "_id", direction)},
+        {"$sort": {"_id": direction}},
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit + 1})
+    pipeline += [
+        {"$project": {field: 1 for field in _LIST_FIELDS}},
+        # Count inside the join: only {n: <count>} comes back, never the project documents
+        {"$lookup": {
+            "from": Project.get_collection_name(),
+            "localField": "_id",
+            "foreignField": "company_id",
+            "pipeline": [{"$count": "n"}],
+            "as": "project_count",
+        }},
+        {"$addFields": {"project_count": {"$ifNull": [{"$arrayElemAt": ["$project_count.n", 0]}, 0]}}},
+    ]
+    return pipeline
+
+
+def _company_row(raw: dict) -> dict:
+    company_id = str(raw["_id"])
+    return {
+        "_id": company_id,
+        "id": company_id,
+        **{field: raw.get(field) for field in _LIST_FIELDS},
+        "project_count": raw.get("project_count", 0)
+    }
+
+
+async def _load_all_companies() -> List[dict]:
+    rows = Company.get_pymongo_collection().aggregate(_company_list_pipeline())
+    return [_company_row(raw) async for raw in rows]
 
 
 async def get_all_companies() -> List[dict]:
-    companies = await Company.find_all().to_list()
-    result = []
-    for company in companies:
-        project_count = await Project.find(Project.company_id == company.id).count()
-        result.append({
-            "_id": str(company.id),
-            "id": str(company.id),
-            "name": company.name,
-            "description": company.description,
-            "website": company.website,
-            "created_at": company.created_at,
-            "updated_at": company.updated_at,
-            "project_count": project_count
-        })
-    return result
+    return await reference_cache.get_or_load("companies", "list", _load_all_companies)
+
+
+async def get_companies_page(limit: int, after: Optional[str] = None, direction: int = ASCENDING) -> dict:
+    rows = Company.get_pymongo_collection().aggregate(_company_list_pipeline(limit, after, direction))
+    page = page_from_docs(await rows.to_list(length=limit + 1), limit)
+    return {
+        "companies": [_company_row(raw) for raw in page.items],
+        "next_cursor": page.next_cursor,
+        "has_more": page.has_more
+    }
 
 
 async def get_company_by_id(company_id: str) -> Optional[dict]:
+    return await reference_cache.get_or_load("companies", company_id, lambda: _load_company(company_id))
+
+
+async def _load_company(company_id: str) -> Optional[dict]:
     company = await Company.get(PydanticObjectId(company_id))
     if not company:
         return None
@@ -63,6 +117,7 @@ async def create_company(name: str, description: Optional[str] = None, website:
         updated_at=datetime.utcnow()
     )
     await company.insert()
+    await reference_cache.invalidate("companies")
     return company
 
 
@@ -80,6 +135,7 @@ async def update_company(company_id: str, name: Optional[str] = None, descriptio
     company.updated_at = datetime.utcnow()
     
     await company.save()
+    await reference_cache.invalidate("companies")
     return company
 
 
@@ -91,4 +147,5 @@ async def delete_company(company_id: str) -> bool:
     await Project.find(Project.company_id == PydanticObjectId(company_id)).delete()
     
     await company.delete()
+    await reference_cache.invalidate("companies", "projects")
     return True
@@ -0,0 +1,235 @@
+from fastapi import HTTPException
+from fastapi import Request
+from pymongo import ASCENDING
+from typing import Any, AsyncIterator, Dict, Optional
+from global_db_opretions import iter_find_batches
+from models.prompt_questions import PromptQuestionsModel
+from models.qna import QnAEntryModel
+from utils.answer_codec import with_full_answer
+from utils.filters import created_at_range, parse_object_id
+from utils.geo_aggregates import named_counts, with_rates
+from utils.columnar import arrow, parquet_available, parquet_stream_response, stream_parquet
+from utils.streaming import ndjson_stream_response, stream_ndjson
+
+# Rows read from Mongo per cursor batch while exporting
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = ("ndjson", "parquet")
+
+# Rows of one append share createdAt: document and position make the order stable
+QNA_EXPORT_SORT = [("createdAt", ASCENDING), ("prompt_questions_id", ASCENDING), ("position", ASCENDING)]
+
+_FLAG_FIELDS = (
+    "brand_mentioned", "brand_rank", "is_recommended", "sentiment",
+    "citation_type", "features_mentioned", "competitors_mentioned",
+)
+
+
+def _export_match(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter shared by the exports: company_id and/or project_id, plus a createdAt range."""
+    match: Dict[str, Any] = {}
+    for field in ("company_id", "project_id"):
+        if body.get(field):
+            match[field] = parse_object_id(body[field], field)
+    if not match:
+        raise HTTPException(status_code=400, detail="company_id or project_id is required")
+
+    created_at = created_at_range(body)
+    if created_at:
+        match["createdAt"] = created_at
+    return match
+
+
+def _export_format(body: Dict[str, Any]) -> str:
+    export_format = (body.get("format") or "ndjson").lower()
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {list(EXPORT_FORMATS)}")
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export needs the pyarrow package on the server")
+    return export_format
+
+
+def _str_id(value: Any) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def _flat_qna(row: Dict[str, Any], include_answers: bool) -> Dict[str, Any]:
+    """One Q&A row with its llm_flags flattened into top-level columns."""
+    flags = row.get("llm_flags") or {}
+    flat = {
+        "prompt_questions_id": _str_id(row.get("prompt_questions_id")),
+        "uuid": row.get("uuid"),
+        "position": row.get("position"),
+        "company_id": _str_id(row.get("company_id")),
+        "project_id": _str_id(row.get("project_id")),
+        "category_id": _str_id(row.get("category_id")),
+        "category_name": row.get("category_name"),
+        "question": row.get("question"),
+        "capture": row.get("capture"),
+        "createdAt": row.get("createdAt"),
+        "updatedAt": row.get("updatedAt"),
+        "tagged": bool(flags),
+        **{field: flags.get(field) for field in _FLAG_FIELDS},
+    }
+    if include_answers:
+        flat["answer"] = row.get("answer")
+    return flat
+
+
+def _qna_schema(include_answers: bool):
+    pyarrow = arrow()
+    fields = [
+        ("prompt_questions_id", pyarrow.string()),
+        ("uuid", pyarrow.string()),
+        ("position", pyarrow.int64()),
+        ("company_id", pyarrow.string()),
+        ("project_id", pyarrow.string()),
+        ("category_id", pyarrow.string()),
+        ("category_name", pyarrow.string()),
+        ("question", pyarrow.string()),
+        ("capture", pyarrow.bool_()),
+        ("createdAt", pyarrow.timestamp("ms")),
+        ("updatedAt", pyarrow.timestamp("ms")),
+        ("tagged", pyarrow.bool_()),
+        ("brand_mentioned", pyarrow.bool_()),
+        ("brand_rank", pyarrow.int64()),
+        ("is_recommended", pyarrow.bool_()),
+        ("sentiment", pyarrow.string()),
+        ("citation_type", pyarrow.string()),
+        ("features_mentioned", pyarrow.list_(pyarrow.string())),
+        ("competitors_mentioned", pyarrow.list_(pyarrow.string())),
+    ]
+    if include_answers:
+        fields.append(("answer", pyarrow.string()))
+    return pyarrow.schema(fields)
+
+
+def _flat_metrics(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Counters of one prompt_questions document, named as in the metrics endpoints."""
+    aggregate = doc.get("geo_metrics") or {}
+    counters = {
+        "total_prompts": aggregate.get("total", 0),
+        "tagged": aggregate.get("tagged", 0),
+        "total_mentions": aggregate.get("mentions", 0),
+        "top_3_mentions": aggregate.get("top_3_mentions", 0),
+        "first_party_citations": aggregate.get("first_party_citations", 0),
+        "recommended": aggregate.get("recommended", 0),
+        "positive_sentiment": aggregate.get("positive_sentiment", 0),
+    }
+    return {
+        "prompt_questions_id": _str_id(doc.get("_id")),
+        "company_id": _str_id(doc.get("company_id")),
+        "project_id": _str_id(doc.get("project_id")),
+        "website_url": doc.get("website_url"),
+        "createdAt": doc.get("createdAt"),
+        "counters_initialized": aggregate.get("initialized", False),
+        "untagged_answered": aggregate.get("untagged_answered", 0),
+        "zero_mention_count": len(aggregate.get("zero_mentions") or {}),
+        **with_rates(counters),
+        "competitor_counts": named_counts(aggregate.get("competitor_counts")),
+        "feature_counts": named_counts(aggregate.get("feature_counts")),
+    }
+
+
+def _metrics_schema():
+    pyarrow = arrow()
+    counts = pyarrow.map_(pyarrow.string(), pyarrow.int64())
+    return pyarrow.schema(
+        [
+            ("prompt_questions_id", pyarrow.string()),
+            ("company_id", pyarrow.string()),
+            ("project_id", pyarrow.string()),
+            ("website_url", pyarrow.string()),
+            ("createdAt", pyarrow.timestamp("ms")),
+            ("counters_initialized", pyarrow.bool_()),
+            ("untagged_answered", pyarrow.int64()),
+            ("zero_mention_count", pyarrow.int64()),
+        ]
+        + [(name, pyarrow.int64()) for name in (
+            "total_prompts", "tagged", "total_mentions", "top_3_mentions",
+            "first_party_citations", "recommended", "positive_sentiment",
+        )]
+        + [(name, pyarrow.float64()) for name in (
+            "brand_mention_rate", "top_3_position_rate", "first_party_citation_rate",
+            "recommendation_rate", "positive_sentiment_rate",
+        )]
+        + [("competitor_counts", counts), ("feature_counts", counts)]
+    )
+
+
+def _export_response(rows: AsyncIterator[Dict[str, Any]], export_format: str, schema_factory, name: str):
+    if export_format == "parquet":
+        headers = {"Content-Disposition": f'attachment; filename="{name}.parquet"'}
+        return parquet_stream_response(stream_parquet(rows, schema_factory()), headers=headers)
+    headers = {"Content-Disposition": f'attachment; filename="{name}.ndjson"'}
+    return ndjson_stream_response(stream_ndjson(rows), headers=headers)
+
+
+async def export_qna_controller(request: Request):
+    """
+    Every Q&A of a company or project as NDJSON or Parquet, one flat row per Q&A
+    with its llm_flags as columns, streamed from a cursor in createdAt order.
+
+    Request body:
+        - company_id: str (company_id and/or project_id required)
+        - project_id: str
+        - date_from: str (optional - ISO date, filters on the Q&A's createdAt)
+        - date_to: str (optional - ISO date, filters on the Q&A's createdAt)
+        - format: str (optional - "ndjson" (default) or "parquet")
+        - include_answers: bool (optional - default true; false leaves out answer text)
+    """
+    try:
+        body = await request.json()
+        match = _export_match(body)
+        export_format = _export_format(body)
+        include_answers = bool(body.get("include_answers", True))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    projection = {"_id": 0, "isDeleted": 0}
+    if not include_answers:
+        projection.update({"answer": 0, "answer_z": 0, "answer_codec": 0})
+
+    async def rows():
+        async for batch in iter_find_batches(
+            QnAEntryModel, match, EXPORT_BATCH_SIZE, projection, sort_by=QNA_EXPORT_SORT
+        ):
+            for row in batch:
+                yield _flat_qna(with_full_answer(row), include_answers)
+
+    # Errors past this point end the stream early; the client sees a truncated file
+    return _export_response(rows(), export_format, lambda: _qna_schema(include_answers), "qna")
+
+
+async def export_metrics_controller(request: Request):
+    """
+    Stored GEO counters and rates of every prompt_questions document of a
+    company or project as NDJSON or Parquet, one row per document.
+
+    Request body:
+        - company_id: str (company_id and/or project_id required)
+        - project_id: str
+        - date_from: str (optional - ISO date, filters on the document's createdAt)
+        - date_to: str (optional - ISO date, filters on the document's createdAt)
+        - format: str (optional - "ndjson" (default) or "parquet")
+    """
+    try:
+        body = await request.json()
+        match = _export_match(body)
+        export_format = _export_format(body)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    projection = {"company_id": 1, "project_id": 1, "website_url": 1, "createdAt": 1, "geo_metrics": 1}
+
+    async def rows():
+        async for batch in iter_find_batches(
+            PromptQuestionsModel, match, EXPORT_BATCH_SIZE, projection, sort_by=[("createdAt", ASCENDING)]
+        ):
+            for doc in batch:
+                yield _flat_metrics(doc)
+
+    return _export_response(rows(), export_format, _metrics_schema, "geo_metrics")
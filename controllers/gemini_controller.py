@@ -1,46 +1,22 @@
-import os
-import json
-import re
+from typing import List
 from dotenv import load_dotenv
-import google.generativeai as genai
-from models.website_analysis import WebsiteAnalysis, Question
-from models.questionsCategory import QuestionsCategoryModel
-from models.prompt_questions import PromptQuestionsModel
-from global_db_opretions import update_one
+from utils.llm import get_model, generation_config
+from models.website_analysis import WebsiteAnalysis, Question, GeneratedQuestion
+from controllers.category_controller import get_categories
+from utils.json_extractor import extract_json
+from utils.geo_aggregates import PLACEHOLDER_ANSWER
+from utils.qna_store import append_qna, delete_unanswered_qna
+from utils.telemetry import observe_llm
+from utils.log import get_logger
 from bson import ObjectId
 import uuid
 load_dotenv()
 
-API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("API_KEY", "")
-
-if not API_KEY:
-    raise ValueError(
-        "No API_KEY or GOOGLE_API_KEY found. Please set the GOOGLE_API_KEY environment variable "
-        "in your .env file or system environment."
-    )
-
-genai.configure(api_key=API_KEY)
-
-
-def extract_json(text: str):
-    text = text.strip()
-    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
-    if json_match:
-        text = json_match.group(1).strip()
-    
-    if text.startswith('[') or text.startswith('{'):
-        return json.loads(text)
-    
-    json_pattern = r'[\[\{][\s\S]*[\]\}]'
-    match = re.search(json_pattern, text)
-    if match:
-        return json.loads(match.group())
-    
-    return json.loads(text)
+logger = get_logger(__name__)
 
 
 async def analyze_website(domain: str, nation: str, state: str) -> WebsiteAnalysis:
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    model = get_model()
     
     prompt = f"""Analyze the website with domain "{domain}". The target audience is in {state}, {nation}. 
     Identify its core brand name, market niche, main purpose, and key products/services. 
@@ -54,31 +30,31 @@ async def analyze_website(domain: str, nation: str, state: str) -> WebsiteAnalys
     
     Response must be pure JSON only."""
     
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.GenerationConfig(
-            temperature=0.7
+    with observe_llm("analyze_website"):
+        response = model.generate_content(
+            prompt,
+            generation_config=generation_config(
+                temperature=0.7
+            )
         )
-    )
     
-    result = extract_json(response.text)
-    return WebsiteAnalysis(**result)
+    return extract_json(response.text, WebsiteAnalysis)
 
 
 async def generate_questions(analysis: WebsiteAnalysis, domain: str, nation: str, state: str, prompt_questions_id: str) -> list[Question]:
     # 1. Fetch all available question categories from the database.
-    categories = await QuestionsCategoryModel.find_all().to_list()
-    print("categories--->", categories)
+    categories = await get_categories()
+    logger.debug("categories---> %s", categories)
     
     if not categories:
-        print("No question categories found in the database. Returning empty list.")
+        logger.warning("No question categories found in the database. Returning empty list.")
         return []
 
     # --- SOLUCIÓN: Crear un mapa de búsqueda para acceder a las categorías por su nombre ---
     # Esto nos permitirá encontrar el ID correcto fácilmente después de la respuesta de la IA.
     category_map = {category.name: category for category in categories}
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    model = get_model()
     
     # --- Dynamic Prompt Construction ---
     first_service = analysis.services[0] if analysis.services else analysis.niche
@@ -119,26 +95,23 @@ Return exactly {num_questions} questions as a valid JSON array ONLY (no markdown
 Response must be pure JSON only."""
 
     try:
-        response = await model.generate_content_async(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=0.7,
-                response_mime_type="application/json"
+        with observe_llm("generate_questions"):
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=generation_config(
+                    temperature=0.7,
+                    response_mime_type="application/json"
+                )
             )
-        )
-        
-        raw_questions = extract_json(response.text)
         
-        if not isinstance(raw_questions, list):
-            print("Error: AI did not return a valid JSON array.")
-            return []
+        raw_questions = extract_json(response.text, List[GeneratedQuestion])
 
         questions = []
         qna_list = [] # Mover la creación de qna_list aquí para construirla al mismo tiempo
 
         for q_data in raw_questions:
-            category_name = q_data.get("category")
-            question_text = q_data.get("text")
+            category_name = q_data.category
+            question_text = q_data.text
 
             # --- SOLUCIÓN: Usar el mapa para encontrar la categoría correcta ---
             matching_category = category_map.get(category_name)
@@ -160,47 +133,46 @@ Response must be pure JSON only."""
                 # Creamos la entrada qna con el ID correcto
                 qna_list.append({
                     "question": question_text,
-                    "answer": "Not available yet",
+                    "answer": PLACEHOLDER_ANSWER,
                     "category_id": ObjectId(correct_category_id), # Usar el ID correcto aquí
                     "category_name": matching_category.name,
                     "uuid": uuid_id
                 })
             else:
-                print(f"Warning: AI returned an unknown category ('{category_name}') or empty text. Skipping.")
+                logger.warning("AI returned an unknown category ('%s') or empty text. Skipping.", category_name)
 
-        print("questions", questions)
-        print("prompt_questions_id", prompt_questions_id)
+        logger.debug("questions %s", questions)
+        logger.info("Generated %d questions for %s", len(questions), prompt_questions_id)
 
         # Si se generó alguna pregunta, actualizamos la base de datos
+        # Replace only the still-unanswered questions, so answers written
+        # concurrently by ask-chatgpt are never overwritten. The removed rows
+        # are not subtracted: the counters are rebuilt on next read.
         if qna_list:
-            await update_one(
-                PromptQuestionsModel,
-                {"_id": ObjectId(prompt_questions_id)},
-                {"$set": {"qna": qna_list}}
-            )
+            await delete_unanswered_qna(prompt_questions_id, PLACEHOLDER_ANSWER)
+            await append_qna(prompt_questions_id, qna_list, {"$set": {"geo_metrics.initialized": False}})
 
         return questions
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"An error occurred during question generation: {e}")
+        logger.exception("An error occurred during question generation: %s", e)
         return []
 
 async def ask_gemini(question: str, nation: str, state: str) -> str:
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    model = get_model()
     
     prompt = f"""{question} 
     Please recommend specific websites that best address this query for a user specifically in {state}, {nation}. 
     Ensure the recommendations are highly relevant to this geographical location."""
     
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.GenerationConfig(
-            temperature=0.7,
-            top_p=0.8,
-            top_k=40
+    with observe_llm("ask_gemini"):
+        response = model.generate_content(
+            prompt,
+            generation_config=generation_config(
+                temperature=0.7,
+                top_p=0.8,
+                top_k=40
+            )
         )
-    )
     
     return response.text if response.text else "No response from model."
@@ -0,0 +1,163 @@
+from fastapi import HTTPException
+from fastapi import Request
+from typing import Any, Dict, List
+from models.qna import QnAEntryModel
+from utils.filters import created_at_range, parse_object_id
+from utils.geo_aggregates import with_rates
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def _flag(name: str) -> str:
+    return f"$llm_flags.{name}"
+
+
+def _count_if(*conditions) -> Dict[str, Any]:
+    condition = conditions[0] if len(conditions) == 1 else {"$and": list(conditions)}
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+_MENTIONED = {"$eq": [_flag("brand_mentioned"), True]}
+
+_EMPTY_COUNTERS = {
+    "total_prompts": 0, "tagged": 0, "total_mentions": 0, "top_3_mentions": 0,
+    "first_party_citations": 0, "recommended": 0, "positive_sentiment": 0,
+}
+
+
+def _metric_group(key: Any) -> Dict[str, Any]:
+    """$group stage computing the GEO counters over Q&A rows."""
+    return {
+        "$group": {
+            "_id": key,
+            "total_prompts": {"$sum": 1},
+            "tagged": _count_if({"$gt": [{"$ifNull": ["$llm_flags", None]}, None]}),
+            "total_mentions": _count_if(_MENTIONED),
+            "top_3_mentions": _count_if(
+                _MENTIONED,
+                {"$gte": [{"$ifNull": [_flag("brand_rank"), 0]}, 1]},
+                {"$lte": [{"$ifNull": [_flag("brand_rank"), 0]}, 3]}
+            ),
+            "first_party_citations": _count_if(_MENTIONED, {"$eq": [_flag("citation_type"), "first_party"]}),
+            "recommended": _count_if(_MENTIONED, {"$eq": [_flag("is_recommended"), True]}),
+            "positive_sentiment": _count_if(_MENTIONED, {"$eq": [_flag("sentiment"), "positive"]}),
+        }
+    }
+
+
+def _build_match(body: Dict[str, Any], scope_field: str) -> Dict[str, Any]:
+    scope_id = body.get(scope_field)
+    if not scope_id:
+        raise HTTPException(status_code=400, detail=f"{scope_field} is required")
+
+    match: Dict[str, Any] = {"isDeleted": False, scope_field: parse_object_id(scope_id, scope_field)}
+    created_at = created_at_range(body)
+    if created_at:
+        match["createdAt"] = created_at
+    return match
+
+
+def portfolio_metrics_pipeline(match: Dict[str, Any], include_projects: bool = True) -> List[Dict[str, Any]]:
+    """
+    Aggregation over qna_entries.llm_flags returning only counters: overall
+    totals plus breakdowns by project, category and competitor. Rows carry
+    company_id and project_id, so no join with prompt_questions is needed.
+    """
+    facets: Dict[str, List[Dict[str, Any]]] = {
+        "totals": [_metric_group(None), {"$project": {"_id": 0}}],
+        "by_category": [
+            _metric_group("$category_name"),
+            {"$sort": {"total_prompts": -1}},
+        ],
+        "by_competitor": [
+            {"$unwind": _flag("competitors_mentioned")},
+            {
+                "$group": {
+                    "_id": _flag("competitors_mentioned"),
+                    "mentions": {"$sum": 1},
+                    "mentioned_with_brand": _count_if(_MENTIONED),
+                }
+            },
+            {"$sort": {"mentions": -1}},
+        ],
+    }
+    if include_projects:
+        facets["by_project"] = [_metric_group("$project_id"), {"$sort": {"total_prompts": -1}}]
+
+    return [
+        {"$match": match},
+        # Only flags and category travel past this point, never answer text
+        {"$project": {"project_id": 1, "category_name": 1, "llm_flags": 1}},
+        {"$facet": facets},
+    ]
+
+
+async def _run_portfolio_metrics(body: Dict[str, Any], scope_field: str) -> Dict[str, Any]:
+    match = _build_match(body, scope_field)
+    include_projects = scope_field == "company_id"
+    pipeline = portfolio_metrics_pipeline(match, include_projects)
+
+    result = await QnAEntryModel.aggregate(pipeline).to_list()
+    facets = result[0] if result else {}
+    totals = (facets.get("totals") or [{}])[0]
+
+    response = {
+        scope_field: body.get(scope_field),
+        "date_from": body.get("date_from"),
+        "date_to": body.get("date_to"),
+        "totals": with_rates({**_EMPTY_COUNTERS, **totals}),
+        "by_category": [
+            {"category_name": row.pop("_id"), **with_rates(row)}
+            for row in facets.get("by_category", [])
+        ],
+        "by_competitor": [
+            {"competitor": row.pop("_id"), **row}
+            for row in facets.get("by_competitor", [])
+        ],
+    }
+    if include_projects:
+        response["by_project"] = [
+            {"project_id": str(row.pop("_id")) if row.get("_id") else None, **with_rates(row)}
+            for row in facets.get("by_project", [])
+        ]
+    return response
+
+
+async def company_geo_metrics_controller(request: Request):
+    """
+    GEO metrics across every Q&A of a company, computed server-side with one
+    aggregation.
+
+    Request body:
+        - company_id: str (required)
+        - date_from: str (optional - ISO date, filters on the Q&A's createdAt)
+        - date_to: str (optional - ISO date, filters on the Q&A's createdAt)
+    """
+    try:
+        body = await request.json()
+        return await _run_portfolio_metrics(body, "company_id")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("company_geo_metrics_controller failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def project_geo_metrics_controller(request: Request):
+    """
+    GEO metrics across every Q&A of a project.
+
+    Request body:
+        - project_id: str (required)
+        - date_from: str (optional - ISO date, filters on the Q&A's createdAt)
+        - date_to: str (optional - ISO date, filters on the Q&A's createdAt)
+    """
+    try:
+        body = await request.json()
+        return await _run_portfolio_metrics(body, "project_id")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("project_geo_metrics_controller failed")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,31 +2,12 @@ from models.project import Project
 from beanie import PydanticObjectId
 from datetime import datetime
 from typing import List, Optional
+from pymongo import ASCENDING
+from global_db_opretions import find_page, iter_find
+from utils.cache import reference_cache
 
 
-async def get_projects_by_company(company_id: str) -> List[dict]:
-    projects = await Project.find(Project.company_id == PydanticObjectId(company_id)).to_list()
-    result = []
-    for project in projects:
-        result.append({
-            "_id": str(project.id),
-            "id": str(project.id),
-            "name": project.name,
-            "description": project.description,
-            "company_id": str(project.company_id),
-            "domain": project.domain,
-            "nation": project.nation,
-            "state": project.state,
-            "created_at": project.created_at,
-            "updated_at": project.updated_at
-        })
-    return result
-
-
-async def get_project_by_id(project_id: str) -> Optional[dict]:
-    project = await Project.get(PydanticObjectId(project_id))
-    if not project:
-        return None
+def _project_summary(project: Project) -> dict:
     return {
         "_id": str(project.id),
         "id": str(project.id),
@@ -41,6 +22,38 @@ async def get_project_by_id(project_id: str) -> Optional[dict]:
     }
 
 
+async def _load_projects_by_company(company_id: str) -> List[dict]:
+    query = {"company_id": PydanticObjectId(company_id)}
+    return [_project_summary(project) async for project in iter_find(Project, query, soft_delete=False)]
+
+
+async def get_projects_by_company(company_id: str) -> List[dict]:
+    return await reference_cache.get_or_load(
+        "projects", ("company", company_id), lambda: _load_projects_by_company(company_id)
+    )
+
+
+async def get_projects_page(company_id: str, limit: int, after: Optional[str] = None, direction: int = ASCENDING) -> dict:
+    query = {"company_id": PydanticObjectId(company_id)}
+    page = await find_page(Project, query, limit, after, direction=direction, soft_delete=False)
+    return {
+        "projects": [_project_summary(Project.model_validate(raw)) for raw in page.items],
+        "next_cursor": page.next_cursor,
+        "has_more": page.has_more
+    }
+
+
+async def _load_project(project_id: str) -> Optional[dict]:
+    project = await Project.get(PydanticObjectId(project_id))
+    if not project:
+        return None
+    return _project_summary(project)
+
+
+async def get_project_by_id(project_id: str) -> Optional[dict]:
+    return await reference_cache.get_or_load("projects", project_id, lambda: _load_project(project_id))
+
+
 async def create_project(
     company_id: str,
     name: str,
@@ -60,6 +73,8 @@ async def create_project(
         updated_at=datetime.utcnow()
     )
     await project.insert()
+    # Companies embed project lists and counts
+    await reference_cache.invalidate("projects", "companies")
     return project
 
 
@@ -88,6 +103,7 @@ async def update_project(
     project.updated_at = datetime.utcnow()
     
     await project.save()
+    await reference_cache.invalidate("projects", "companies")
     return project
 
 
@@ -97,4 +113,5 @@ async def delete_project(project_id: str) -> bool:
         return False
     
     await project.delete()
+    await reference_cache.invalidate("projects", "companies")
     return True
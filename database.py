@@ -1,57 +1,136 @@
 import os
-import pkgutil
-import importlib
+import time
+from typing import List, Type
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from beanie import init_beanie, Document
 import certifi
+from models.company import Company
+from models.project import Project
+from models.prompt_questions import PromptQuestionsModel
+from models.qna import QnAEntryModel
+from models.questionsCategory import QuestionsCategoryModel
+from utils.db_monitoring import CommandLatencyListener, PoolMonitor, prometheus_lines
+from utils.startup_timing import startup_timer
+from utils.telemetry import REGISTRY
+from utils.log import get_logger
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 MONGODB_NAME = os.getenv("MONGODB_NAME", "websiteAeo")  # database name
 
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# 🔹 Connection pool settings (driver defaults unless set)
+MONGODB_POOL_OPTIONS = {
+    "maxPoolSize": _env_int("MONGODB_MAX_POOL_SIZE", 100),
+    "minPoolSize": _env_int("MONGODB_MIN_POOL_SIZE", 0),
+    "maxIdleTimeMS": _env_int("MONGODB_MAX_IDLE_TIME_MS", 0) or None,
+    "waitQueueTimeoutMS": _env_int("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 0) or None,
+    "connectTimeoutMS": _env_int("MONGODB_CONNECT_TIMEOUT_MS", 20000),
+    "serverSelectionTimeoutMS": _env_int("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 30000),
+    "socketTimeoutMS": _env_int("MONGODB_SOCKET_TIMEOUT_MS", 0) or None,
+    "readPreference": os.getenv("MONGODB_READ_PREFERENCE", "primary"),
+}
+# e.g. "zstd,zlib" - zstd needs the zstandard package, snappy needs python-snappy
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "")
+if MONGODB_COMPRESSORS:
+    MONGODB_POOL_OPTIONS["compressors"] = MONGODB_COMPRESSORS
+
+# 🔹 Command / pool monitoring, served at /health/db and /metrics
+MONGODB_MONITORING = os.getenv("MONGODB_MONITORING", "true").lower() == "true"
+command_monitor = CommandLatencyListener(slow_ms=_env_int("MONGODB_SLOW_MS", 100))
+pool_monitor = PoolMonitor()
+if MONGODB_MONITORING:
+    REGISTRY.register_collector(lambda: prometheus_lines(command_monitor, pool_monitor))
+
 try:
     client = AsyncIOMotorClient(
         MONGODB_URL,
-        tlsCAFile=certifi.where()  # ensures SSL cert validation
+        tlsCAFile=certifi.where(),  # ensures SSL cert validation
+        event_listeners=[command_monitor, pool_monitor] if MONGODB_MONITORING else [],
+        **{key: value for key, value in MONGODB_POOL_OPTIONS.items() if value is not None}
     )
     db = client[MONGODB_NAME]
-    print("Successfully connected to MongoDB!")
 except Exception as e:
-    print(f"Error connecting to MongoDB: {e}")
+    logger.error("Error connecting to MongoDB: %s", e)
     client = None
     db = None
 
-async def load_beanie_models(models_package_name: str = "models"):
-    """
-    Dynamically loads all Beanie Document models from the given package
-    """
-    models_package = importlib.import_module(models_package_name)
-    model_classes = []
-
-    for _, module_name, _ in pkgutil.iter_modules(models_package.__path__):
-        module = importlib.import_module(f"{models_package_name}.{module_name}")
-        for attr in dir(module):
-            value = getattr(module, attr)
-            try:
-                if isinstance(value, type) and issubclass(value, Document) and value is not Document:
-                    model_classes.append(value)
-            except TypeError:
-                continue
-
-    return model_classes
-
-async def init_db(models_package_name: str = "models"):
+# 🔹 Every Beanie Document of the app; add new models here
+DOCUMENT_MODELS: List[Type[Document]] = [
+    Company,
+    Project,
+    PromptQuestionsModel,
+    QnAEntryModel,
+    QuestionsCategoryModel,
+]
+
+async def init_db(document_models: List[Type[Document]] = DOCUMENT_MODELS):
     """
-    Initializes Beanie with all models in the given package
+    Initializes Beanie with the registered document models
     """
     if client is None:
         raise RuntimeError("MongoDB client not initialized")
 
-    model_classes = await load_beanie_models(models_package_name)
-    await init_beanie(
-        database=db,
-        document_models=model_classes,
-    )
-    print("Beanie initialized with models:", [m.__name__ for m in model_classes])
+    # The client connects lazily; ping so a bad URL or credentials fail startup here
+    with startup_timer.step("init_db: ping"):
+        ping_ms = await ping()
+    logger.info("Successfully connected to MongoDB! (ping %sms)", ping_ms)
+
+    # 🔹 init_beanie also creates the indexes declared in each model's Settings.indexes
+    with startup_timer.step("init_db: init_beanie + indexes"):
+        await init_beanie(
+            database=db,
+            document_models=list(document_models),
+            allow_index_dropping=os.getenv("ALLOW_INDEX_DROPPING", "false").lower() == "true",
+        )
+    logger.info("Beanie initialized with models: %s", [m.__name__ for m in document_models])
+
+    if os.getenv("VERIFY_QUERY_PLANS", "").lower() in ("1", "true"):
+        with startup_timer.step("init_db: verify query plans"):
+            await _verify_query_plans()
+
+
+async def _verify_query_plans():
+    """Warn (never fail startup) when a hot query would scan a whole collection."""
+    from utils.query_plans import format_report, verify_query_plans
+
+    try:
+        reports = await verify_query_plans()
+    except Exception as e:
+        logger.warning("⚠️ Query plan verification failed: %s", e)
+        return
+    logger.info("Query plans:\n%s", format_report(reports))
+    for report in reports:
+        if report.collscan:
+            logger.warning("⚠️ COLLSCAN on %s: %s", report.collection, report.name)
+
+
+async def ping() -> float:
+    """Round trip of a `ping` command in ms."""
+    started = time.perf_counter()
+    await client.admin.command("ping")
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+async def db_health() -> dict:
+    """Ping latency, pool settings and the monitoring snapshots for /health/db."""
+    health = {"status": "healthy", "database": MONGODB_NAME}
+    try:
+        health["ping_ms"] = await ping()
+    except Exception as e:
+        health.update(status="unhealthy", error=str(e))
+    health["pool_options"] = {key: value for key, value in MONGODB_POOL_OPTIONS.items() if value is not None}
+    health["monitoring"] = MONGODB_MONITORING
+    if MONGODB_MONITORING:
+        health["pool"] = pool_monitor.snapshot()
+        health["commands"] = command_monitor.snapshot()
+    return health
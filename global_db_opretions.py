@@ -1,8 +1,12 @@
-from typing import Dict, Any, List, Optional, Tuple, Type, TypeVar
+import base64
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Type, TypeVar
 from beanie import Document, SortDirection
-from pymongo import ReturnDocument
-from beanie.odm.operators.update.general import Set  # ✅ Correct import
-from pymongo.results import UpdateResult
+from bson import json_util
+from pymongo import ASCENDING, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+from pymongo.results import BulkWriteResult, UpdateResult
+from pydantic import BaseModel
 
 T = TypeVar("T", bound=Document)
 
@@ -37,47 +41,332 @@ async def findWithSort(
 
     return await cursor.to_list()
 
-async def find_one(model: Type[T], find_obj: Dict[str, Any]) -> Optional[T]:
+
+def _base_query(find_obj: Dict[str, Any], soft_delete: bool) -> Dict[str, Any]:
+    # Models without an isDeleted field (Company, Project) pass soft_delete=False
+    return {"isDeleted": False, **find_obj} if soft_delete else dict(find_obj)
+
+
+async def iter_find_batches(
+    model: Type[T],
+    find_obj: Dict[str, Any],
+    batch_size: int = 500,
+    projection: Optional[Dict[str, Any]] = None,
+    sort_by: Optional[List[Tuple[str, int]]] = None,
+    soft_delete: bool = True
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Stream raw documents in lists of at most `batch_size`, one cursor batch at a
+    time, so only a single batch is held in memory.
+
+        async for docs in iter_find_batches(PromptQuestionsModel, {"company_id": cid}):
+            ...
+    """
+    cursor = model.get_pymongo_collection().find(
+        _base_query(find_obj, soft_delete), projection, batch_size=batch_size
+    )
+    if sort_by:
+        cursor = cursor.sort(sort_by)
+
+    batch: List[Dict[str, Any]] = []
+    async for raw in cursor:
+        batch.append(raw)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def iter_find(
+    model: Type[T],
+    find_obj: Dict[str, Any],
+    batch_size: int = 500,
+    sort_by: Optional[List[Tuple[str, int]]] = None,
+    soft_delete: bool = True
+) -> AsyncIterator[T]:
+    """Streaming variant of find(): yields validated documents one by one."""
+    async for batch in iter_find_batches(model, find_obj, batch_size, sort_by=sort_by, soft_delete=soft_delete):
+        for raw in batch:
+            yield model.model_validate(raw)
+
+
+async def iter_distinct(
+    model: Type[T],
+    field_name: str,
+    find_obj: Dict[str, Any],
+    batch_size: int = 500,
+    soft_delete: bool = True
+) -> AsyncIterator[Any]:
+    """Streaming variant of distinct(), not bound by the 16MB distinct result limit."""
+    pipeline = [
+        {"$match": _base_query(find_obj, soft_delete)},
+        {"$group": {"_id": f"${field_name}"}},
+    ]
+    cursor = model.get_pymongo_collection().aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+    async for row in cursor:
+        yield row["_id"]
+
+
+class InvalidCursorError(ValueError):
+    """The pagination cursor sent by the client could not be decoded."""
+
+
+def encode_cursor(sort_value: Any, last_id: Any) -> str:
+    payload = json_util.dumps({"v": sort_value, "id": last_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return payload["v"], payload["id"]
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+@dataclass
+class Page:
+    """One keyset page: raw documents plus the cursor of the next page."""
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+def keyset_query(query: Dict[str, Any], after: Optional[str], sort_field: str = "_id", direction: int = ASCENDING) -> Dict[str, Any]:
+    """`query` restricted to documents after the `after` cursor (for find or a $match stage)."""
+    if not after:
+        return query
+    op = "$gt" if direction == ASCENDING else "$lt"
+    sort_value, last_id = decode_cursor(after)
+    if sort_field == "_id":
+        keyset = {"_id": {op: last_id}}
+    else:
+        keyset = {"$or": [
+            {sort_field: {op: sort_value}},
+            {sort_field: sort_value, "_id": {op: last_id}},
+        ]}
+    return {"$and": [query, keyset]} if query else keyset
+
+
+def keyset_sort(sort_field: str = "_id", direction: int = ASCENDING) -> List[Tuple[str, int]]:
+    sort = [(sort_field, direction)]
+    if sort_field != "_id":
+        sort.append(("_id", direction))
+    return sort
+
+
+def page_from_docs(docs: List[Dict[str, Any]], limit: int, sort_field: str = "_id") -> Page:
+    """Build a Page from a query that fetched `limit + 1` documents."""
+    page = Page(items=docs[:limit], has_more=len(docs) > limit)
+    if page.has_more:
+        last = page.items[-1]
+        page.next_cursor = encode_cursor(last.get(sort_field), last["_id"])
+    return page
+
+
+async def find_page(
+    model: Type[T],
+    find_obj: Dict[str, Any],
+    limit: int,
+    after: Optional[str] = None,
+    sort_field: str = "_id",
+    direction: int = ASCENDING,
+    projection: Optional[Dict[str, Any]] = None,
+    soft_delete: bool = True
+) -> Page:
+    """
+    Keyset pagination on (sort_field, _id). Unlike skip/limit, every page costs
+    the same index range scan no matter how deep the client has paged, and
+    inserts between requests do not shift items across pages.
+    """
+    query = keyset_query(_base_query(find_obj, soft_delete), after, sort_field, direction)
+    sort = keyset_sort(sort_field, direction)
+    if projection is not None and sort_field not in projection:
+        projection = {**projection, sort_field: 1}
+
+    cursor = model.get_pymongo_collection().find(query, projection).sort(sort).limit(limit + 1)
+    docs = await cursor.to_list(length=limit + 1)
+    return page_from_docs(docs, limit, sort_field)
+
+async def find_one(
+    model: Type[T],
+    find_obj: Dict[str, Any],
+    projection_model: Optional[Type[BaseModel]] = None
+) -> Optional[T]:
     query = {"isDeleted": False, **find_obj}
+    if projection_model:
+        return await model.find_one(query).project(projection_model)
     return await model.find_one(query)
 
 
+async def find_one_raw(
+    model: Type[T],
+    find_obj: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    query = {"isDeleted": False, **find_obj}
+    return await model.get_pymongo_collection().find_one(query, projection)
+
+
+class DatabaseOperationError(Exception):
+    """A write helper failed; wraps the driver error with the model and operation."""
+
+    def __init__(self, operation: str, model: Type[Document], error: Exception):
+        super().__init__(f"{operation} on {model.__name__} failed: {error}")
+        self.operation = operation
+        self.model = model
+        self.error = error
+
+
+@dataclass
+class BulkWriteSummary:
+    """Counts from one or more bulk_write calls."""
+    batches: int = 0
+    matched: int = 0
+    modified: int = 0
+    upserted: int = 0
+    inserted: int = 0
+    deleted: int = 0
+
+    def add(self, result: BulkWriteResult) -> None:
+        self.batches += 1
+        self.matched += result.matched_count
+        self.modified += result.modified_count
+        self.upserted += result.upserted_count
+        self.inserted += result.inserted_count
+        self.deleted += result.deleted_count
+
+    def extend(self, other: "BulkWriteSummary") -> None:
+        self.batches += other.batches
+        self.matched += other.matched
+        self.modified += other.modified
+        self.upserted += other.upserted
+        self.inserted += other.inserted
+        self.deleted += other.deleted
+
+
+def _check_update(update_obj: Dict[str, Any]) -> None:
+    if not update_obj or not all(op.startswith("$") for op in update_obj):
+        raise ValueError("Unsupported update operation.")
+
+
 async def update_one(
     model: Type[T],
     find_obj: Dict[str, Any],
     update_obj: Dict[str, Any],
-    array_filters: list | None = None
+    array_filters: list | None = None,
+    upsert: bool = False,
+    return_document: ReturnDocument = ReturnDocument.AFTER
 ) -> Optional[T]:
+    """
+    Apply `update_obj` ($set, $push, $inc, ... optionally with array filters) and
+    return the updated document in the same round trip (None if nothing matched).
+    Pass ReturnDocument.BEFORE to get the document as it was before the update.
+    """
+    _check_update(update_obj)
+    query = {"isDeleted": False, **find_obj}
     try:
-        query = {"isDeleted": False, **find_obj}
+        raw = await model.get_pymongo_collection().find_one_and_update(
+            query,
+            update_obj,
+            array_filters=array_filters,
+            upsert=upsert,
+            return_document=return_document
+        )
+    except PyMongoError as e:
+        raise DatabaseOperationError("update_one", model, e) from e
+    return model.model_validate(raw) if raw else None
+
 
-        # 🔹 Normal $set
-        if "$set" in update_obj and not array_filters:
-            await model.find_one(query).update(Set(update_obj["$set"]))
+async def write_one(
+    model: Type[T],
+    find_obj: Dict[str, Any],
+    update_obj: Dict[str, Any],
+    array_filters: list | None = None,
+    upsert: bool = False
+) -> UpdateResult:
+    """Same as update_one when the caller does not need the document back."""
+    _check_update(update_obj)
+    query = {"isDeleted": False, **find_obj}
+    try:
+        return await model.get_pymongo_collection().update_one(
+            query,
+            update_obj,
+            array_filters=array_filters,
+            upsert=upsert
+        )
+    except PyMongoError as e:
+        raise DatabaseOperationError("write_one", model, e) from e
+
+
+async def bulk_write(
+    model: Type[T],
+    operations: List[Any],
+    ordered: bool = False
+) -> BulkWriteSummary:
+    """Send prepared pymongo operations (UpdateOne, InsertOne, ...) in one call."""
+    summary = BulkWriteSummary()
+    if not operations:
+        return summary
+    try:
+        summary.add(await model.get_pymongo_collection().bulk_write(operations, ordered=ordered))
+    except PyMongoError as e:
+        raise DatabaseOperationError("bulk_write", model, e) from e
+    return summary
 
-        # 🔹 Normal $push
-        elif "$push" in update_obj:
-            collection = model.get_pymongo_collection()
-            await collection.update_one(query, update_obj)
 
-        # 🔥 UUID based array update
-        elif "$set" in update_obj and array_filters:
-            collection = model.get_pymongo_collection()
-            await collection.update_one(
-                query,
-                update_obj,
-                array_filters=array_filters
-            )
+class BulkWriteBatch:
+    """
+    Collects writes for one model over a request or background job and sends
+    them with bulk_write, every `batch_size` operations and on flush().
 
-        else:
-            raise ValueError("Unsupported update operation.")
+        async with BulkWriteBatch(PromptQuestionsModel) as batch:
+            await batch.update_one({"_id": doc_id}, {"$set": {...}})
+        batch.summary  # BulkWriteSummary
+    """
 
-        return await model.find_one(query)
+    def __init__(self, model: Type[T], batch_size: int = 500, ordered: bool = False):
+        self.model = model
+        self.batch_size = batch_size
+        self.ordered = ordered
+        self.summary = BulkWriteSummary()
+        self._operations: List[Any] = []
 
-    except Exception:
-        import traceback
-        print("Error occurred in update_one:")
-        traceback.print_exc()
+    def __len__(self) -> int:
+        return len(self._operations)
+
+    async def add(self, operation: Any) -> None:
+        self._operations.append(operation)
+        if len(self._operations) >= self.batch_size:
+            await self.flush()
+
+    async def update_one(
+        self,
+        find_obj: Dict[str, Any],
+        update_obj: Dict[str, Any],
+        array_filters: list | None = None,
+        upsert: bool = False
+    ) -> None:
+        _check_update(update_obj)
+        query = {"isDeleted": False, **find_obj}
+        await self.add(UpdateOne(query, update_obj, array_filters=array_filters, upsert=upsert))
+
+    async def insert_one(self, document: Dict[str, Any]) -> None:
+        await self.add(InsertOne(document))
+
+    async def flush(self) -> BulkWriteSummary:
+        operations, self._operations = self._operations, []
+        if operations:
+            self.summary.extend(await bulk_write(self.model, operations, ordered=self.ordered))
+        return self.summary
+
+    async def __aenter__(self) -> "BulkWriteBatch":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.flush()
 
 
 async def create(model: Type[T], data: dict) -> T:
@@ -89,16 +378,12 @@ async def update_many(
     find_obj: Dict[str, Any],
     update_obj: Dict[str, Any]
 ) -> UpdateResult:
+    _check_update(update_obj)
     query = {"isDeleted": False, **find_obj}
-    
-    # Only support $set for now
-    if "$set" in update_obj:
-        # Use model.get_collection() to access the Motor collection and run update_many
-        result = await model.get_collection().update_many(query, {"$set": update_obj["$set"]})
-    else:
-        raise ValueError("Only '$set' updates are currently supported.")
-    
-    return result
+    try:
+        return await model.get_pymongo_collection().update_many(query, update_obj)
+    except PyMongoError as e:
+        raise DatabaseOperationError("update_many", model, e) from e
 
 
 async def insert_many(model: Type[T], insert_array: List[T]):
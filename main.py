@@ -1,17 +1,50 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from dotenv import load_dotenv
+
+# 🔹 First of all: utils.* read their settings when imported, so .env must be loaded already
+load_dotenv()
+
+from utils.startup_timing import startup_timer
+from utils.log import RequestIdMiddleware, get_logger, setup_logging
+
+# 🔹 Before the app modules load, so everything they log goes through the queue
+setup_logging()
+logger = get_logger(__name__)
+
+with startup_timer.step("import fastapi"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
-from routes.api_routes import router
-from routes.company_routes import router as company_router
-from routes.project_routes import router as project_router
-from routes.category_routes import router as category_router
-from database import init_db
+with startup_timer.step("import database + models"):
+    from database import init_db, db_health
+with startup_timer.step("import routes.api_routes"):
+    from routes.api_routes import router
+with startup_timer.step("import routes.company_routes"):
+    from routes.company_routes import router as company_router
+with startup_timer.step("import routes.project_routes"):
+    from routes.project_routes import router as project_router
+with startup_timer.step("import routes.category_routes"):
+    from routes.category_routes import router as category_router
+with startup_timer.step("import routes.metrics_routes"):
+    from routes.metrics_routes import router as metrics_router
+with startup_timer.step("import routes.export_routes"):
+    from routes.export_routes import router as export_router
+from utils.llm import api_key
+from utils.responses import FastJSONResponse
+from utils.compression import CompressionMiddleware
+from utils.telemetry import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from utils.cancellation import CANCEL_ON_DISCONNECT, CancellationMiddleware
+from utils.profiling import ProfilingMiddleware, profiling_enabled
+import os
 import uvicorn
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if not api_key():
+        logger.warning("⚠️ No GOOGLE_API_KEY or API_KEY set: Gemini endpoints will fail until one is configured")
     await init_db()
+    logger.info("%s", startup_timer.report())
     yield
 
 
@@ -19,7 +52,8 @@ app = FastAPI(
     title="Envision Website Evaluator API",
     description="Backend API for evaluating website authority using Gemini AI",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -30,10 +64,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 🔹 brotli (if installed) or gzip for bodies of at least COMPRESSION_MIN_SIZE bytes
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+
+# 🔹 Stop browser and LLM work whose client disconnected or whose deadline passed
+if CANCEL_ON_DISCONNECT:
+    app.add_middleware(CancellationMiddleware)
+
+# 🔹 Request latency / status / in-flight, served at /metrics (outermost, so compression is included)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 🔹 Per-request sampling profiles (X-Profile: <PROFILE_TOKEN> or PROFILE_SAMPLE_RATE), off unless configured
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# 🔹 X-Request-ID correlation id on every log line of the request (outermost, so all of them carry it)
+app.add_middleware(RequestIdMiddleware)
+
 app.include_router(router)
 app.include_router(company_router)
 app.include_router(project_router)
 app.include_router(category_router)
+app.include_router(metrics_router)
+app.include_router(export_router)
 
 
 @app.get("/")
@@ -46,6 +101,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db")
+async def health_check_db():
+    health = await db_health()
+    return JSONResponse(health, status_code=200 if health["status"] == "healthy" else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        return JSONResponse({"detail": "Metrics are disabled (METRICS_ENABLED=false)"}, status_code=404)
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=True)
 
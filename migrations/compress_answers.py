@@ -0,0 +1,158 @@
+"""
+Compress (or decompress) the answer text of existing Q&A rows, train the shared
+zstd dictionary and report what compression buys.
+
+Usage (from the backend root):
+    python -m migrations.compress_answers --report [--sample 2000]
+    python -m migrations.compress_answers --train-dict answers.dict [--sample 5000]
+    python -m migrations.compress_answers [--batch-size 500]
+    python -m migrations.compress_answers --decompress
+
+--report samples answers and prints, per available codec, the compression ratio
+(plain bytes / stored bytes, snippet included) and the encode and decode cost per
+answer; it writes nothing. --train-dict writes a dictionary trained on sampled
+answers: point ANSWER_ZSTD_DICT at it before compressing. The default run
+compresses every plain answer of at least ANSWER_COMPRESS_MIN_BYTES with the
+configured codec; --decompress turns every compressed answer back into plain
+text. Both only touch rows whose answer did not change since they were read, so
+they are safe to run against a live database and to rerun.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+
+from global_db_opretions import BulkWriteBatch, iter_find_batches
+from models.qna import QnAEntryModel
+from utils import answer_codec
+from utils.answer_codec import COMPRESSED_FIELDS, encode_answer, full_answer
+from utils.geo_aggregates import is_answered
+
+
+async def sample_answers(size: int) -> List[str]:
+    """Full text of up to `size` random answered rows."""
+    cursor = QnAEntryModel.get_pymongo_collection().aggregate([
+        {"$match": {"answer": {"$type": "string"}}},
+        {"$sample": {"size": size}},
+        {"$project": {"answer": 1, "answer_z": 1, "answer_codec": 1}},
+    ])
+    texts = [full_answer(row) async for row in cursor]
+    return [text for text in texts if is_answered(text)]
+
+
+def available_codecs() -> List[str]:
+    codecs = ["zlib"]
+    if answer_codec.zstandard is not None:
+        codecs.append("zstd")
+        preferred = answer_codec.preferred_codec()
+        if preferred != "zstd":
+            codecs.append(preferred)
+    return codecs
+
+
+def compression_report(texts: List[str], codec: str) -> Dict[str, Any]:
+    """Ratio and per-answer cost of storing `texts` with `codec` (short answers stay plain)."""
+    plain_bytes = stored_bytes = compressed = 0
+    encode_seconds = decode_seconds = 0.0
+    for text in texts:
+        raw = len(text.encode("utf-8"))
+        plain_bytes += raw
+        if raw < answer_codec.ANSWER_COMPRESS_MIN_BYTES:
+            stored_bytes += raw
+            continue
+        started = time.perf_counter()
+        data, _ = answer_codec.compress(text, codec)
+        encode_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        answer_codec.decompress(data, codec)
+        decode_seconds += time.perf_counter() - started
+        stored_bytes += len(data) + len(answer_codec.snippet(text).encode("utf-8"))
+        compressed += 1
+    return {
+        "codec": codec,
+        "answers": len(texts),
+        "compressed": compressed,
+        "plain_bytes": plain_bytes,
+        "stored_bytes": stored_bytes,
+        "ratio": round(plain_bytes / stored_bytes, 2) if stored_bytes else None,
+        "encode_us": round(encode_seconds / compressed * 1e6, 1) if compressed else None,
+        "decode_us": round(decode_seconds / compressed * 1e6, 1) if compressed else None,
+    }
+
+
+def format_report(reports: List[Dict[str, Any]]) -> str:
+    lines = [f"{'codec':24} {'answers':>8} {'plain KB':>10} {'stored KB':>10} {'ratio':>6} {'encode µs':>10} {'decode µs':>10}"]
+    for report in reports:
+        lines.append(
+            f"{report['codec']:24} {report['answers']:8} {report['plain_bytes'] / 1024:10.1f} "
+            f"{report['stored_bytes'] / 1024:10.1f} {report['ratio'] or '-':>6} "
+            f"{report['encode_us'] or '-':>10} {report['decode_us'] or '-':>10}"
+        )
+    return "\n".join(lines)
+
+
+async def compress_rows(batch_size: int = 500) -> int:
+    """Compress plain answers with the configured codec; returns how many rows changed."""
+    batch = BulkWriteBatch(QnAEntryModel, batch_size=batch_size)
+    query = {"answer_z": {"$exists": False}, "answer": {"$type": "string"}}
+    async for rows in iter_find_batches(QnAEntryModel, query, batch_size, {"answer": 1}, soft_delete=False):
+        for row in rows:
+            fields = encode_answer(row["answer"], force=True)
+            if "answer_z" in fields:
+                await batch.add(UpdateOne({"_id": row["_id"], **query, "answer": row["answer"]}, {"$set": fields}))
+    summary = await batch.flush()
+    return summary.modified
+
+
+async def decompress_rows(batch_size: int = 500) -> int:
+    """Store every compressed answer as plain text again; returns how many rows changed."""
+    batch = BulkWriteBatch(QnAEntryModel, batch_size=batch_size)
+    projection = {field: 1 for field in COMPRESSED_FIELDS}
+    async for rows in iter_find_batches(
+        QnAEntryModel, {"answer_z": {"$exists": True}}, batch_size, projection, soft_delete=False
+    ):
+        for row in rows:
+            await batch.add(UpdateOne(
+                {"_id": row["_id"], "answer_z": row["answer_z"]},
+                {"$set": {"answer": full_answer(row)}, "$unset": {field: "" for field in COMPRESSED_FIELDS}}
+            ))
+    summary = await batch.flush()
+    return summary.modified
+
+
+async def _main() -> int:
+    from database import init_db
+
+    parser = argparse.ArgumentParser()
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--report", action="store_true", help="print ratio and decode cost, write nothing")
+    mode.add_argument("--train-dict", metavar="PATH", help="train a zstd dictionary on sampled answers")
+    mode.add_argument("--decompress", action="store_true", help="store compressed answers as plain text again")
+    parser.add_argument("--sample", type=int, default=2000, help="answers sampled for --report/--train-dict")
+    parser.add_argument("--dict-size", type=int, default=112640)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    await init_db()
+    if args.report:
+        texts = await sample_answers(args.sample)
+        print(format_report([compression_report(texts, codec) for codec in available_codecs()]))
+        return 0
+    if args.train_dict:
+        dictionary = answer_codec.train_dictionary(await sample_answers(args.sample), args.dict_size)
+        with open(args.train_dict, "wb") as f:
+            f.write(dictionary)
+        print(f"✅ Wrote {len(dictionary)} byte dictionary to {args.train_dict}; set ANSWER_ZSTD_DICT to use it")
+        return 0
+    if args.decompress:
+        print(f"✅ Decompressed {await decompress_rows(args.batch_size)} answers")
+        return 0
+    print(f"✅ Compressed {await compress_rows(args.batch_size)} answers with {answer_codec.preferred_codec()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,115 @@
+"""
+Move embedded prompt_questions.qna arrays into the qna_entries collection.
+
+Usage (from the backend root):
+    python -m migrations.qna_to_collection [--dry-run] [--batch-size 100]
+
+Each entry becomes a QnAEntryModel row keyed by (prompt_questions_id, uuid),
+with `position` set to its index in the array and createdAt/updatedAt copied
+from the parent. Answers are compressed when ANSWER_STORAGE=compressed.
+Entries without a uuid, or repeating one, get a deterministic uuid5 of
+"<document id>:<index>". Once a document's rows are written, its
+geo_metrics are rebuilt from them, qna_seq is set and the array is removed.
+
+Rows are upserted with $setOnInsert, so the script is safe to rerun after an
+interruption: documents already migrated no longer have a qna field.
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+from global_db_opretions import bulk_write, iter_find_batches
+from models.prompt_questions import PromptQuestionsModel
+from models.qna import QnAEntryModel
+from utils.answer_codec import encode_answer
+from utils.geo_aggregates import aggregate_from_qna
+
+
+def rows_from_document(doc: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
+    """Rows for one legacy document, plus how many uuids had to be generated."""
+    rows = []
+    seen = set()
+    generated = 0
+    for index, entry in enumerate(doc.get("qna") or []):
+        qna_uuid = entry.get("uuid")
+        if not qna_uuid or qna_uuid in seen:
+            qna_uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{doc['_id']}:{index}"))
+            generated += 1
+        seen.add(qna_uuid)
+        rows.append({
+            "capture": False,
+            "category_name": None,
+            "llm_flags": None,
+            **entry,
+            **encode_answer(entry.get("answer")),
+            "uuid": qna_uuid,
+            "prompt_questions_id": doc["_id"],
+            "position": index,
+            "company_id": doc.get("company_id"),
+            "project_id": doc.get("project_id"),
+            "createdAt": doc.get("createdAt"),
+            "updatedAt": doc.get("updatedAt"),
+            "isDeleted": doc.get("isDeleted", False),
+        })
+    return rows, generated
+
+
+async def migrate_document(doc: Dict[str, Any]) -> Tuple[int, int]:
+    rows, generated = rows_from_document(doc)
+    await bulk_write(QnAEntryModel, [
+        UpdateOne({"prompt_questions_id": row["prompt_questions_id"], "uuid": row["uuid"]}, {"$setOnInsert": row}, upsert=True)
+        for row in rows
+    ])
+    # Soft-deleted documents are migrated too, so no isDeleted filter here
+    await PromptQuestionsModel.get_pymongo_collection().update_one(
+        {"_id": doc["_id"]},
+        {
+            "$set": {"geo_metrics": aggregate_from_qna(rows).model_dump(), "qna_seq": len(rows)},
+            "$unset": {"qna": ""},
+        }
+    )
+    return len(rows), generated
+
+
+async def migrate(batch_size: int = 100, dry_run: bool = False) -> Dict[str, int]:
+    report = {"documents": 0, "rows": 0, "generated_uuids": 0}
+    async for docs in iter_find_batches(
+        PromptQuestionsModel, {"qna": {"$exists": True}}, batch_size, soft_delete=False
+    ):
+        for doc in docs:
+            if dry_run:
+                rows, generated = rows_from_document(doc)
+                row_count = len(rows)
+            else:
+                row_count, generated = await migrate_document(doc)
+            report["documents"] += 1
+            report["rows"] += row_count
+            report["generated_uuids"] += generated
+        print(f"🔄 {report['documents']} documents, {report['rows']} Q&As")
+    return report
+
+
+async def _main() -> int:
+    from database import init_db
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="count what would move, write nothing")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    await init_db()
+    report = await migrate(args.batch_size, args.dry_run)
+    action = "Would move" if args.dry_run else "Moved"
+    print(
+        f"✅ {action} {report['rows']} Q&As out of {report['documents']} documents "
+        f"({report['generated_uuids']} uuids generated)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
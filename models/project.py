@@ -2,6 +2,7 @@ from beanie import Document, PydanticObjectId
 from pydantic import Field, BaseModel
 from datetime import datetime
 from typing import Optional
+from pymongo import ASCENDING, IndexModel
 
 
 class Project(Document):
@@ -16,6 +17,9 @@ class Project(Document):
     
     class Settings:
         name = "projects"
+        indexes = [
+            IndexModel([("company_id", ASCENDING)], name="company_id"),
+        ]
     
     class Config:
         json_schema_extra = {
@@ -1,8 +1,9 @@
 from beanie import Document, PydanticObjectId
-from typing import Optional, List
+from typing import Optional, List, Dict
 from bson import ObjectId
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
+from pymongo import ASCENDING, IndexModel
 
 
 # 🔹 Sub-model for LLM Semantic Tags (ONE-TIME tagging)
@@ -15,8 +16,22 @@ class LLMFlags(BaseModel):
     features_mentioned: List[str] = []
     competitors_mentioned: List[str] = []
 
+    # LLMs send null for empty lists and words for missing ranks
+    @field_validator("features_mentioned", "competitors_mentioned", mode="before")
+    @classmethod
+    def _none_to_empty_list(cls, value):
+        return [] if value is None else value
 
-# 🔹 Sub-model for Question + Answer
+    @field_validator("brand_rank", mode="before")
+    @classmethod
+    def _coerce_rank(cls, value):
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+
+# 🔹 Question + Answer as returned by the API (stored as QnAEntryModel rows)
 class QnAModel(BaseModel):
     category_id: PydanticObjectId
     question: str
@@ -27,6 +42,29 @@ class QnAModel(BaseModel):
     llm_flags: Optional[LLMFlags] = None  # 🆕 LLM semantic tags
 
 
+# 🔹 Zero-mention entry kept inside the aggregate, keyed by Q&A uuid
+class ZeroMentionPrompt(BaseModel):
+    question: Optional[str] = None
+    answer_snippet: Optional[str] = None
+    category_name: Optional[str] = None
+
+
+# 🔹 Precomputed GEO counters, updated together with every qna write
+class GeoMetricsAggregate(BaseModel):
+    initialized: bool = False  # False when only partial $inc updates exist -> recompute
+    total: int = 0
+    tagged: int = 0
+    untagged_answered: int = 0
+    mentions: int = 0
+    top_3_mentions: int = 0
+    first_party_citations: int = 0
+    recommended: int = 0
+    positive_sentiment: int = 0
+    competitor_counts: Dict[str, int] = {}
+    feature_counts: Dict[str, int] = {}
+    zero_mentions: Dict[str, ZeroMentionPrompt] = {}
+
+
 class PromptQuestionsModel(Document):
     company_id: Optional[PydanticObjectId]
     project_id: Optional[PydanticObjectId]
@@ -36,13 +74,23 @@ class PromptQuestionsModel(Document):
     gemini_website_analysis: Optional[str] = None
     nation: Optional[str] = None
     state: Optional[str] = None
-    qna: Optional[List[QnAModel]] = Field(default_factory=list)
+    # 🔹 Q&As live in the qna_entries collection (models/qna.py); next free position there
+    qna_seq: int = 0
+    # 🆕 precomputed metric counters (never null, so $inc deltas always apply)
+    geo_metrics: GeoMetricsAggregate = Field(default_factory=GeoMetricsAggregate)
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
     isDeleted: bool = False
 
     class Settings:
         name = "prompt_questions"
+        indexes = [
+            IndexModel([("project_id", ASCENDING), ("isDeleted", ASCENDING)], name="project_id_isDeleted"),
+            IndexModel(
+                [("company_id", ASCENDING), ("isDeleted", ASCENDING), ("createdAt", ASCENDING)],
+                name="company_id_isDeleted_createdAt"
+            ),
+        ]
 
     class Config:
         arbitrary_types_allowed = True
@@ -51,3 +99,16 @@ class PromptQuestionsModel(Document):
             PydanticObjectId: str,
             datetime: lambda v: v.isoformat()
         }
+
+
+# 🔹 Projection without qna, for reads that only need the header and aggregates
+class PromptQuestionsHeader(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    company_id: Optional[PydanticObjectId] = None
+    project_id: Optional[PydanticObjectId] = None
+    website_url: Optional[str] = None
+    chatgpt_website_analysis: Optional[str] = None
+    gemini_website_analysis: Optional[str] = None
+    nation: Optional[str] = None
+    state: Optional[str] = None
+    geo_metrics: Optional[GeoMetricsAggregate] = None
@@ -0,0 +1,59 @@
+from beanie import Document, PydanticObjectId
+from typing import Optional
+from bson import ObjectId
+from pydantic import Field
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel
+from models.prompt_questions import LLMFlags
+
+
+# 🔹 One Q&A of a prompt_questions document (formerly an entry of its embedded qna array)
+class QnAEntryModel(Document):
+    prompt_questions_id: PydanticObjectId
+    position: int  # order inside the prompt_questions document
+    uuid: str
+    category_id: Optional[PydanticObjectId] = None
+    question: str
+    answer: Optional[str] = None  # snippet only when answer_z is set
+    answer_z: Optional[bytes] = None  # 🔹 compressed full answer (utils/answer_codec.py)
+    answer_codec: Optional[str] = None
+    capture: Optional[bool] = False
+    category_name: Optional[str] = None
+    llm_flags: Optional[LLMFlags] = None
+    # 🔹 Denormalized from the parent so portfolio metrics never join
+    company_id: Optional[PydanticObjectId] = None
+    project_id: Optional[PydanticObjectId] = None
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+    isDeleted: bool = False
+
+    class Settings:
+        name = "qna_entries"
+        indexes = [
+            IndexModel(
+                [("prompt_questions_id", ASCENDING), ("uuid", ASCENDING)],
+                name="prompt_questions_id_uuid",
+                unique=True
+            ),
+            IndexModel([("prompt_questions_id", ASCENDING), ("position", ASCENDING)], name="prompt_questions_id_position"),
+            # prompt_questions_id + position break createdAt ties (rows appended together),
+            # so the Q&A export's stable sort is still read straight off the index
+            IndexModel(
+                [("company_id", ASCENDING), ("isDeleted", ASCENDING), ("createdAt", ASCENDING),
+                 ("prompt_questions_id", ASCENDING), ("position", ASCENDING)],
+                name="company_id_isDeleted_createdAt_position"
+            ),
+            IndexModel(
+                [("project_id", ASCENDING), ("isDeleted", ASCENDING), ("createdAt", ASCENDING),
+                 ("prompt_questions_id", ASCENDING), ("position", ASCENDING)],
+                name="project_id_isDeleted_createdAt_position"
+            ),
+        ]
+
+    class Config:
+        arbitrary_types_allowed = True
+        json_encoders = {
+            ObjectId: str,
+            PydanticObjectId: str,
+            datetime: lambda v: v.isoformat()
+        }
@@ -32,6 +32,11 @@ class Question(BaseModel):
     uuid: Optional[str] = None
 
 
+class GeneratedQuestion(BaseModel):
+    category: Optional[str] = None
+    text: Optional[str] = None
+
+
 class EvaluationResult(BaseModel):
     id: str
     category: str
@@ -11,16 +11,20 @@ from models.website_analysis import (
 )
 from controllers.gemini_controller import generate_questions, ask_gemini
 from controllers.chatgpt_controller import ask_chatgpt, analyze_website_chatgpt
+from utils.leases import LeaseTimeoutError
+from utils.admission import admission_gate
+from utils.log import get_logger
 from typing import List
 
 
 router = APIRouter(prefix="/api", tags=["API"])
+logger = get_logger(__name__)
 
 
 @router.post("/analyze", response_model=WebsiteAnalysisResponse)
 async def analyze_endpoint(request: AnalyzeRequest):
     try:
-        print("hello--->",request)
+        logger.debug("hello---> %s", request)
         result = await analyze_website_chatgpt(
             request.domain, 
             request.nation, 
@@ -30,6 +34,10 @@ async def analyze_endpoint(request: AnalyzeRequest):
             request.project_id
         )
         return result
+    except LeaseTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -37,14 +45,17 @@ async def analyze_endpoint(request: AnalyzeRequest):
 @router.post("/generate-questions", response_model=List[Question])
 async def generate_questions_endpoint(request: GenerateQuestionsRequest):
     try:
-        result = await generate_questions(
-            request.analysis, 
-            request.domain, 
-            request.nation, 
-            request.state,
-            request.prompt_questions_id
-        )
+        async with admission_gate("generate-questions").slot():
+            result = await generate_questions(
+                request.analysis, 
+                request.domain, 
+                request.nation, 
+                request.state,
+                request.prompt_questions_id
+            )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -63,6 +74,10 @@ async def ask_chatgpt_endpoint(request: AskChatGPTRequest):
     try:
         answer = await ask_chatgpt(request.question,request.prompt_questions_id,request.category_id,request.uuid)
         return AskResponse(answer=answer,prompt_questions_id=request.prompt_questions_id)
+    except LeaseTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
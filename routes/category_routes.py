@@ -2,17 +2,26 @@ from fastapi import APIRouter, HTTPException
 from controllers.category_controller import (
     get_all_category_controller,
     get_prompt_questions_data_controller,
+    get_qna_answer_controller,
     calculate_geo_metrics_controller,
     tag_qna_with_llm_controller
 )
-from fastapi import Request
+from fastapi import Request, Response
+from utils.pagination import read_optional_body
+from utils.responses import FastJSONResponse
+from utils.admission import admission_gate
+from utils.log import get_logger
 router = APIRouter(prefix="/api/category",tags=["Category"])
+logger = get_logger(__name__)
 
 @router.post("/get-all-category")
-async def get_all_category():
+async def get_all_category(request: Request):
     try:
-        result = await get_all_category_controller()
-        return result
+        body = await read_optional_body(request)
+        result = await get_all_category_controller(body)
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -20,9 +29,24 @@ async def get_all_category():
 @router.post("/get-prompt-questions-data")
 async def get_prompt_questions_data(request: Request):
     try:
-        print("request",request)
+        logger.debug("request %s", request)
         result = await get_prompt_questions_data_controller(request)
-        return result
+        if isinstance(result, Response):
+            return result
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/get-qna-answer")
+async def get_qna_answer(request: Request):
+    try:
+        result = await get_qna_answer_controller(request)
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -34,8 +58,11 @@ async def tag_qna_with_llm(request: Request):
     Call this ONCE after answers are generated, then use /calculate-geo-metrics for fast results.
     """
     try:
-        result = await tag_qna_with_llm_controller(request)
+        async with admission_gate("tag-qna-with-llm").slot():
+            result = await tag_qna_with_llm_controller(request)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -44,6 +71,8 @@ async def tag_qna_with_llm(request: Request):
 async def calculate_geo_metrics(request: Request):
     try:
         result = await calculate_geo_metrics_controller(request)
-        return result
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, List
 from controllers.company_controller import (
     get_all_companies,
+    get_companies_page,
     get_company_by_id,
     create_company,
     update_company,
     delete_company
 )
+from global_db_opretions import InvalidCursorError
+from utils.pagination import read_optional_body, page_params
+from utils.responses import FastJSONResponse
 
 
 router = APIRouter(prefix="/api/companies", tags=["Companies"])
@@ -26,10 +30,21 @@ class CompanyUpdateRequest(BaseModel):
 
 
 @router.post("/list")
-async def list_companies():
+async def list_companies(request: Request):
+    """
+    Optional body: limit, after, order (see utils/pagination.py). With a limit the
+    response also carries next_cursor and has_more.
+    """
     try:
+        limit, after, direction = page_params(await read_optional_body(request))
+        if limit is not None:
+            return FastJSONResponse(await get_companies_page(limit, after, direction))
         companies = await get_all_companies()
-        return {"companies": companies}
+        return FastJSONResponse({"companies": companies})
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
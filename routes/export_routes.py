@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException
+from fastapi import Request
+from controllers.export_controller import (
+    export_qna_controller,
+    export_metrics_controller
+)
+
+router = APIRouter(prefix="/api/export", tags=["Export"])
+
+
+@router.post("/qna")
+async def export_qna(request: Request):
+    try:
+        return await export_qna_controller(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/metrics")
+async def export_metrics(request: Request):
+    try:
+        return await export_metrics_controller(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+from fastapi import Request
+from utils.responses import FastJSONResponse
+from controllers.metrics_controller import (
+    company_geo_metrics_controller,
+    project_geo_metrics_controller
+)
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"])
+
+
+@router.post("/company-geo-metrics")
+async def company_geo_metrics(request: Request):
+    try:
+        result = await company_geo_metrics_controller(request)
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/project-geo-metrics")
+async def project_geo_metrics(request: Request):
+    try:
+        result = await project_geo_metrics_controller(request)
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
 from controllers.project_controller import (
     get_projects_by_company,
+    get_projects_page,
     get_project_by_id,
     create_project,
     update_project,
     delete_project
 )
+from global_db_opretions import InvalidCursorError
+from utils.pagination import read_optional_body, page_params
+from utils.responses import FastJSONResponse
 
 
 router = APIRouter(tags=["Projects"])
@@ -30,10 +34,21 @@ class ProjectUpdateRequest(BaseModel):
 
 
 @router.post("/api/companies/{company_id}/projects")
-async def list_company_projects(company_id: str):
+async def list_company_projects(company_id: str, request: Request):
+    """
+    Optional body: limit, after, order (see utils/pagination.py). With a limit the
+    response also carries next_cursor and has_more.
+    """
     try:
+        limit, after, direction = page_params(await read_optional_body(request))
+        if limit is not None:
+            return FastJSONResponse(await get_projects_page(company_id, limit, after, direction))
         projects = await get_projects_by_company(company_id)
-        return {"projects": projects}
+        return FastJSONResponse({"projects": projects})
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,48 @@
+"""
+Production entry point: several uvicorn worker processes, no auto-reload.
+
+    python serve.py
+
+Settings (environment):
+    HOST (0.0.0.0), PORT (8001), WEB_CONCURRENCY (number of CPUs),
+    LOG_LEVEL (info), GRACEFUL_SHUTDOWN_SECONDS (30)
+
+Workers share the ChatGPT browser profile through a lease (utils/leases.py),
+so browser sessions still run one at a time while every other endpoint scales
+across cores. For development keep using `python main.py` (single process,
+reload on change).
+"""
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+# 🔹 Same settings as the workers, which load .env in main.py
+load_dotenv()
+
+
+def _workers() -> int:
+    return max(1, int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+
+
+def main() -> None:
+    workers = _workers()
+    if workers > 1 and os.getenv("CACHE_SYNC", "").lower() != "mongo":
+        print(
+            "⚠️ Running several workers without CACHE_SYNC=mongo: a write clears only its own "
+            "worker's cache, the others serve cached data until CACHE_TTL_SECONDS."
+        )
+    print(f"🚀 Starting {workers} worker(s)")
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8001")),
+        workers=workers,
+        # uvicorn only knows lowercase level names ("INFO" raises KeyError)
+        log_level=os.getenv("LOG_LEVEL", "info").lower(),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30")),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Admission control for expensive endpoints.
+
+    async with admission_gate("browser").slot():
+        ...  # at most `concurrency` of these run at once in this worker
+
+Each gate admits `concurrency` requests at a time and queues at most
+`max_queue` more in arrival order. It keeps a moving average of how long an
+admitted request takes, and from it estimates the wait of a new arrival. A
+request is rejected straight away with 429 and a Retry-After header when the
+queue is full or the estimated wait exceeds the gate's deadline. A queued
+request whose deadline passes before it is admitted is also rejected, so
+nothing is left waiting for a turn its client has given up on.
+
+Settings per gate (name upper-cased, dashes as underscores):
+    ADMISSION_<GATE>_CONCURRENCY, ADMISSION_<GATE>_MAX_QUEUE,
+    ADMISSION_<GATE>_DEADLINE_SECONDS
+ADMISSION_ENABLED=false turns every gate into a no-op. Gates are per worker
+process. Queue depth, active requests, waits, estimates and rejections are
+exported on /metrics.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Tuple
+
+from fastapi import HTTPException
+
+from utils.telemetry import REGISTRY, Counter, Gauge, Histogram
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+
+# concurrency, max queue, deadline (s), service time assumed before the first measurement (s)
+GATE_DEFAULTS: Dict[str, Tuple[int, int, float, float]] = {
+    # ask-chatgpt and analyze share the browser profile, so they share one gate
+    "browser": (1, 10, 900, 60),
+    "generate-questions": (4, 20, 60, 10),
+    "tag-qna-with-llm": (2, 10, 300, 60),
+    "calculate-geo-metrics": (8, 50, 300, 5),
+}
+_FALLBACK_DEFAULTS = (4, 20, 60, 10)
+
+# Weight of the newest service time in the moving average
+_SERVICE_TIME_ALPHA = 0.2
+
+ADMISSIONS = REGISTRY.register(Counter(
+    "admission_requests_total",
+    "Requests at an admission gate by outcome (admitted, queued, rejected_queue_full, "
+    "rejected_estimated_wait, rejected_deadline).",
+    ("gate", "outcome")
+))
+ACTIVE = REGISTRY.register(Gauge("admission_active", "Requests admitted and running.", ("gate",)))
+QUEUE_DEPTH = REGISTRY.register(Gauge("admission_queue_depth", "Requests waiting for admission.", ("gate",)))
+ESTIMATED_WAIT = REGISTRY.register(Gauge(
+    "admission_estimated_wait_seconds", "Estimated wait of a request arriving now.", ("gate",)
+))
+SERVICE_TIME = REGISTRY.register(Gauge(
+    "admission_service_seconds", "Moving average of the time an admitted request runs.", ("gate",)
+))
+WAIT_TIME = REGISTRY.register(Histogram(
+    "admission_wait_seconds", "Time admitted requests spent queued.", ("gate",),
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600)
+))
+
+
+class AdmissionRejected(HTTPException):
+    """429 with Retry-After: the request could not start within its deadline."""
+
+    def __init__(self, gate: str, reason: str, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=429,
+            detail=f"{gate} is at capacity ({reason}); retry in about {seconds}s",
+            headers={"Retry-After": str(seconds)},
+        )
+
+
+def _setting(gate: str, name: str, default: float) -> float:
+    return float(os.getenv(f"ADMISSION_{gate.upper().replace('-', '_')}_{name}", default))
+
+
+class AdmissionGate:
+    def __init__(self, name: str, concurrency: int, max_queue: int, deadline: float, service_seconds: float):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.deadline = deadline
+        self.service_seconds = service_seconds
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._publish()
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdmissionGate":
+        concurrency, max_queue, deadline, service_seconds = GATE_DEFAULTS.get(name, _FALLBACK_DEFAULTS)
+        return cls(
+            name,
+            int(_setting(name, "CONCURRENCY", concurrency)),
+            int(_setting(name, "MAX_QUEUE", max_queue)),
+            _setting(name, "DEADLINE_SECONDS", deadline),
+            service_seconds,
+        )
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until the request at queue `position` (1 = next) is admitted."""
+        if position <= 0:
+            return 0.0
+        return math.ceil(position / self.concurrency) * self.service_seconds
+
+    def _publish(self) -> None:
+        ACTIVE.set(self.active, self.name)
+        QUEUE_DEPTH.set(len(self._waiters), self.name)
+        SERVICE_TIME.set(round(self.service_seconds, 3), self.name)
+        arriving = len(self._waiters) + 1 if self.active >= self.concurrency else 0
+        ESTIMATED_WAIT.set(round(self.estimated_wait(arriving), 3), self.name)
+
+    def _reject(self, outcome: str, reason: str, retry_after: float) -> None:
+        ADMISSIONS.inc(self.name, outcome)
+        raise AdmissionRejected(self.name, reason, retry_after)
+
+    async def _acquire(self) -> None:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            ADMISSIONS.inc(self.name, "admitted")
+            WAIT_TIME.observe(0, self.name)
+            return
+
+        position = len(self._waiters) + 1
+        estimate = self.estimated_wait(position)
+        if len(self._waiters) >= self.max_queue:
+            self._reject("rejected_queue_full", f"{len(self._waiters)} queued", estimate)
+        if estimate > self.deadline:
+            self._reject("rejected_estimated_wait", f"estimated wait {estimate:.0f}s", estimate)
+
+        ADMISSIONS.inc(self.name, "queued")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._publish()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("rejected_deadline", "deadline passed while queued", self.estimated_wait(len(self._waiters)))
+            raise
+        ADMISSIONS.inc(self.name, "admitted")
+        WAIT_TIME.observe(time.monotonic() - started, self.name)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next in line; `active` stays the same
+                waiter.set_result(None)
+                self._publish()
+                return
+        self.active -= 1
+        self._publish()
+
+    @asynccontextmanager
+    async def slot(self):
+        if not ADMISSION_ENABLED:
+            yield
+            return
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.service_seconds += _SERVICE_TIME_ALPHA * (elapsed - self.service_seconds)
+            self._release()
+
+
+_gates: Dict[str, AdmissionGate] = {}
+
+
+def admission_gate(name: str) -> AdmissionGate:
+    """The gate called `name`, configured from the environment (one per name)."""
+    if name not in _gates:
+        _gates[name] = AdmissionGate.from_env(name)
+    return _gates[name]
@@ -0,0 +1,145 @@
+"""
+Compressed storage of Q&A answer text.
+
+With ANSWER_STORAGE=compressed, answers of at least ANSWER_COMPRESS_MIN_BYTES are
+written as `answer_z` (compressed bytes) plus `answer_codec`, and `answer` keeps
+only a plaintext snippet. Everything that filters or counts on `answer`
+(answered/pending, zero-mention snippets, summary lists) keeps working on the
+snippet; the full text is decompressed only where a reader asks for it by
+projecting `answer_z` and calling `with_full_answer`.
+
+The codec is zstd when the optional `zstandard` package is installed, using the
+shared dictionary at ANSWER_ZSTD_DICT when set (train one with
+`python -m migrations.compress_answers --train-dict answers.dict`), zlib
+otherwise. Rows record the codec they were written with, so changing these
+settings never breaks reads of older rows, as long as the dictionary a zstd row
+was written with stays configured.
+"""
+import os
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import Binary
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+ANSWER_STORAGE = os.getenv("ANSWER_STORAGE", "plain").lower()  # "plain" or "compressed"
+ANSWER_COMPRESS_MIN_BYTES = int(os.getenv("ANSWER_COMPRESS_MIN_BYTES", "512"))
+ANSWER_ZSTD_DICT = os.getenv("ANSWER_ZSTD_DICT", "")
+ANSWER_ZSTD_LEVEL = int(os.getenv("ANSWER_ZSTD_LEVEL", "6"))
+ZLIB_LEVEL = 6
+
+# Same cut as the zero-mention snippets in geo_metrics
+SNIPPET_LENGTH = 200
+
+# Row fields that only exist for compressed answers
+COMPRESSED_FIELDS = ("answer_z", "answer_codec")
+
+
+class AnswerCodecError(ValueError):
+    """A stored answer cannot be decoded with the codecs configured here."""
+
+
+def snippet(text: str) -> str:
+    return text[:SNIPPET_LENGTH] + "..." if len(text) > SNIPPET_LENGTH else text
+
+
+@lru_cache(maxsize=1)
+def _zstd_dictionary():
+    if zstandard is None or not ANSWER_ZSTD_DICT:
+        return None
+    with open(ANSWER_ZSTD_DICT, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def preferred_codec() -> str:
+    """"zstd:<dict id>", "zstd" or "zlib", depending on what is installed and configured."""
+    if zstandard is None:
+        return "zlib"
+    dictionary = _zstd_dictionary()
+    return f"zstd:{dictionary.dict_id()}" if dictionary is not None else "zstd"
+
+
+@lru_cache(maxsize=None)
+def _zstd_compressor(codec: str):
+    dictionary = _zstd_dictionary() if codec != "zstd" else None
+    return zstandard.ZstdCompressor(level=ANSWER_ZSTD_LEVEL, dict_data=dictionary)
+
+
+@lru_cache(maxsize=None)
+def _zstd_decompressor(codec: str):
+    if zstandard is None:
+        raise AnswerCodecError(f"Answer stored as {codec} but zstandard is not installed")
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor()
+    dictionary = _zstd_dictionary()
+    if dictionary is None or codec != f"zstd:{dictionary.dict_id()}":
+        raise AnswerCodecError(f"Answer stored as {codec} but ANSWER_ZSTD_DICT does not hold that dictionary")
+    return zstandard.ZstdDecompressor(dict_data=dictionary)
+
+
+def compress(text: str, codec: Optional[str] = None) -> Tuple[bytes, str]:
+    codec = codec or preferred_codec()
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL), codec
+    return _zstd_compressor(codec).compress(data), codec
+
+
+def decompress(data: bytes, codec: str) -> str:
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if codec.startswith("zstd"):
+        return _zstd_decompressor(codec).decompress(data).decode("utf-8")
+    raise AnswerCodecError(f"Unknown answer codec: {codec}")
+
+
+def encode_answer(text: Optional[str], force: bool = False) -> Dict[str, Any]:
+    """
+    Row fields storing `text`: {"answer": text} when stored plain, or the snippet
+    plus answer_z/answer_codec when compressed (ANSWER_STORAGE=compressed or
+    `force`, and the text is at least ANSWER_COMPRESS_MIN_BYTES).
+    """
+    if text is None or not (force or ANSWER_STORAGE == "compressed"):
+        return {"answer": text}
+    if len(text.encode("utf-8")) < ANSWER_COMPRESS_MIN_BYTES:
+        return {"answer": text}
+    data, codec = compress(text)
+    return {"answer": snippet(text), "answer_z": Binary(data), "answer_codec": codec}
+
+
+def answer_update(text: Optional[str]) -> Dict[str, Any]:
+    """Update operators replacing a row's answer, clearing a previous compressed copy if needed."""
+    fields = encode_answer(text)
+    if "answer_z" in fields:
+        return {"$set": fields}
+    return {"$set": fields, "$unset": {field: "" for field in COMPRESSED_FIELDS}}
+
+
+def full_answer(row: Dict[str, Any]) -> Optional[str]:
+    data = row.get("answer_z")
+    if data is None:
+        return row.get("answer")
+    return decompress(bytes(data), row.get("answer_codec") or "zlib")
+
+
+def with_full_answer(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The row with `answer` holding the full text and the storage fields removed."""
+    if "answer_z" not in row and "answer_codec" not in row:
+        return row
+    row = dict(row)
+    row["answer"] = full_answer(row)
+    for field in COMPRESSED_FIELDS:
+        row.pop(field, None)
+    return row
+
+
+def train_dictionary(samples: List[str], size: int = 112640) -> bytes:
+    """A zstd dictionary trained on sample answers (needs zstandard)."""
+    if zstandard is None:
+        raise AnswerCodecError("Training a dictionary needs the zstandard package")
+    return zstandard.train_dictionary(size, [sample.encode("utf-8") for sample in samples]).as_bytes()
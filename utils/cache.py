@@ -0,0 +1,166 @@
+"""
+In-process read-through cache for reference documents (categories, companies,
+projects) that are read on most requests but rarely written.
+
+    categories = await reference_cache.get_or_load("categories", "all", loader)
+    await reference_cache.invalidate("categories")   # after a write
+
+Entries expire after CACHE_TTL_SECONDS and at most CACHE_MAX_ENTRIES are kept:
+expired entries are dropped when read or when a new entry is stored, then the
+least recently used ones go. Controllers that write one of these
+collections invalidate its namespace, so the writing worker never serves stale
+data. With CACHE_SYNC=mongo every invalidation also bumps a version counter in
+the `cache_versions` collection; other workers poll it at most every
+CACHE_SYNC_INTERVAL_SECONDS and drop namespaces whose version moved.
+
+Cached values are shared between requests: treat them as read-only.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_SYNC = os.getenv("CACHE_SYNC", "").lower()  # "" (this process only) or "mongo"
+CACHE_SYNC_INTERVAL_SECONDS = float(os.getenv("CACHE_SYNC_INTERVAL_SECONDS", "2"))
+CACHE_VERSIONS_COLLECTION = "cache_versions"
+
+
+class ReadThroughCache:
+    def __init__(
+        self,
+        ttl: float = CACHE_TTL_SECONDS,
+        sync: bool = False,
+        sync_interval: float = CACHE_SYNC_INTERVAL_SECONDS,
+        max_entries: int = CACHE_MAX_ENTRIES
+    ):
+        self.ttl = ttl
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self.max_entries = max_entries
+        # Least recently used first
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        # Per-key loader lock and the number of callers holding or waiting on it
+        self._locks: Dict[Tuple[str, Hashable], Tuple[asyncio.Lock, int]] = {}
+        # Bumped on every local invalidation so a load racing a write is not stored
+        self._generations: Dict[str, int] = {}
+        self._remote_versions: Dict[str, int] = {}
+        self._last_sync: Optional[float] = None
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        await self._sync_if_due()
+        entry_key = (namespace, key)
+        entry = self._lookup(entry_key)
+        if entry:
+            return entry[1]
+
+        # One loader per key: concurrent misses wait for the first one instead of all hitting Mongo
+        async with self._key_lock(entry_key):
+            entry = self._lookup(entry_key)
+            if entry:
+                return entry[1]
+            generation = self._generations.get(namespace, 0)
+            value = await loader()
+            if self._generations.get(namespace, 0) == generation:
+                self._store(entry_key, (time.monotonic() + (ttl or self.ttl), value))
+            return value
+
+    def _lookup(self, entry_key: Tuple[str, Hashable]) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[entry_key]
+            return None
+        self._entries.move_to_end(entry_key)
+        return entry
+
+    def _store(self, entry_key: Tuple[str, Hashable], entry: Tuple[float, Any]) -> None:
+        self._entries[entry_key] = entry
+        self._entries.move_to_end(entry_key)
+        # A miss already cost a Mongo round trip, so sweeping expired entries here is cheap in comparison
+        now = time.monotonic()
+        for expired in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[expired]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @asynccontextmanager
+    async def _key_lock(self, entry_key: Tuple[str, Hashable]):
+        lock, users = self._locks.get(entry_key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[entry_key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            # The last caller out removes the lock, so keys that are no longer loaded do not pile up
+            lock, users = self._locks[entry_key]
+            if users == 1:
+                del self._locks[entry_key]
+            else:
+                self._locks[entry_key] = (lock, users - 1)
+
+    def _drop(self, namespace: str) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        for entry_key in [k for k in self._entries if k[0] == namespace]:
+            del self._entries[entry_key]
+
+    async def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self._drop(namespace)
+        if self.sync:
+            await self._publish(namespaces)
+
+    def clear(self) -> None:
+        for namespace in {k[0] for k in self._entries}:
+            self._drop(namespace)
+
+    @staticmethod
+    def _versions_collection():
+        from database import db
+        return db[CACHE_VERSIONS_COLLECTION]
+
+    async def _publish(self, namespaces) -> None:
+        try:
+            collection = self._versions_collection()
+            for namespace in namespaces:
+                await collection.update_one({"_id": namespace}, {"$inc": {"version": 1}}, upsert=True)
+        except Exception as e:
+            logger.warning("⚠️ Cache invalidation was not published to other workers: %s", e)
+
+    async def _sync_if_due(self) -> None:
+        if not self.sync:
+            return
+        first_sync = self._last_sync is None
+        if not first_sync and time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = time.monotonic()
+        try:
+            versions = await self._versions_collection().find({}).to_list(length=None)
+        except Exception as e:
+            logger.warning("⚠️ Cache version poll failed: %s", e)
+            return
+        for doc in versions:
+            namespace, version = doc["_id"], doc.get("version", 0)
+            if self._remote_versions.get(namespace) != version:
+                # Nothing is cached before the first poll; after it, a new or moved version is a write elsewhere
+                if not first_sync:
+                    self._drop(namespace)
+                self._remote_versions[namespace] = version
+
+
+reference_cache = ReadThroughCache(sync=CACHE_SYNC == "mongo")
@@ -0,0 +1,155 @@
+"""
+Cancel expensive requests whose client has gone away or whose deadline passed.
+
+Starlette keeps running a handler after the client disconnects, so a frontend
+that gives up on /api/ask-chatgpt would otherwise leave Chromium driving a
+conversation nobody reads, holding the browser lease for up to two minutes.
+For the paths in CANCEL_PATHS, `CancellationMiddleware`:
+
+- reads the (small, JSON) request body up front, so the server's `receive()`
+  is free to watch for `http.disconnect` while the handler runs;
+- cancels the handler's task when the client disconnects (nothing is sent
+  back) or when the request deadline passes (504);
+- counts cancelled requests and the seconds already spent on them on /metrics.
+
+The deadline is `X-Request-Timeout: <seconds>` from the client, capped by
+REQUEST_DEADLINE_SECONDS (0 = no server deadline). Cancellation arrives in the
+handler as `asyncio.CancelledError` at its next await: the browser context and
+Playwright are closed by their `finally`/`async with`, admission slots and
+leases are released, a single-flight execution is cancelled once none of its
+callers is left, and LLM tagging flushes what it already tagged.
+CANCEL_ON_DISCONNECT=false turns it off.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+import orjson
+
+from utils.log import get_logger
+from utils.telemetry import REGISTRY, Counter
+
+logger = get_logger(__name__)
+
+CANCEL_ON_DISCONNECT = os.getenv("CANCEL_ON_DISCONNECT", "true").lower() == "true"
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "0"))
+TIMEOUT_HEADER = b"x-request-timeout"
+
+# Browser and LLM work: everything else is cheap enough to finish
+CANCEL_PATHS = (
+    "/api/analyze",
+    "/api/generate-questions",
+    "/api/ask",
+    "/api/ask-chatgpt",
+    "/api/category/tag-qna-with-llm",
+    "/api/category/calculate-geo-metrics",
+)
+
+CANCELLED_REQUESTS = REGISTRY.register(Counter(
+    "cancelled_requests_total",
+    "Requests cancelled before completion by reason (disconnect, deadline).",
+    ("route", "reason")
+))
+CANCELLED_SECONDS = REGISTRY.register(Counter(
+    "cancelled_request_seconds_total",
+    "Time already spent on requests when they were cancelled.",
+    ("route", "reason")
+))
+
+
+def request_deadline(scope, default: float = REQUEST_DEADLINE_SECONDS) -> Optional[float]:
+    """Seconds the request may run: the client's X-Request-Timeout, capped by `default`."""
+    headers: Dict[bytes, bytes] = dict(scope.get("headers") or [])
+    requested = None
+    try:
+        requested = float(headers[TIMEOUT_HEADER])
+    except (KeyError, ValueError):
+        pass
+    limits = [value for value in (requested, default) if value and value > 0]
+    return min(limits) if limits else None
+
+
+class CancellationMiddleware:
+    """Cancels handlers of `paths` on client disconnect or past their deadline."""
+
+    def __init__(self, app, paths: Iterable[str] = CANCEL_PATHS, deadline: float = REQUEST_DEADLINE_SECONDS):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.deadline = deadline
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return  # gone before the handler started
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+
+        task = asyncio.current_task()
+        disconnected = asyncio.Event()
+        state = {"body_sent": False, "started": False, "finished": False, "reason": None}
+
+        async def replay_receive():
+            if not state["body_sent"]:
+                state["body_sent"] = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                state["finished"] = True
+            await send(message)
+
+        def cancel(reason: str) -> None:
+            if state["reason"] is None and not state["finished"]:
+                state["reason"] = reason
+                task.cancel()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            cancel("disconnect")
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        deadline = request_deadline(scope, self.deadline)
+        timer = asyncio.get_running_loop().call_later(deadline, cancel, "deadline") if deadline else None
+        started = time.perf_counter()
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except asyncio.CancelledError:
+            reason = state["reason"]
+            if reason is None:
+                raise  # cancelled from outside (server shutdown): not ours to swallow
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+            scope["cancelled"] = reason
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            CANCELLED_REQUESTS.inc(route, reason)
+            CANCELLED_SECONDS.inc(route, reason, amount=time.perf_counter() - started)
+            logger.info("🛑 Cancelled %s %s after %.1fs (%s)", scope.get("method"), route, time.perf_counter() - started, reason)
+            if reason == "deadline" and not state["started"]:
+                await send({
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [(b"content-type", b"application/json")],
+                })
+                await send({
+                    "type": "http.response.body",
+                    "body": orjson.dumps({"detail": f"Request deadline of {deadline:g}s exceeded"}),
+                })
+        finally:
+            watcher.cancel()
+            if timer:
+                timer.cancel()
@@ -0,0 +1,101 @@
+"""
+Streamed Parquet bodies built from an async iterator of flat rows.
+
+`stream_parquet(rows, schema)` encodes one row group every `row_group_size`
+rows and yields the bytes written so far, so memory stays bounded by a single
+row group however many rows the cursor returns. Encoding runs in a worker
+thread to keep the event loop free.
+
+Parquet support needs the optional `pyarrow` package; check `parquet_available()`
+before promising a Parquet response. pyarrow is imported on the first Parquet
+export, not when a worker boots.
+"""
+import asyncio
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List
+
+from fastapi.responses import StreamingResponse
+
+if TYPE_CHECKING:
+    import pyarrow
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+
+@lru_cache(maxsize=1)
+def arrow():
+    """The `pyarrow` module with `pyarrow.parquet` loaded, or None if it is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:  # optional: pip install pyarrow
+        return None
+    return pyarrow
+
+
+def parquet_available() -> bool:
+    return arrow() is not None
+
+
+class _DrainableSink:
+    """Write-only file object whose contents are handed out and dropped after each row group."""
+
+    def __init__(self):
+        self.closed = False
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+async def stream_parquet(
+    rows: AsyncIterator[Dict[str, Any]],
+    schema: "pyarrow.Schema",
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE
+) -> AsyncIterator[bytes]:
+    """Parquet file of `rows` (dicts keyed by the schema's field names) as a byte stream."""
+    pyarrow = arrow()
+    sink = _DrainableSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+
+    def write(batch: List[Dict[str, Any]]) -> bytes:
+        writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+        return sink.drain()
+
+    try:
+        batch: List[Dict[str, Any]] = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                yield await asyncio.to_thread(write, batch)
+                batch = []
+        if batch:
+            yield await asyncio.to_thread(write, batch)
+        writer.close()
+        yield sink.drain()
+    finally:
+        # A failed cursor or a client that went away must not leave the writer open
+        if writer.is_open:
+            writer.close()
+
+
+def parquet_stream_response(body: AsyncIterator[bytes], **kwargs) -> StreamingResponse:
+    return StreamingResponse(body, media_type=PARQUET_MEDIA_TYPE, **kwargs)
@@ -0,0 +1,261 @@
+"""
+MongoDB command and connection-pool monitoring.
+
+`CommandLatencyListener` records a latency histogram per (collection, command)
+and logs commands slower than `slow_ms`. `PoolMonitor` tracks pool size and how
+long requests wait to check out a connection: a rising checkout wait with
+`checked_out == max_pool_size` means the pool is too small for the load.
+
+Both are registered on the Motor client in `database.py`. `snapshot()` is
+served at `/health/db`, `prometheus_lines()` at `/metrics`.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from utils.log import get_logger
+from utils.telemetry import render_histogram_series
+
+logger = get_logger(__name__)
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Commands whose first value is not a collection name
+_NO_COLLECTION = {"ping", "hello", "isMaster", "ismaster", "buildInfo", "endSessions", "saslStart", "saslContinue"}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (not thread-safe, callers hold a lock)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile (max for the open bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return float(self.buckets[index]) if index < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}" for bound in self.buckets] + ["inf"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+def _collection_of(command_name: str, command: Dict[str, Any]) -> str:
+    if command_name == "getMore":
+        return str(command.get("collection", "-"))
+    value = command.get(command_name)
+    if command_name in _NO_COLLECTION or not isinstance(value, str):
+        return "-"
+    return value
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Per (collection, command) latency histograms plus a slow-operation log."""
+
+    def __init__(self, slow_ms: float = 100):
+        self.slow_ms = slow_ms
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.failures: Dict[Tuple[str, str], int] = {}
+        self.slow_operations = 0
+        self._pending: Dict[Tuple[Any, int], str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event) -> None:
+        collection = _collection_of(event.command_name, event.command)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, failed: bool) -> None:
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            collection = self._pending.pop((event.connection_id, event.request_id), "-")
+            key = (collection, event.command_name)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.observe(duration_ms)
+            if failed:
+                self.failures[key] = self.failures.get(key, 0) + 1
+            slow = duration_ms >= self.slow_ms
+            if slow:
+                self.slow_operations += 1
+        if slow:
+            logger.warning("🐢 Slow MongoDB %s on %s: %.1fms", event.command_name, collection, duration_ms)
+
+    def succeeded(self, event) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._finish(event, failed=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            commands = {
+                f"{collection}.{command}": {
+                    **histogram.to_dict(),
+                    "failures": self.failures.get((collection, command), 0),
+                }
+                for (collection, command), histogram in sorted(self.histograms.items())
+            }
+            return {"slow_ms": self.slow_ms, "slow_operations": self.slow_operations, "commands": commands}
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Pool size and connection checkout wait times."""
+
+    def __init__(self):
+        self.checkout_wait = LatencyHistogram()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+        self._checkout_started: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def connection_check_out_started(self, event) -> None:
+        with self._lock:
+            self.waiting += 1
+            self._checkout_started[threading.get_ident()] = time.perf_counter()
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checked_out += 1
+            started = self._checkout_started.pop(threading.get_ident(), None)
+            # pymongo >= 4.7 measures the wait itself
+            duration = getattr(event, "duration", None)
+            if duration is not None:
+                self.checkout_wait.observe(duration * 1000)
+            elif started is not None:
+                self.checkout_wait.observe((time.perf_counter() - started) * 1000)
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checkout_failures += 1
+            self._checkout_started.pop(threading.get_ident(), None)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self.pool_clears += 1
+
+    # Unused pool events
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "checkout_wait": self.checkout_wait.to_dict(),
+            }
+
+
+def _seconds_series(name: str, labelnames, labels, histogram: LatencyHistogram) -> List[str]:
+    return render_histogram_series(
+        name, labelnames, labels, [bound / 1000 for bound in histogram.buckets],
+        histogram.counts, histogram.total_ms / 1000, histogram.count
+    )
+
+
+def prometheus_lines(commands: CommandLatencyListener, pool: PoolMonitor) -> List[str]:
+    """Both monitors in the `/metrics` exposition format (registered as a collector)."""
+    lines = [
+        "# HELP mongodb_command_duration_seconds MongoDB command latency by collection and command.",
+        "# TYPE mongodb_command_duration_seconds histogram",
+    ]
+    with commands._lock:
+        for (collection, command), histogram in sorted(commands.histograms.items()):
+            lines.extend(_seconds_series(
+                "mongodb_command_duration_seconds", ("collection", "command"), (collection, command), histogram
+            ))
+        failures = sorted(commands.failures.items())
+        slow_operations = commands.slow_operations
+    lines += [
+        "# HELP mongodb_command_failures_total Failed MongoDB commands by collection and command.",
+        "# TYPE mongodb_command_failures_total counter",
+    ]
+    lines += [
+        f'mongodb_command_failures_total{{collection="{collection}",command="{command}"}} {count}'
+        for (collection, command), count in failures
+    ]
+    lines += [
+        "# HELP mongodb_slow_operations_total Commands slower than MONGODB_SLOW_MS.",
+        "# TYPE mongodb_slow_operations_total counter",
+        f"mongodb_slow_operations_total {slow_operations}",
+    ]
+
+    with pool._lock:
+        gauges = {
+            "mongodb_pool_open_connections": ("Open pooled connections.", pool.open_connections),
+            "mongodb_pool_checked_out": ("Connections checked out of the pool.", pool.checked_out),
+            "mongodb_pool_waiting": ("Operations queued for a pooled connection.", pool.waiting),
+        }
+        counters = {
+            "mongodb_pool_checkout_failures_total": ("Failed connection checkouts.", pool.checkout_failures),
+            "mongodb_pool_clears_total": ("Times the pool was cleared.", pool.pool_clears),
+        }
+        checkout_wait = _seconds_series("mongodb_pool_checkout_wait_seconds", (), (), pool.checkout_wait)
+    for kind, metrics in (("gauge", gauges), ("counter", counters)):
+        for name, (help_text, value) in metrics.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    lines += [
+        "# HELP mongodb_pool_checkout_wait_seconds Time spent waiting to check out a connection.",
+        "# TYPE mongodb_pool_checkout_wait_seconds histogram",
+    ] + checkout_wait
+    return lines
@@ -0,0 +1,55 @@
+"""
+Request-side helpers for the filters shared by the metrics and export endpoints.
+
+    - company_id / project_id: str (ObjectId)
+    - date_from / date_to: str (optional - ISO 8601, filter on createdAt;
+      a date_to without a time includes that whole day)
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+
+def parse_object_id(value: Any, field: str) -> ObjectId:
+    """`value` as an ObjectId; a malformed id is the client's mistake (400), not a 500."""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail=f"{field} is not a valid id")
+
+
+def parse_date(value: Any, field: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail=f"{field} must be an ISO 8601 date")
+
+
+def _is_date_only(value: Any) -> bool:
+    try:
+        date.fromisoformat(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def created_at_range(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """`createdAt` condition for the body's date_from / date_to, or None without either."""
+    date_from = parse_date(body.get("date_from"), "date_from")
+    date_to = parse_date(body.get("date_to"), "date_to")
+    if not (date_from or date_to):
+        return None
+    condition: Dict[str, Any] = {}
+    if date_from:
+        condition["$gte"] = date_from
+    if date_to and _is_date_only(body["date_to"]):
+        # A bare day: everything before the next midnight
+        condition["$lt"] = date_to + timedelta(days=1)
+    elif date_to:
+        condition["$lte"] = date_to
+    return condition
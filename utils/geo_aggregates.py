@@ -0,0 +1,243 @@
+"""
+Incremental GEO metric counters for prompt_questions documents.
+
+Every Q&A contributes a fixed set of counters (mention, top-3, citation, ...) to
+`PromptQuestionsModel.geo_metrics`. Writers that change a Q&A's answer or
+`llm_flags` apply `aggregate_delta(old, new)` to the parent right after the row
+write (`utils/qna_store.py`); `/calculate-geo-metrics` then only reads the
+aggregate and turns it into rates with `build_geo_metrics`.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.prompt_questions import GeoMetricsAggregate, ZeroMentionPrompt
+from utils.answer_codec import snippet
+
+PLACEHOLDER_ANSWER = "Not available yet"
+
+
+def _field_key(name: str) -> str:
+    # Mongo field names cannot contain "." or start with "$"
+    return name.replace(".", "．").replace("$", "＄")
+
+
+def _field_name(key: str) -> str:
+    return key.replace("．", ".").replace("＄", "$")
+
+
+def named_counts(counts: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """A stored counter map (competitor_counts, feature_counts) keyed by the original names."""
+    return {_field_name(k): v for k, v in (counts or {}).items()}
+
+
+def _as_dict(qna: Any) -> Dict[str, Any]:
+    if qna is None:
+        return {}
+    if isinstance(qna, dict):
+        return qna
+    return qna.model_dump()
+
+
+def is_answered(answer: Optional[str]) -> bool:
+    return bool(answer) and answer != PLACEHOLDER_ANSWER
+
+
+def qna_key(qna: Dict[str, Any], index: int) -> str:
+    """Key of a Q&A inside `geo_metrics.zero_mentions` (legacy entries have no uuid)."""
+    return qna.get("uuid") or f"#{index}"
+
+
+def _zero_mention(qna: Dict[str, Any]) -> Dict[str, Any]:
+    return ZeroMentionPrompt(
+        question=qna.get("question") or "",
+        answer_snippet=snippet(qna.get("answer") or ""),
+        category_name=qna.get("category_name"),
+    ).model_dump()
+
+
+def qna_contribution(qna: Any) -> Tuple[Dict[str, int], Optional[Dict[str, Any]]]:
+    """Counters a single Q&A adds to the aggregate, plus its zero-mention entry if any."""
+    qna = _as_dict(qna)
+    if not qna:
+        return {}, None
+
+    counts = {"total": 1}
+    flags = qna.get("llm_flags")
+    if not flags:
+        if is_answered(qna.get("answer")):
+            # Needs tagging (or the regex fallback) before it can be counted
+            counts["untagged_answered"] = 1
+            return counts, None
+        return counts, _zero_mention(qna)
+
+    flags = _as_dict(flags)
+    counts["tagged"] = 1
+    if not flags.get("brand_mentioned"):
+        return counts, _zero_mention(qna)
+
+    counts["mentions"] = 1
+    rank = flags.get("brand_rank")
+    if rank and rank <= 3:
+        counts["top_3_mentions"] = 1
+    if flags.get("citation_type") == "first_party":
+        counts["first_party_citations"] = 1
+    if flags.get("is_recommended"):
+        counts["recommended"] = 1
+    if flags.get("sentiment") == "positive":
+        counts["positive_sentiment"] = 1
+    for feature in flags.get("features_mentioned") or []:
+        key = f"feature_counts.{_field_key(feature)}"
+        counts[key] = counts.get(key, 0) + 1
+    for competitor in flags.get("competitors_mentioned") or []:
+        key = f"competitor_counts.{_field_key(competitor)}"
+        counts[key] = counts.get(key, 0) + 1
+    return counts, None
+
+
+def aggregate_from_qna(qna_list: List[Any]) -> GeoMetricsAggregate:
+    """Full recompute of the aggregate from a document's qna list."""
+    aggregate = GeoMetricsAggregate(initialized=True)
+    for index, qna in enumerate(qna_list or []):
+        qna = _as_dict(qna)
+        counts, zero_mention = qna_contribution(qna)
+        for key, value in counts.items():
+            if "." in key:
+                group, name = key.split(".", 1)
+                bucket = getattr(aggregate, group)
+                bucket[name] = bucket.get(name, 0) + value
+            else:
+                setattr(aggregate, key, getattr(aggregate, key) + value)
+        if zero_mention:
+            aggregate.zero_mentions[_field_key(qna_key(qna, index))] = ZeroMentionPrompt(**zero_mention)
+    return aggregate
+
+
+def aggregate_delta(old_qna: Any, new_qna: Any, key: str, prefix: str = "geo_metrics") -> Dict[str, Any]:
+    """
+    Mongo update operators moving the aggregate from `old_qna` to `new_qna`.
+    Pass None as `old_qna` for an inserted Q&A and as `new_qna` for a removed one.
+    """
+    old_counts, old_zero = qna_contribution(old_qna)
+    new_counts, new_zero = qna_contribution(new_qna)
+
+    inc = {}
+    for field in set(old_counts) | set(new_counts):
+        diff = new_counts.get(field, 0) - old_counts.get(field, 0)
+        if diff:
+            inc[f"{prefix}.{field}"] = diff
+
+    update: Dict[str, Any] = {}
+    if inc:
+        update["$inc"] = inc
+    zero_path = f"{prefix}.zero_mentions.{_field_key(key)}"
+    if new_zero:
+        if new_zero != old_zero:
+            update["$set"] = {zero_path: new_zero}
+    elif old_zero:
+        update["$unset"] = {zero_path: ""}
+    return update
+
+
+def merge_updates(*updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge Mongo update documents operator by operator."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for update in updates:
+        for operator, fields in (update or {}).items():
+            merged.setdefault(operator, {}).update(fields)
+    return merged
+
+
+def sum_updates(*updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Like merge_updates, but $inc amounts on the same field add up, so the deltas
+    of many Q&As can go out as one update. (Each zero_mentions key belongs to a
+    single Q&A, so $set/$unset never collide.)
+    """
+    merged = merge_updates(*[{op: f for op, f in (u or {}).items() if op != "$inc"} for u in updates])
+    inc: Dict[str, int] = {}
+    for update in updates:
+        for field, amount in (update or {}).get("$inc", {}).items():
+            inc[field] = inc.get(field, 0) + amount
+    inc = {field: amount for field, amount in inc.items() if amount}
+    if inc:
+        merged["$inc"] = inc
+    return merged
+
+
+def aggregates_equal(left: Optional[GeoMetricsAggregate], right: Optional[GeoMetricsAggregate]) -> bool:
+    """Compare two aggregates, ignoring counters that dropped to zero."""
+    if left is None or right is None:
+        return left is right
+
+    def normalized(aggregate: GeoMetricsAggregate):
+        data = aggregate.model_dump()
+        data["competitor_counts"] = {k: v for k, v in data["competitor_counts"].items() if v}
+        data["feature_counts"] = {k: v for k, v in data["feature_counts"].items() if v}
+        return data
+
+    return normalized(left) == normalized(right)
+
+
+def with_rates(counters: Dict[str, Any]) -> Dict[str, Any]:
+    """Portfolio counters (total_prompts, total_mentions, ...) plus their percentage rates."""
+    total = counters.get("total_prompts", 0)
+    mentions = counters.get("total_mentions", 0)
+
+    def rate(count: int, base: int) -> float:
+        return round((count / base) * 100, 2) if base > 0 else 0
+
+    return {
+        **counters,
+        "brand_mention_rate": rate(mentions, total),
+        "top_3_position_rate": rate(counters.get("top_3_mentions", 0), mentions),
+        "first_party_citation_rate": rate(counters.get("first_party_citations", 0), mentions),
+        "recommendation_rate": rate(counters.get("recommended", 0), mentions),
+        "positive_sentiment_rate": rate(counters.get("positive_sentiment", 0), mentions),
+    }
+
+
+def build_geo_metrics(aggregate: GeoMetricsAggregate, brand_name: str, competitors: List[str]) -> Dict[str, Any]:
+    """Turn the stored counters into the `/calculate-geo-metrics` response."""
+    total_prompts = aggregate.total
+    mentions = aggregate.mentions
+    stored_competitors = named_counts(aggregate.competitor_counts)
+    competitor_mentions = {comp: stored_competitors.get(comp, 0) for comp in competitors}
+    zero_mention_prompts = [entry.model_dump() for entry in aggregate.zero_mentions.values()]
+
+    def rate(count: int, base: int) -> float:
+        return round((count / base) * 100, 2) if base > 0 else 0
+
+    comparison_presence = 0
+    prompts_with_comparison = sum(1 for count in competitor_mentions.values() if count > 0)
+    if competitors and mentions > 0:
+        comparison_presence = round((prompts_with_comparison / len(competitors)) * 100, 2)
+
+    return {
+        "brand_name": brand_name,
+        "total_prompts": total_prompts,
+        "using_llm_flags": aggregate.tagged > 0,
+
+        # Brand Mention Rate
+        "total_mentions": mentions,
+        "brand_mention_rate": rate(mentions, total_prompts),
+
+        # Top-3 Position Rate
+        "top_3_mentions": aggregate.top_3_mentions,
+        "top_3_position_rate": rate(aggregate.top_3_mentions, mentions),
+
+        # Zero-Mention Gap
+        "zero_mention_count": len(zero_mention_prompts),
+        "zero_mention_prompts": zero_mention_prompts,
+
+        # First-Party Citation
+        "first_party_citations": aggregate.first_party_citations,
+        "first_party_citation_rate": rate(aggregate.first_party_citations, mentions),
+
+        # LLM-based metrics
+        "recommendation_rate": rate(aggregate.recommended, mentions),
+        "positive_sentiment_rate": rate(aggregate.positive_sentiment, mentions),
+
+        # Competitive Metrics
+        "competitor_mentions": competitor_mentions,
+        "comparison_presence": comparison_presence,
+        "brand_features": [_field_name(k) for k, v in aggregate.feature_counts.items() if v > 0],
+    }
@@ -0,0 +1,233 @@
+"""
+Shared JSON extraction for every LLM response path.
+
+LLM answers rarely come back as clean JSON: they are wrapped in code fences,
+surrounded by prose that itself contains brackets, use smart quotes, leave
+trailing commas or get cut off mid-array. `extract_json` finds the JSON value
+in a single linear scan over the text, repairs the common faults and, when a
+schema is given, validates the result against it so callers receive typed data.
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+
+_FENCE_PATTERN = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+_DANGLING_KEY_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"\s*$')
+
+_PAIRS = {"[": "]", "{": "}"}
+_OPEN_SMART_QUOTES = "“„‟"
+_CLOSE_SMART_QUOTES = "”"
+_SMART_QUOTES = _OPEN_SMART_QUOTES + _CLOSE_SMART_QUOTES
+
+# Upper bound on how many bracketed spans are tried per response
+MAX_CANDIDATES = 20
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no candidate in the text parses (and validates) as JSON."""
+
+    def __init__(self, message: str, text: str = ""):
+        super().__init__(message)
+        self.text = text
+
+
+@lru_cache(maxsize=64)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def _candidate_spans(text: str) -> List[Tuple[int, int, bool]]:
+    """
+    Single pass over `text` returning (start, end, complete) spans that look like
+    JSON values. Balanced spans nested in another balanced span are dropped, so the
+    result holds only outermost values plus, if the text ends inside an open bracket,
+    one truncated span running to the end of the text.
+    """
+    closed: List[Tuple[int, int]] = []
+    stack: List[Tuple[str, int]] = []
+    in_string = False
+    string_is_smart = False
+    escape = False
+
+    for i, ch in enumerate(text):
+        if not stack:
+            if ch in _PAIRS:
+                stack.append((ch, i))
+            continue
+
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"' or (string_is_smart and ch in _SMART_QUOTES):
+                in_string = False
+            continue
+
+        if ch == '"' or ch in _OPEN_SMART_QUOTES:
+            in_string = True
+            string_is_smart = ch != '"'
+        elif ch in _PAIRS:
+            stack.append((ch, i))
+        elif ch in "]}":
+            # Unwind to the matching opener; unmatched openers in between were prose
+            depth = len(stack) - 1
+            while depth >= 0 and _PAIRS[stack[depth][0]] != ch:
+                depth -= 1
+            if depth < 0:
+                continue
+            start = stack[depth][1]
+            del stack[depth:]
+            while closed and closed[-1][0] >= start:
+                closed.pop()
+            closed.append((start, i + 1))
+
+    spans = [(start, end, True) for start, end in closed]
+    if stack:
+        spans.append((stack[0][1], len(text), False))
+    return spans
+
+
+def _strip_dangling(text: str) -> str:
+    text = text.rstrip()
+    if text.endswith(":"):
+        text = _DANGLING_KEY_PATTERN.sub("", text[:-1].rstrip())
+    return text.rstrip().rstrip(",").rstrip()
+
+
+def _close(text: str, stack: List[str]) -> str:
+    text = _strip_dangling(text)
+    return text + "".join(_PAIRS[opener] for opener in reversed(stack))
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+
+
+def repair_json(fragment: str) -> Iterator[str]:
+    """
+    Yield repaired versions of `fragment`, most faithful first.
+
+    Fixes smart-quote string delimiters, trailing commas before a closing bracket
+    and truncation (unterminated string, dangling key, unclosed brackets). For a
+    truncated value the fragment is also cut back to each of the last few commas,
+    dropping the partial element; when the cut fell inside a string that is tried
+    before keeping the half-written string.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = False
+    string_is_smart = False
+    escape = False
+
+    for ch in fragment:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"' or (string_is_smart and ch in _SMART_QUOTES):
+                in_string = False
+                ch = '"'
+            out.append(ch)
+            continue
+
+        if ch == '"' or ch in _SMART_QUOTES:
+            in_string = True
+            string_is_smart = ch != '"'
+            ch = '"'
+        elif ch in _PAIRS:
+            stack.append(ch)
+        elif ch in "]}":
+            _drop_trailing_comma(out)
+            if stack and _PAIRS[stack[-1]] == ch:
+                stack.pop()
+        elif ch == "," and stack:
+            cuts.append((len(out), tuple(stack)))
+        out.append(ch)
+
+    repaired = "".join(out)
+    if not in_string and not stack:
+        yield repaired
+        return
+
+    trimmed = (_close("".join(out[:position]), list(snapshot)) for position, snapshot in reversed(cuts[-3:]))
+    if in_string:
+        # A half-written string is a half-written value: prefer dropping it
+        yield from trimmed
+        yield _close(repaired + '"', stack)
+    else:
+        yield _close(repaired, stack)
+        yield from trimmed
+
+
+def _candidates(text: str) -> Iterator[str]:
+    fence = _FENCE_PATTERN.search(text)
+    if fence:
+        yield fence.group(1).strip()
+
+    stripped = text.strip()
+    if stripped[:1] in _PAIRS:
+        yield stripped
+
+    # Largest spans first: prose brackets like "[1]" are short, the payload is not
+    spans = sorted(_candidate_spans(text), key=lambda span: span[1] - span[0], reverse=True)
+    for start, end, _ in spans[:MAX_CANDIDATES]:
+        yield text[start:end]
+
+
+def _parse(candidate: str, schema: Any) -> Tuple[bool, Any]:
+    for attempt_repair in (False, True):
+        attempts = repair_json(candidate) if attempt_repair else (candidate,)
+        for attempt in attempts:
+            try:
+                data = json.loads(attempt)
+            except ValueError:
+                continue
+            if schema is None:
+                return True, data
+            try:
+                return True, _adapter(schema).validate_python(data)
+            except ValidationError:
+                continue
+    return False, None
+
+
+def extract_json(text: Optional[str], schema: Any = None) -> Any:
+    """
+    Extract the JSON value from an LLM response.
+
+    Args:
+        text: raw model output (may include code fences and prose)
+        schema: optional pydantic model or type (e.g. `List[str]`) the value must
+            validate against; candidates that parse but do not validate are skipped
+
+    Returns:
+        The parsed value, or the validated object when `schema` is given.
+
+    Raises:
+        JSONExtractionError: if no candidate parses and validates.
+    """
+    if not text or not text.strip():
+        raise JSONExtractionError("Empty LLM response", text or "")
+
+    seen = set()
+    for candidate in _candidates(text):
+        if candidate in seen:
+            continue
+        seen.add(candidate)
+        ok, value = _parse(candidate, schema)
+        if ok:
+            return value
+
+    target = f" matching {getattr(schema, '__name__', schema)}" if schema is not None else ""
+    raise JSONExtractionError(f"No valid JSON{target} found in LLM response", text)
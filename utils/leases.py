@@ -0,0 +1,184 @@
+"""
+Cross-process leases for singleton resources (the ChatGPT browser profile, ...).
+
+    PROFILE_LEASE = lease("chatgpt-browser-profile")
+    async with PROFILE_LEASE:
+        ...  # no other coroutine, worker process or (with mongo) host holds it
+
+A lease object is created once per resource and reused. Inside one process
+waiters queue on an asyncio.Lock; across processes:
+
+- LEASE_BACKEND=file (default): an exclusive `flock` on `<LEASE_DIR>/<name>.lock`.
+  The OS drops it when the holder exits, even on a crash. This covers workers on
+  one host, which is all a profile directory on local disk needs.
+- LEASE_BACKEND=mongo: a document in the `leases` collection with an owner
+  and an expiry, renewed every LEASE_TTL_SECONDS / 3 while held. A crashed
+  holder's lease expires after LEASE_TTL_SECONDS. Use it for resources shared
+  between hosts.
+
+Waiting longer than LEASE_WAIT_TIMEOUT_SECONDS raises LeaseTimeoutError.
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from utils.log import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: leases only cover the current process
+    fcntl = None
+
+logger = get_logger(__name__)
+
+LEASE_BACKEND = os.getenv("LEASE_BACKEND", "file").lower()  # "file" or "mongo"
+LEASE_DIR = os.getenv("LEASE_DIR", os.path.join(os.getcwd(), "locks"))
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "120"))
+LEASE_WAIT_TIMEOUT_SECONDS = float(os.getenv("LEASE_WAIT_TIMEOUT_SECONDS", "900"))
+LEASE_POLL_SECONDS = 0.25
+LEASES_COLLECTION = "leases"
+
+# Identifies this process as a lease owner
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseTimeoutError(TimeoutError):
+    def __init__(self, name: str, waited: float):
+        super().__init__(f"Timed out after {waited:.0f}s waiting for the '{name}' lease")
+        self.name = name
+
+
+class _Lease:
+    """Process-local queue in front of a cross-process lock (subclasses)."""
+
+    def __init__(self, name: str, wait_timeout: float = LEASE_WAIT_TIMEOUT_SECONDS):
+        self.name = name
+        self.wait_timeout = wait_timeout
+        self._local = asyncio.Lock()
+
+    @property
+    def locked(self) -> bool:
+        return self._local.locked()
+
+    async def _try_acquire(self) -> bool:
+        raise NotImplementedError
+
+    async def _release(self) -> None:
+        raise NotImplementedError
+
+    async def __aenter__(self) -> "_Lease":
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._local.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise LeaseTimeoutError(self.name, time.monotonic() - started) from None
+        try:
+            while not await self._try_acquire():
+                if time.monotonic() - started >= self.wait_timeout:
+                    raise LeaseTimeoutError(self.name, time.monotonic() - started)
+                await asyncio.sleep(LEASE_POLL_SECONDS)
+        except BaseException:
+            self._local.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            await self._release()
+        finally:
+            self._local.release()
+
+
+class FileLease(_Lease):
+    def __init__(self, name: str, directory: str = LEASE_DIR, **kwargs):
+        super().__init__(name, **kwargs)
+        self.path = os.path.join(directory, f"{name}.lock")
+        self._fd: Optional[int] = None
+
+    async def _try_acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # Holder's identity, for whoever inspects a stuck lock file
+        os.ftruncate(fd, 0)
+        os.write(fd, OWNER_ID.encode())
+        self._fd = fd
+        return True
+
+    async def _release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class MongoLease(_Lease):
+    def __init__(self, name: str, ttl: float = LEASE_TTL_SECONDS, owner: Optional[str] = None, **kwargs):
+        super().__init__(name, **kwargs)
+        self.ttl = ttl
+        # Leases of the same owner re-enter; pass a distinct owner for one-off leases
+        self.owner = owner or OWNER_ID
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _collection():
+        from database import db
+        return db[LEASES_COLLECTION]
+
+    def _expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    async def _try_acquire(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self._collection().update_one(
+                {"_id": self.name, "$or": [{"expiresAt": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expiresAt": self._expiry(), "acquiredAt": now}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Someone else holds an unexpired lease: the upsert collided with it
+            return False
+        self._heartbeat = asyncio.create_task(self._renew())
+        return True
+
+    async def _renew(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                result = await self._collection().update_one(
+                    {"_id": self.name, "owner": self.owner}, {"$set": {"expiresAt": self._expiry()}}
+                )
+                if not result.matched_count:
+                    logger.warning("⚠️ Lease '%s' was lost (expired and taken by another owner)", self.name)
+                    return
+            except Exception as e:
+                logger.warning("⚠️ Lease '%s' renewal failed: %s", self.name, e)
+
+    async def _release(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        await self._collection().delete_one({"_id": self.name, "owner": self.owner})
+
+
+_leases: Dict[str, _Lease] = {}
+
+
+def lease(name: str) -> _Lease:
+    """The lease guarding resource `name`, using the configured backend (one per name)."""
+    if name not in _leases:
+        _leases[name] = MongoLease(name) if LEASE_BACKEND == "mongo" else FileLease(name)
+    return _leases[name]
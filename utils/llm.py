@@ -0,0 +1,43 @@
+"""
+Lazy access to the Gemini SDK.
+
+`google.generativeai` pulls in the whole generativelanguage protobuf tree, which
+is a large share of the app's import time. Controllers call `get_model()` /
+`generation_config()` instead of importing it, so the SDK is loaded and
+configured on the first LLM call rather than when a worker boots.
+"""
+import os
+from functools import lru_cache
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+
+class LLMConfigurationError(RuntimeError):
+    """No Gemini API key is configured."""
+
+
+def api_key() -> str:
+    return os.getenv("GOOGLE_API_KEY") or os.getenv("API_KEY", "")
+
+
+@lru_cache(maxsize=1)
+def genai():
+    """The configured `google.generativeai` module (imported on first use)."""
+    key = api_key()
+    if not key:
+        raise LLMConfigurationError(
+            "No API_KEY or GOOGLE_API_KEY found. Please set the GOOGLE_API_KEY environment variable "
+            "in your .env file or system environment."
+        )
+    import google.generativeai as genai_sdk
+
+    genai_sdk.configure(api_key=key)
+    return genai_sdk
+
+
+def get_model(name: str = GEMINI_MODEL):
+    return genai().GenerativeModel(name)
+
+
+def generation_config(**kwargs):
+    return genai().GenerationConfig(**kwargs)
@@ -0,0 +1,241 @@
+"""
+Structured, non-blocking logging for the app.
+
+    logger = get_logger(__name__)
+    logger.info("🔍 Auto-discovered %d competitors", len(competitors))
+
+Records are put on a bounded in-memory queue by the thread that logs them and
+written to stdout by a background listener thread, so a slow terminal or log
+shipper never stalls the event loop. When the queue is full, records are
+dropped and counted instead of blocking the caller. Each record carries the
+correlation id of the request that produced it (`X-Request-ID`, taken from
+the client or generated by `RequestIdMiddleware` and echoed on the response).
+
+Per-iteration progress goes through `ThrottledLogger`, which lets one record
+per key through every LOG_PROGRESS_INTERVAL_SECONDS and folds the rest into a
+"(N similar suppressed)" count on the next one.
+
+Settings: LOG_LEVEL (info) for the app's own loggers (third-party libraries
+log at WARNING and above), LOG_FORMAT (`text`, or `json` for one object per
+line), LOG_QUEUE_SIZE (10000), LOG_PROGRESS_INTERVAL_SECONDS (10). Records,
+drops, suppressed progress lines and the time spent logging on the calling
+thread are exported on /metrics as `log_*`.
+"""
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+from utils.telemetry import REGISTRY, Counter
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_PROGRESS_INTERVAL_SECONDS = float(os.getenv("LOG_PROGRESS_INTERVAL_SECONDS", "10"))
+
+APP_LOGGER = "envision"
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+LOG_RECORDS = REGISTRY.register(Counter("log_records_total", "Log records queued by level.", ("level",)))
+LOG_DROPPED = REGISTRY.register(Counter("log_records_dropped_total", "Log records dropped because the queue was full."))
+LOG_SUPPRESSED = REGISTRY.register(Counter(
+    "log_records_suppressed_total", "Progress records held back by rate limiting.", ("logger",)
+))
+LOG_EMIT_SECONDS = REGISTRY.register(Counter(
+    "log_emit_seconds_total", "Time spent on the logging thread to format and queue records."
+))
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for an app module (`__name__`), under the LOG_LEVEL-controlled namespace."""
+    return logging.getLogger(f"{APP_LOGGER}.{name}")
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES}
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Formats on the calling thread, then queues without ever waiting."""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        started = time.perf_counter()
+        try:
+            return super().handle(record)
+        finally:
+            LOG_EMIT_SECONDS.inc(amount=time.perf_counter() - started)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            LOG_RECORDS.inc(record.levelname)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever `sys.stdout` is at the time, so redirects apply."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """Route every logger through the queue and start the writer thread (once per process)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = _StdoutHandler()
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    handler = _QueueHandler(_queue)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING)
+    logging.getLogger(APP_LOGGER).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(_queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+    REGISTRY.register_collector(_queue_depth_lines)
+
+
+def _queue_depth_lines() -> List[str]:
+    return [
+        "# HELP log_queue_depth Log records waiting for the writer thread.",
+        "# TYPE log_queue_depth gauge",
+        f"log_queue_depth {_queue.qsize()}",
+    ]
+
+
+def flush_logs() -> None:
+    """Block until every queued record has been written."""
+    if _listener is not None:
+        _queue.join()
+
+
+def logging_overhead() -> Dict[str, float]:
+    """Totals since startup: records queued, dropped and suppressed, and the time spent queueing them."""
+    records = LOG_RECORDS.total()
+    emit_seconds = LOG_EMIT_SECONDS.total()
+    return {
+        "records": records,
+        "dropped": LOG_DROPPED.total(),
+        "suppressed": LOG_SUPPRESSED.total(),
+        "emit_seconds": round(emit_seconds, 6),
+        "emit_us_per_record": round(emit_seconds / records * 1e6, 2) if records else None,
+    }
+
+
+class ThrottledLogger:
+    """
+    At most one record per key every `interval` seconds; the ones in between
+    are counted and reported on the next record that goes through.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = LOG_PROGRESS_INTERVAL_SECONDS):
+        self.logger = logger
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._keys: Dict[str, Tuple[float, int]] = {}  # key -> (last emitted, suppressed since)
+
+    def log(self, level: int, msg: str, *args, key: str = "", **kwargs) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._keys.get(key, (float("-inf"), 0))
+            if now - last < self.interval:
+                self._keys[key] = (last, suppressed + 1)
+                LOG_SUPPRESSED.inc(self.logger.name)
+                return
+            self._keys[key] = (now, 0)
+        if suppressed:
+            msg += " (%d similar suppressed)"
+            args += (suppressed,)
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs) -> None:
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+
+class RequestIdMiddleware:
+    """Binds a correlation id to each request's logs and echoes it as `X-Request-ID`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        supplied = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        request_id = supplied if _VALID_REQUEST_ID.match(supplied) else uuid.uuid4().hex[:16]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER, request_id.encode())]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
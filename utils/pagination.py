@@ -0,0 +1,44 @@
+"""
+Request-side helpers for the keyset-paginated list endpoints.
+
+List endpoints accept an optional JSON body:
+    - limit: int (optional - page size, capped at MAX_PAGE_SIZE)
+    - after: str (optional - next_cursor of the previous page)
+    - order: "asc" | "desc" (optional - defaults to "asc")
+
+Without `limit` they return the full list, as before.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pymongo import ASCENDING, DESCENDING
+
+MAX_PAGE_SIZE = 500
+
+
+async def read_optional_body(request: Request) -> Dict[str, Any]:
+    """JSON body of the request, or {} when the client sent none."""
+    raw = await request.body()
+    if not raw.strip():
+        return {}
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return body
+
+
+def page_params(body: Dict[str, Any]) -> Tuple[Optional[int], Optional[str], int]:
+    """(limit, after, direction) from a list request body; limit is None when not paginating."""
+    limit = body.get("limit")
+    after = body.get("after")
+    order = body.get("order", "asc")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail='order must be "asc" or "desc"')
+    if limit is not None:
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="limit must be an integer")
+    if after is not None and limit is None:
+        raise HTTPException(status_code=400, detail="after requires limit")
+    return limit, after, ASCENDING if order == "asc" else DESCENDING
@@ -0,0 +1,164 @@
+"""
+Opt-in sampling profiler for single requests.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is picked
+by `PROFILE_SAMPLE_RATE` (0.0 - 1.0). While it runs, a background thread looks
+at the event loop thread every `PROFILE_INTERVAL_MS` and records one stack:
+
+- `[cpu];...` when the request's task is the one running: where CPU time goes.
+- `[await];...` when the task is suspended: the await chain it is parked on
+  (a Mongo query, a Gemini call, the browser lease), i.e. where wall time goes.
+
+Samples taken while another request is running are attributed to the await
+chain, so concurrent traffic does not pollute the profile. Work the handler
+hands to threads (`asyncio.to_thread`) shows up as an await.
+
+Profiles are written to `PROFILE_DIR` in the collapsed-stack format read by
+flamegraph.pl, speedscope and inferno, one file per request named
+`<utc time>_<method>_<route>_<duration>ms.folded`. With neither PROFILE_TOKEN
+nor PROFILE_SAMPLE_RATE set the middleware is not installed at all.
+"""
+import asyncio
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.getcwd(), "profiles"))
+PROFILE_HEADER = b"x-profile"
+
+# Deepest stack walked per sample
+_MAX_STACK_DEPTH = 200
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _awaiting_frames(coro) -> List:
+    """Frames of a suspended coroutine chain, outermost first."""
+    frames = []
+    while coro is not None and len(frames) < _MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+
+class RequestSampler:
+    """
+    Samples the event loop thread on behalf of one asyncio task. Stacks start
+    at `root_frame` (the middleware's frame), leaving out the server frames
+    above it.
+    """
+
+    def __init__(self, task: asyncio.Task, root_frame, interval: float):
+        self.task = task
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._root_frame = root_frame
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self) -> Optional[Tuple[str, ...]]:
+        frame = sys._current_frames().get(self._thread_id)
+        running: List = []
+        while frame is not None and len(running) < _MAX_STACK_DEPTH:
+            running.append(frame)
+            if frame is self._root_frame:
+                return ("[cpu]",) + tuple(_frame_label(f) for f in reversed(running))
+            frame = frame.f_back
+        if self.task.done():
+            return None
+        waiting = _awaiting_frames(self.task.get_coro())
+        if self._root_frame in waiting:
+            waiting = waiting[waiting.index(self._root_frame):]
+        return ("[await]",) + tuple(_frame_label(f) for f in waiting) if waiting else None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            stack = self._sample()
+            if stack and not self._stop.is_set():
+                self.stacks[stack] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", text).strip("_") or "root"
+
+
+def write_profile(sampler: RequestSampler, method: str, route: str, duration_ms: float) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    path = os.path.join(PROFILE_DIR, f"{stamp}_{method}_{_slug(route)}_{duration_ms:.0f}ms.folded")
+    with open(path, "w") as f:
+        f.write(sampler.folded())
+    return path
+
+
+class ProfilingMiddleware:
+    """Profiles requests selected by the `X-Profile` header or the sample rate."""
+
+    def __init__(self, app, token: str = PROFILE_TOKEN, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+
+    def _selected(self, scope) -> bool:
+        if self.token:
+            headers: Dict[bytes, bytes] = dict(scope.get("headers") or [])
+            supplied = headers.get(PROFILE_HEADER)
+            if supplied is not None and hmac.compare_digest(supplied, self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = RequestSampler(asyncio.current_task(), sys._getframe(), PROFILE_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            duration_ms = (time.perf_counter() - started) * 1000
+            route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+            try:
+                path = await asyncio.to_thread(write_profile, sampler, scope.get("method", ""), route, duration_ms)
+                logger.info("🔬 Profiled %s %s (%.0fms, %d samples): %s",
+                            scope.get("method"), route, duration_ms, sum(sampler.stacks.values()), path)
+            except OSError as e:
+                logger.warning("⚠️ Could not write request profile: %s", e)
@@ -0,0 +1,148 @@
+"""
+Reads and writes of Q&A rows (`QnAEntryModel`, collection qna_entries).
+
+Q&As used to be an array embedded in each prompt_questions document. They are
+now one row per Q&A, keyed by (prompt_questions_id, uuid) and ordered by
+`position`. The parent keeps the metric counters (`geo_metrics`) and the next
+free position (`qna_seq`). Writers change the row(s) first and then apply the
+matching `aggregate_delta` to the parent. The two writes are not atomic, and
+`/calculate-geo-metrics` with `recompute` rebuilds the counters from the rows.
+
+Answers may be stored compressed (`utils/answer_codec.py`): readers get the
+full text back when their projection includes `answer_z`, as
+QNA_API_PROJECTION does; projections without it only see the snippet.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from global_db_opretions import iter_find_batches, update_one, write_one
+from models.prompt_questions import PromptQuestionsModel, QnAModel
+from models.qna import QnAEntryModel
+from utils.answer_codec import answer_update, encode_answer, with_full_answer
+from utils.geo_aggregates import aggregate_delta, merge_updates, sum_updates
+
+# Fields of a row that make up a Q&A in API responses
+QNA_API_PROJECTION = {
+    "_id": 0, "category_id": 1, "question": 1, "answer": 1, "capture": 1,
+    "category_name": 1, "uuid": 1, "llm_flags": 1, "answer_z": 1, "answer_codec": 1,
+}
+
+
+def qna_query(prompt_questions_id: Any, **conditions) -> Dict[str, Any]:
+    return {"prompt_questions_id": ObjectId(prompt_questions_id), **conditions}
+
+
+def to_api(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A row in the API's Q&A shape (QnAModel), JSON-ready."""
+    return QnAModel.model_validate(with_full_answer(row)).model_dump(by_alias=True, mode="json")
+
+
+async def iter_qna(
+    prompt_questions_id: Any,
+    conditions: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, Any]] = QNA_API_PROJECTION,
+    batch_size: int = 500
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Rows of one prompt_questions document in order, streamed from the cursor.
+    Compressed answers are decoded if the projection fetches them.
+    """
+    query = qna_query(prompt_questions_id, **(conditions or {}))
+    async for batch in iter_find_batches(
+        QnAEntryModel, query, batch_size, projection, sort_by=[("position", ASCENDING)]
+    ):
+        for row in batch:
+            yield with_full_answer(row)
+
+
+async def list_qna(
+    prompt_questions_id: Any,
+    conditions: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, Any]] = QNA_API_PROJECTION
+) -> List[Dict[str, Any]]:
+    return [row async for row in iter_qna(prompt_questions_id, conditions, projection)]
+
+
+async def count_qna(prompt_questions_id: Any) -> int:
+    query = {"isDeleted": False, **qna_query(prompt_questions_id)}
+    return await QnAEntryModel.get_pymongo_collection().count_documents(query)
+
+
+async def apply_to_parent(prompt_questions_id: Any, update: Dict[str, Any]) -> None:
+    """Apply a counter delta (or any update) to the parent prompt_questions document."""
+    if update:
+        await write_one(PromptQuestionsModel, {"_id": ObjectId(prompt_questions_id)}, update)
+
+
+async def append_qna(
+    prompt_questions_id: Any,
+    entries: List[Dict[str, Any]],
+    parent_update: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Append Q&As (dicts with question, answer, category_id, uuid, ...) after the
+    existing ones. Positions are reserved on the parent with `$inc qna_seq`, in
+    the same update as the counter deltas of the new rows and `parent_update`.
+    Returns the inserted rows ([] if the parent does not exist).
+    """
+    if not entries:
+        return []
+    deltas = [aggregate_delta(None, entry, entry["uuid"]) for entry in entries]
+    update = sum_updates(*deltas, {"$inc": {"qna_seq": len(entries)}}, parent_update or {})
+    parent = await update_one(PromptQuestionsModel, {"_id": ObjectId(prompt_questions_id)}, update)
+    if parent is None:
+        return []
+
+    first_position = parent.qna_seq - len(entries)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "capture": False,
+            "category_name": None,
+            "llm_flags": None,
+            **entry,
+            **encode_answer(entry.get("answer")),
+            "prompt_questions_id": parent.id,
+            "position": first_position + offset,
+            "company_id": parent.company_id,
+            "project_id": parent.project_id,
+            "createdAt": now,
+            "updatedAt": now,
+            "isDeleted": False,
+        }
+        for offset, entry in enumerate(entries)
+    ]
+    await QnAEntryModel.get_pymongo_collection().insert_many(rows, ordered=True)
+    return rows
+
+
+async def update_qna(prompt_questions_id: Any, qna_uuid: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Set `fields` on one Q&A and move the parent's counters with it.
+    Returns the row before the update (None if there is no such Q&A).
+    """
+    update = {"$set": {**fields, "updatedAt": datetime.utcnow()}}
+    if "answer" in fields:
+        update = merge_updates(update, answer_update(fields["answer"]))
+    previous = await update_one(
+        QnAEntryModel,
+        qna_query(prompt_questions_id, uuid=qna_uuid),
+        update,
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        return None
+    old_row = previous.model_dump()
+    await apply_to_parent(prompt_questions_id, aggregate_delta(old_row, {**old_row, **fields}, qna_uuid))
+    return old_row
+
+
+async def delete_unanswered_qna(prompt_questions_id: Any, placeholder: str) -> int:
+    """Remove Q&As that have no answer yet; returns how many were removed."""
+    query = qna_query(prompt_questions_id, answer={"$in": [None, placeholder]})
+    result = await QnAEntryModel.get_pymongo_collection().delete_many(query)
+    return result.deleted_count
+
@@ -0,0 +1,110 @@
+"""
+Query-plan check for the filters the controllers issue.
+
+Runs `explain` (queryPlanner verbosity, nothing is executed) for each hot query
+and flags the ones whose winning plan still contains a COLLSCAN. Run it against
+a local mongod after changing models or queries:
+
+    python -m utils.query_plans
+
+It exits non-zero when a collection scan is found. Set VERIFY_QUERY_PLANS=1 to
+also run it (warn-only) at startup from `init_db`.
+"""
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Type
+
+from beanie import Document
+from bson import ObjectId
+
+from models.project import Project
+from models.prompt_questions import PromptQuestionsModel
+from models.qna import QnAEntryModel
+
+
+@dataclass
+class QueryPlanReport:
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    stages: List[str] = field(default_factory=list)
+    indexes: List[str] = field(default_factory=list)
+
+    @property
+    def collscan(self) -> bool:
+        return "COLLSCAN" in self.stages
+
+
+def hot_queries() -> List[tuple]:
+    """(name, model, filter) for every filter shape the controllers send to Mongo."""
+    some_id = ObjectId()
+    since = datetime(2000, 1, 1)
+    return [
+        ("prompt questions by project (get-prompt-questions-data)", PromptQuestionsModel,
+         {"isDeleted": False, "project_id": some_id}),
+        ("prompt questions by id (ask, tag, metrics)", PromptQuestionsModel,
+         {"isDeleted": False, "_id": some_id}),
+        ("company metrics export (export/metrics)", PromptQuestionsModel,
+         {"isDeleted": False, "company_id": some_id, "createdAt": {"$gte": since}}),
+        ("company metrics by createdAt", QnAEntryModel,
+         {"isDeleted": False, "company_id": some_id, "createdAt": {"$gte": since}}),
+        ("project metrics by createdAt", QnAEntryModel,
+         {"isDeleted": False, "project_id": some_id, "createdAt": {"$gte": since}}),
+        ("qna rows of a document in order (get-prompt-questions-data, tag, metrics)", QnAEntryModel,
+         {"isDeleted": False, "prompt_questions_id": some_id, "position": {"$gt": 0}}),
+        ("qna row by uuid (ask, get-qna-answer)", QnAEntryModel,
+         {"isDeleted": False, "prompt_questions_id": some_id, "uuid": "00000000-0000-0000-0000-000000000000"}),
+        ("projects of a company (company list, project list)", Project,
+         {"company_id": some_id}),
+    ]
+
+
+def _walk_plan(plan: Dict[str, Any], stages: List[str], indexes: List[str]) -> None:
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    if "indexName" in plan:
+        indexes.append(plan["indexName"])
+    for key in ("inputStage", "queryPlan"):
+        _walk_plan(plan.get(key), stages, indexes)
+    for child in plan.get("inputStages", []):
+        _walk_plan(child, stages, indexes)
+
+
+async def explain_query(model: Type[Document], name: str, query: Dict[str, Any]) -> QueryPlanReport:
+    collection = model.get_pymongo_collection()
+    explained = await collection.database.command(
+        {"explain": {"find": collection.name, "filter": query}, "verbosity": "queryPlanner"}
+    )
+    report = QueryPlanReport(name=name, collection=collection.name, filter=query)
+    _walk_plan(explained.get("queryPlanner", {}).get("winningPlan", {}), report.stages, report.indexes)
+    return report
+
+
+async def verify_query_plans() -> List[QueryPlanReport]:
+    return [await explain_query(model, name, query) for name, model, query in hot_queries()]
+
+
+def format_report(reports: List[QueryPlanReport]) -> str:
+    lines = []
+    for report in reports:
+        status = "COLLSCAN" if report.collscan else "ok"
+        via = ", ".join(report.indexes) or "-"
+        lines.append(f"[{status:8}] {report.collection}: {report.name} (index: {via})")
+    return "\n".join(lines)
+
+
+async def _main() -> int:
+    from database import init_db
+
+    await init_db()
+    reports = await verify_query_plans()
+    print(format_report(reports))
+    return 1 if any(report.collscan for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,37 @@
+"""
+Fast JSON responses.
+
+FastAPI's default path runs every return value through `jsonable_encoder`,
+which walks (and re-dumps) each nested model and dict in Python, and then
+encodes the result with the standard-library `json`. Routes returning large
+documents return `FastJSONResponse(result)` instead: FastAPI skips
+`jsonable_encoder` for Response objects, and orjson writes the bytes directly,
+handling datetime natively and ObjectId through `_default`. Output matches the
+default path: aliases (`_id`), ObjectIds as strings and ISO datetimes.
+"""
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        # Python-mode dump (no JSON pass in pydantic); nested ObjectIds come back here
+        return obj.model_dump(by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
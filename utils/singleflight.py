@@ -0,0 +1,138 @@
+"""
+Single-flight coalescing of identical in-flight operations.
+
+    result = await flights.do("calculate-geo-metrics", body, lambda: compute(body))
+
+Concurrent calls with the same operation and arguments share one execution:
+the first starts it, later ones wait for it and get the same result (or the
+same exception). Nothing is cached; once the flight lands the next call runs
+again. The shared result object is handed to every caller, so treat it as
+read-only.
+
+The execution runs in its own task, so one caller going away does not cancel
+it for the others; it is cancelled only when every caller has gone.
+
+With SINGLEFLIGHT_SYNC=mongo duplicates are also coalesced across workers:
+the execution holds a MongoDB lease on its key, and stores its JSON-encoded
+result in the `singleflight_results` collection for
+SINGLEFLIGHT_RESULT_TTL_SECONDS. A worker that waited on the lease picks that
+result up instead of running the operation again. Results shared this way
+arrive as plain JSON (dicts and lists), not models.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict
+
+import orjson
+
+from utils.leases import OWNER_ID, MongoLease
+from utils.log import get_logger
+from utils.telemetry import REGISTRY, Counter
+
+logger = get_logger(__name__)
+
+SINGLEFLIGHT_SYNC = os.getenv("SINGLEFLIGHT_SYNC", "").lower()  # "" (this process only) or "mongo"
+SINGLEFLIGHT_RESULT_TTL_SECONDS = float(os.getenv("SINGLEFLIGHT_RESULT_TTL_SECONDS", "60"))
+RESULTS_COLLECTION = "singleflight_results"
+
+FLIGHT_CALLS = REGISTRY.register(Counter(
+    "singleflight_calls_total",
+    "Coalesced operations by role: leader (ran it), follower (shared an in-process flight) "
+    "or remote (shared another worker's result).",
+    ("operation", "role")
+))
+
+
+def flight_key(operation: str, args: Any) -> str:
+    """Stable key for `operation` called with JSON-like `args` (dict key order ignored)."""
+    encoded = orjson.dumps(args, option=orjson.OPT_SORT_KEYS, default=str)
+    return f"{operation}:{hashlib.sha1(encoded).hexdigest()}"
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)  # ObjectId and the like
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, sync: bool = False, result_ttl: float = SINGLEFLIGHT_RESULT_TTL_SECONDS):
+        self.sync = sync
+        self.result_ttl = result_ttl
+        self._flights: Dict[str, _Flight] = {}
+        self._ttl_index_ready = False
+
+    async def do(self, operation: str, args: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        key = flight_key(operation, args)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(self._run(operation, key, fn)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, flight=flight: self._land(key, flight))
+        else:
+            FLIGHT_CALLS.inc(operation, "follower")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Every caller is gone (cancelled): nobody wants the result
+                flight.task.cancel()
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _run(self, operation: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.sync:
+            FLIGHT_CALLS.inc(operation, "leader")
+            return await fn()
+
+        started = datetime.utcnow()
+        async with MongoLease(f"singleflight:{key}", owner=f"{OWNER_ID}:{uuid.uuid4().hex[:8]}"):
+            shared = await self._results().find_one({"_id": key, "finishedAt": {"$gte": started}})
+            if shared is not None:
+                FLIGHT_CALLS.inc(operation, "remote")
+                return orjson.loads(shared["value"])
+            FLIGHT_CALLS.inc(operation, "leader")
+            value = await fn()
+            await self._publish(key, value)
+            return value
+
+    @staticmethod
+    def _results():
+        from database import db
+        return db[RESULTS_COLLECTION]
+
+    async def _publish(self, key: str, value: Any) -> None:
+        now = datetime.utcnow()
+        try:
+            if not self._ttl_index_ready:
+                # MongoDB removes results once expiresAt has passed
+                await self._results().create_index("expiresAt", expireAfterSeconds=0)
+                self._ttl_index_ready = True
+            await self._results().update_one(
+                {"_id": key},
+                {"$set": {
+                    "value": orjson.dumps(value, default=_json_default),
+                    "finishedAt": now,
+                    "expiresAt": now + timedelta(seconds=self.result_ttl),
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning("⚠️ Single-flight result was not shared with other workers: %s", e)
+
+
+flights = SingleFlight(sync=SINGLEFLIGHT_SYNC == "mongo")
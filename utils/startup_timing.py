@@ -0,0 +1,35 @@
+"""
+Startup timing report.
+
+`main.py` wraps its heavy imports and `init_db` steps in `startup_timer.step()`;
+the lifespan prints the breakdown once the app is ready. For a per-module
+import tree run `python -X importtime -c "import main"`.
+"""
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, (time.perf_counter() - started) * 1000))
+
+    def report(self) -> str:
+        total_ms = (time.perf_counter() - self.started) * 1000
+        width = max((len(name) for name, _ in self.steps), default=0)
+        lines = [f"⏱️ Startup ready in {total_ms:.0f}ms"]
+        for name, elapsed_ms in self.steps:
+            lines.append(f"   {name:<{width}}  {elapsed_ms:8.1f}ms")
+        return "\n".join(lines)
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,61 @@
+"""
+Streamed JSON bodies for documents built around one large array.
+
+`stream_json_object(head, "qna", entries)` writes the head fields, then the
+array one entry at a time as the async iterator produces them, so the response
+is never materialised as one bytes object. Encoded entries are grouped into
+chunks of about `chunk_size` bytes to keep the number of ASGI sends small.
+`stream_ndjson` does the same for newline-delimited JSON, one item per line.
+"""
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.responses import StreamingResponse
+
+from utils.responses import dumps
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def stream_json_object(
+    head: Dict[str, Any],
+    array_field: str,
+    items: AsyncIterator[Any],
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """JSON object `{**head, array_field: [...items]}` as a byte stream."""
+    head_bytes = dumps({key: value for key, value in head.items() if key != array_field})
+    opening = head_bytes[:-1] + (b"," if len(head_bytes) > 2 else b"") + dumps(array_field) + b":["
+
+    buffer = bytearray(opening)
+    first = True
+    async for item in items:
+        if not first:
+            buffer += b","
+        first = False
+        buffer += dumps(item)
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]}"
+    yield bytes(buffer)
+
+
+async def stream_ndjson(items: AsyncIterator[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """One JSON document per line for each of `items`, as a byte stream."""
+    buffer = bytearray()
+    async for item in items:
+        buffer += dumps(item)
+        buffer += b"\n"
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def json_stream_response(body: AsyncIterator[bytes], **kwargs) -> StreamingResponse:
+    return StreamingResponse(body, media_type="application/json", **kwargs)
+
+
+def ndjson_stream_response(body: AsyncIterator[bytes], **kwargs) -> StreamingResponse:
+    return StreamingResponse(body, media_type="application/x-ndjson", **kwargs)
@@ -0,0 +1,281 @@
+"""
+In-process metrics registry served at `GET /metrics` in the Prometheus text
+exposition format (version 0.0.4).
+
+    REQUEST_LATENCY.observe(0.12, "GET", "/health")
+    with observe_llm("tag_qna"):
+        response = await model.generate_content_async(...)
+
+Metrics are plain counters, gauges and fixed-bucket histograms keyed by a tuple
+of label values; recording one is a dict lookup and a few additions under a
+lock, cheap enough to keep on in production. Collectors registered with
+`REGISTRY.register_collector()` render state kept elsewhere (the MongoDB
+command and pool monitors) at scrape time.
+
+Every worker process has its own registry: with `serve.py` running several
+workers, each scrape sees the worker that answered it.
+"""
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # the response adds "; charset=utf-8"
+
+# Upper bounds (seconds) of the latency histogram buckets
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+BROWSER_BUCKETS = (5, 10, 20, 30, 60, 90, 120, 180, 300, 600)
+
+LabelValues = Tuple[str, ...]
+
+# utils.log builds on this module, so the logger is named by hand (see get_logger there)
+logger = logging.getLogger("envision.utils.telemetry")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def total(self) -> float:
+        """Sum over every label combination."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=HTTP_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one open-ended), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        lines = self.header()
+        for labels, (counts, total, count) in series:
+            lines.extend(render_histogram_series(self.name, self.labelnames, labels, self.buckets, counts, total, count))
+        return lines
+
+
+def render_histogram_series(
+    name: str, labelnames, labels, buckets, counts: List[int], total: float, count: int
+) -> List[str]:
+    """Exposition lines of one histogram series from non-cumulative bucket counts."""
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(list(buckets) + [float("inf")], counts):
+        cumulative += bucket_count
+        le = 'le="' + _number(bound) + '"'
+        lines.append(f"{name}_bucket{_labels(labelnames, labels, le)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labelnames, labels)} {_number(total)}")
+    lines.append(f"{name}_count{_labels(labelnames, labels)} {count}")
+    return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """`collector()` returns ready exposition lines (HELP/TYPE included) at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning("⚠️ Metrics collector %s failed: %s", getattr(collector, '__name__', collector), e)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# 🔹 HTTP
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status")
+))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time until the last response byte was sent.", ("method", "route")
+))
+IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "Requests currently being served."))
+
+# 🔹 Gemini
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "llm_request_duration_seconds", "Gemini call latency by call site and outcome.",
+    ("call_site", "outcome"), buckets=LLM_BUCKETS
+))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "llm_errors_total", "Failed Gemini calls by call site and exception type.", ("call_site", "error")
+))
+
+# 🔹 ChatGPT browser sessions
+BROWSER_SESSIONS = REGISTRY.register(Counter(
+    "browser_sessions_total", "ChatGPT browser sessions by outcome (ok, captcha, no_response, error, cancelled).", ("outcome",)
+))
+BROWSER_SESSION_LATENCY = REGISTRY.register(Histogram(
+    "browser_session_duration_seconds", "ChatGPT browser session duration by outcome.",
+    ("outcome",), buckets=BROWSER_BUCKETS
+))
+
+
+@contextmanager
+def observe_llm(call_site: str):
+    """
+    Time the Gemini call in the block; an exception counts as an error and
+    propagates. A cancelled call (its request went away) is counted apart.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except asyncio.CancelledError:
+        LLM_LATENCY.observe(time.perf_counter() - started, call_site, "cancelled")
+        raise
+    except BaseException as e:
+        LLM_LATENCY.observe(time.perf_counter() - started, call_site, "error")
+        LLM_ERRORS.inc(call_site, type(e).__name__)
+        raise
+    LLM_LATENCY.observe(time.perf_counter() - started, call_site, "ok")
+
+
+def observe_browser_session(outcome: str, duration: float) -> None:
+    BROWSER_SESSIONS.inc(outcome)
+    BROWSER_SESSION_LATENCY.observe(duration, outcome)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and in-flight requests.
+
+    The route label is the matched path template (`/api/projects/{id}`), never
+    the raw path, so the number of series stays bounded; unmatched paths are
+    labelled `<unmatched>`. A request cancelled on client disconnect (see
+    utils/cancellation.py) sends nothing and is counted with status 499.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "<unmatched>"
+            method = scope.get("method", "")
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method, route_label)
+            if status is None:
+                status = 499 if scope.get("cancelled") == "disconnect" else 500
+            REQUESTS.inc(method, route_label, str(status))